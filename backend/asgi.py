@@ -14,3 +14,12 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
 
 application = get_asgi_application()
+
+# Server processes write the audit trail, send email and deliver notifications in
+# the background (see exams/audit.py, core/mail.py and exams/notifications.py)
+from core import mail  # noqa: E402
+from exams import audit, notifications  # noqa: E402
+
+audit.start()
+mail.start()
+notifications.start()
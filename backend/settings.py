@@ -1,5 +1,6 @@
 from pathlib import Path
-from decouple import config  # Import the config function
+from decouple import Csv, config  # Import the config function
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -29,6 +30,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  #Add this at the top!
+    'core.middleware.RequestMetricsMiddleware',  # Per-route latency/query metrics, see /api/internal/metrics/
+    'core.db_router.ReplicaRoutingMiddleware',  # Before sessions, so session reads are routed too
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -71,6 +74,64 @@ DATABASES = {
     }
 }
 
+# Connection lifecycle, chosen with DB_CONN_MODE:
+# - persistent (default): each worker keeps its connection for DB_CONN_MAX_AGE
+#   seconds and checks it still works before reusing it after a request
+# - pool: a bounded connection pool per process, DB_POOL_MIN_SIZE to
+#   DB_POOL_MAX_SIZE connections; waits longer than DB_POOL_TIMEOUT seconds fail.
+#   Needs psycopg 3 (`pip install "psycopg[binary,pool]"`) instead of psycopg2
+# - pgbouncer: for PgBouncer in transaction mode. Connections to PgBouncer
+#   persist, but nothing may outlive a transaction: no server-side cursors
+#   and no prepared statements
+# `python manage.py benchmark_db_connections` compares the mode against a new connection per request.
+DB_CONN_MODE = config('DB_CONN_MODE', default='persistent')
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=60, cast=int)
+if DB_CONN_MODE == 'persistent':
+    DATABASES['default'].update(CONN_MAX_AGE=DB_CONN_MAX_AGE, CONN_HEALTH_CHECKS=True)
+elif DB_CONN_MODE == 'pool':
+    DATABASES['default'].update(CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=True, OPTIONS={'pool': {
+        'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+        'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+        'timeout': config('DB_POOL_TIMEOUT', default=10.0, cast=float),
+    }})
+elif DB_CONN_MODE == 'pgbouncer':
+    DATABASES['default'].update(CONN_MAX_AGE=DB_CONN_MAX_AGE, CONN_HEALTH_CHECKS=True,
+                                DISABLE_SERVER_SIDE_CURSORS=True)
+    try:
+        import psycopg  # noqa: F401
+        DATABASES['default']['OPTIONS'] = {'prepare_threshold': None}  # psycopg2 never prepares
+    except ImportError:
+        pass
+else:
+    raise ImproperlyConfigured(f'DB_CONN_MODE must be persistent, pool or pgbouncer, not {DB_CONN_MODE!r}')
+
+# Optional read replica (core/db_router.py). Safe requests read from it unless
+# the client wrote within REPLICA_PIN_SECONDS; writes always go to the primary.
+# To try routing locally, point DB_REPLICA_HOST at the primary itself.
+if config('DB_REPLICA_HOST', default=''):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': config('DB_REPLICA_HOST'),
+        'PORT': config('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+REPLICA_DATABASE = 'replica'
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=10, cast=int)
+REPLICA_MAX_LAG_SECONDS = config('REPLICA_MAX_LAG_SECONDS', default=5.0, cast=float)  # Beyond this, reads fall back to the primary
+REPLICA_LAG_CHECK_SECONDS = 2
+
+# Cache. The exam warmup (exams/warmup.py) fills it for every web worker to
+# read, so production needs a shared backend, e.g.
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache and
+# CACHE_LOCATION=redis://127.0.0.1:6379/1. The default only lives in one process.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 AUTH_PASSWORD_VALIDATORS = [
@@ -99,6 +160,98 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.0/howto/static-files/
 STATIC_URL = 'static/'
 
+# Uploaded files (answer uploads)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Chunked file-answer uploads: chunks are appended here until the file is complete
+CHUNKED_UPLOAD_DIR = config('CHUNKED_UPLOAD_DIR', default=str(BASE_DIR / 'media' / 'upload_chunks'))
+CHUNKED_UPLOAD_CHUNK_SIZE = 1024 * 1024  # Suggested to clients
+CHUNKED_UPLOAD_MAX_CHUNK_SIZE = 8 * 1024 * 1024
+CHUNKED_UPLOAD_MAX_SIZE = config('CHUNKED_UPLOAD_MAX_SIZE', default=50 * 1024 * 1024, cast=int)
+# Unfinished uploads idle this long are deleted by `manage.py clean_uploads`
+CHUNKED_UPLOAD_EXPIRY_HOURS = config('CHUNKED_UPLOAD_EXPIRY_HOURS', default=24, cast=int)
+
+# Plagiarism detection: answer pairs at least this similar (Jaccard over shingles) are flagged
+PLAGIARISM_SIMILARITY_THRESHOLD = config('PLAGIARISM_SIMILARITY_THRESHOLD', default=0.8, cast=float)
+
+# Automatic grading of descriptive answers. The scorer is any exams.grading.Scorer
+# subclass; the default keyword scorer runs offline and is deterministic.
+GRADING_SCORER = config('GRADING_SCORER', default='exams.grading.KeywordScorer')
+GRADING_BATCH_SIZE = config('GRADING_BATCH_SIZE', default=20, cast=int)
+GRADING_CONCURRENCY = config('GRADING_CONCURRENCY', default=4, cast=int)  # Batches scored at once
+GRADING_MAX_RETRIES = config('GRADING_MAX_RETRIES', default=3, cast=int)
+
+# Manual grading queue: how long a claimed batch stays reserved for its grader
+GRADING_LEASE_SECONDS = config('GRADING_LEASE_SECONDS', default=15 * 60, cast=int)
+GRADING_CLAIM_BATCH_SIZE = 20
+GRADING_CLAIM_MAX_BATCH_SIZE = 100
+
+# Archival: attempts and answers of exams completed this many days ago move to
+# compressed files in default storage (see exams/archive.py), keeping the hot
+# tables at about one term of data
+ARCHIVE_AFTER_DAYS = config('ARCHIVE_AFTER_DAYS', default=180, cast=int)
+ARCHIVE_DIR = 'archives/exams'
+ARCHIVE_BATCH_SIZE = config('ARCHIVE_BATCH_SIZE', default=500, cast=int)  # Attempts deleted per transaction
+
+# Exam warmup: exams opening within this many minutes get their attempts
+# provisioned and their papers and start tickets cached (warm_exams command)
+EXAM_WARMUP_MINUTES = config('EXAM_WARMUP_MINUTES', default=15, cast=int)
+EXAM_PAPER_CACHE_TIMEOUT = 6 * 60 * 60  # Papers are keyed by content version, so this only bounds memory
+
+# Token-bucket throttles on the exam hot paths (rates are set per route in exams/urls.py).
+# Buckets live in this cache, which must be shared by all workers (Redis/memcached)
+THROTTLE_ENABLED = config('THROTTLE_ENABLED', default=True, cast=bool)
+THROTTLE_CACHE = 'default'
+
+# HOD rollups group exams into academic terms starting in these months
+ACADEMIC_TERM_START_MONTHS = (1, 7)
+
+# Audit trail (exams/audit.py): events are queued in memory and written in batches
+AUDIT_QUEUE_SIZE = config('AUDIT_QUEUE_SIZE', default=10000, cast=int)  # Beyond this, requests write batches themselves
+AUDIT_BATCH_SIZE = config('AUDIT_BATCH_SIZE', default=500, cast=int)
+AUDIT_FLUSH_SECONDS = config('AUDIT_FLUSH_SECONDS', default=1.0, cast=float)  # Longest an event waits for its batch
+AUDIT_ENQUEUE_TIMEOUT = config('AUDIT_ENQUEUE_TIMEOUT', default=0.05, cast=float)
+AUDIT_MAX_RETRIES = config('AUDIT_MAX_RETRIES', default=3, cast=int)
+
+# Outgoing email, sent in batches by a background queue (core/mail.py). The default
+# writes messages to files under EMAIL_FILE_PATH; to use a local SMTP server
+# (`python -m aiosmtpd -n -l localhost:1025`) set
+# EMAIL_BACKEND=django.core.mail.backends.smtp.EmailBackend and EMAIL_PORT=1025
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.filebased.EmailBackend')
+EMAIL_FILE_PATH = config('EMAIL_FILE_PATH', default=str(BASE_DIR / 'sent_emails'))
+EMAIL_HOST = config('EMAIL_HOST', default='localhost')
+EMAIL_PORT = config('EMAIL_PORT', default=25, cast=int)
+EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
+EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=False, cast=bool)
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='exams@jainuniversity.ac.in')
+MAIL_QUEUE_SIZE = config('MAIL_QUEUE_SIZE', default=5000, cast=int)  # Beyond this, requests send batches themselves
+MAIL_BATCH_SIZE = config('MAIL_BATCH_SIZE', default=100, cast=int)  # Messages per SMTP connection
+MAIL_FLUSH_SECONDS = config('MAIL_FLUSH_SECONDS', default=0.5, cast=float)
+MAIL_ENQUEUE_TIMEOUT = config('MAIL_ENQUEUE_TIMEOUT', default=0.05, cast=float)
+MAIL_MAX_RETRIES = config('MAIL_MAX_RETRIES', default=3, cast=int)
+
+# Login one-time passwords (core/otp.py). Codes live only in this cache, which
+# must be shared by all workers (Redis/memcached)
+LOGIN_OTP_REQUIRED = config('LOGIN_OTP_REQUIRED', default=False, cast=bool)  # Confirm password logins with an emailed code
+OTP_CACHE = 'default'
+OTP_DIGITS = 6
+OTP_TTL_SECONDS = config('OTP_TTL_SECONDS', default=300, cast=int)
+OTP_MAX_ATTEMPTS = config('OTP_MAX_ATTEMPTS', default=5, cast=int)  # Wrong codes before the login must restart
+
+# Notifications to an exam's students when it is scheduled or its results are
+# published (exams/notifications.py). Channels are exams.notifications.Channel subclasses
+NOTIFICATION_CHANNELS = config('NOTIFICATION_CHANNELS', cast=Csv(),
+                               default='exams.notifications.EmailChannel,exams.notifications.InAppChannel')
+NOTIFICATION_BATCH_SIZE = config('NOTIFICATION_BATCH_SIZE', default=200, cast=int)  # Recipients per delivery
+NOTIFICATION_CONCURRENCY = config('NOTIFICATION_CONCURRENCY', default=4, cast=int)  # Deliveries in flight at once
+NOTIFICATION_MAX_RETRIES = config('NOTIFICATION_MAX_RETRIES', default=3, cast=int)
+NOTIFICATION_RETRY_BACKOFF = 1.0  # Seconds before the first retry, doubling after each
+NOTIFICATION_QUEUE_SIZE = config('NOTIFICATION_QUEUE_SIZE', default=1000, cast=int)  # Deliveries, not recipients
+NOTIFICATION_FLUSH_SECONDS = 0.5
+NOTIFICATION_ENQUEUE_TIMEOUT = 0.05
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -113,8 +266,25 @@ REST_FRAMEWORK = {
     ]
 }
 
+# API JSON encoding: orjson (core/renderers.py; `pip install orjson`, falls back
+# to the stdlib when it isn't installed) or stdlib for DRF's own classes
+if config('JSON_BACKEND', default='orjson') == 'orjson':
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ]
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'] = [
+        'core.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ]
+
 # CORS Settings - CRITICAL for Frontend-Backend Communication
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",  # This is the default port for Next.js
     "http://127.0.0.1:3000",
-]
\ No newline at end of file
+]
+
+# Request metrics exported in Prometheus format at /api/internal/metrics/
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')  # Bearer token for the Prometheus scraper
@@ -1,9 +1,10 @@
 # core/admin.py
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from .admin_tools import AutocompleteFilter, LargeTableAdminMixin
 from .models import User, StudentGroup, StudentProfile, FacultyProfile, HODProfile
 
-class CustomUserAdmin(UserAdmin):
+class CustomUserAdmin(LargeTableAdminMixin, UserAdmin):
     list_display = ('email', 'first_name', 'last_name', 'user_type', 'is_staff', 'is_active')
     list_filter = ('user_type', 'is_staff', 'is_active')
     fieldsets = (
@@ -24,9 +25,14 @@ class CustomUserAdmin(UserAdmin):
     filter_horizontal = ()
 
 
-class StudentProfileAdmin(admin.ModelAdmin):
+class StudentGroupAdmin(admin.ModelAdmin):
+    search_fields = ('name',)  # Needed by the group autocomplete filters
+
+
+class StudentProfileAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('student_id', 'user_email', 'group', 'is_active')
-    list_filter = ('group', 'is_active')
+    list_filter = (('group', AutocompleteFilter), 'is_active')
+    list_select_related = ('user', 'group')
     list_editable = ('is_active',) # Allows toggling active status right from the list view
     search_fields = ('student_id', 'user__email', 'user__first_name', 'user__last_name')
     raw_id_fields = ('user', 'group')
@@ -39,6 +45,7 @@ class StudentProfileAdmin(admin.ModelAdmin):
 class FacultyProfileAdmin(admin.ModelAdmin):
     list_display = ('faculty_id', 'user_email', 'department', 'is_active')
     list_filter = ('department', 'is_active')
+    list_select_related = ('user',)
     list_editable = ('is_active',)
     search_fields = ('faculty_id', 'user__email', 'user__first_name', 'user__last_name')
     raw_id_fields = ('user',)
@@ -52,6 +59,7 @@ class HODProfileAdmin(admin.ModelAdmin):
     list_filter = ('department', 'is_active', 'responsible_for_groups')
     list_editable = ('is_active',)
     search_fields = ('faculty_id', 'user__email', 'user__first_name', 'user__last_name')
+    list_select_related = ('user',)
     filter_horizontal = ('responsible_for_groups',) # Better widget for selecting multiple groups
     raw_id_fields = ('user',)
 
@@ -61,7 +69,7 @@ class HODProfileAdmin(admin.ModelAdmin):
 
 # Register all models
 admin.site.register(User, CustomUserAdmin)
-admin.site.register(StudentGroup)
+admin.site.register(StudentGroup, StudentGroupAdmin)
 admin.site.register(StudentProfile, StudentProfileAdmin)
 admin.site.register(FacultyProfile, FacultyProfileAdmin)
 admin.site.register(HODProfile, HODProfileAdmin)
\ No newline at end of file
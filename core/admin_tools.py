@@ -0,0 +1,113 @@
+"""
+Admin building blocks for tables too large to list or count naively.
+
+- AutocompleteFilter: a related-object filter that searches through the
+  admin autocomplete endpoint instead of rendering every related row.
+- EstimatedCountPaginator: on PostgreSQL, large result counts come from the
+  query planner instead of COUNT(*).
+- LargeTableAdminMixin: wires both up and turns off the extra full-table
+  count and facet counts the changelist would otherwise run.
+"""
+import json
+
+from django import forms
+from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models.fields.related import ForeignObjectRel
+from django.utils.functional import cached_property
+
+
+class AutocompleteFilter(admin.FieldListFilter):
+    """
+    Filter on a foreign key, e.g. `list_filter = [('exam', AutocompleteFilter)]`.
+    The related model's admin needs `search_fields`.
+    """
+    template = 'admin/autocomplete_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        if isinstance(field, ForeignObjectRel) or not field.many_to_one:
+            raise TypeError(f'AutocompleteFilter needs a foreign key, not {field_path}')
+        self.lookup_kwarg = f'{field_path}__{field.target_field.name}__exact'
+        value = params.get(self.lookup_kwarg)
+        self.lookup_val = value[-1] if isinstance(value, list) else value
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.title = field.verbose_name
+        self.admin_site = model_admin.admin_site
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def choices(self, changelist):
+        yield {
+            'selected': self.lookup_val is None,
+            'query_string': changelist.get_query_string(remove=[self.lookup_kwarg]),
+            'display': 'All',
+        }
+
+    def rendered_widget(self):
+        # Only the selected object is loaded; the rest come from the autocomplete view
+        form_field = forms.ModelChoiceField(
+            queryset=self.field.remote_field.model._default_manager.all(),
+            widget=AutocompleteSelect(self.field, self.admin_site),
+            to_field_name=self.field.target_field.name,
+            required=False,
+        )
+        return form_field.widget.render(self.lookup_kwarg, self.lookup_val)
+
+
+def estimated_count(queryset):
+    """
+    The planner's row estimate for `queryset` on PostgreSQL, or None where
+    there is no cheap estimate. Unfiltered tables use pg_class.reltuples.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    queryset = queryset.order_by()
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                           [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+            return row[0] if row and row[0] >= 0 else None  # -1 until the table is first analyzed
+        sql, params = queryset.query.sql_with_params()
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator whose count is the planner's estimate once that estimate passes
+    `estimate_threshold` rows. Smaller results, and databases without
+    estimates, are counted exactly.
+    """
+    estimate_threshold = 100_000
+
+    @cached_property
+    def count(self):
+        estimate = None
+        if hasattr(self.object_list, 'query'):
+            estimate = estimated_count(self.object_list)
+        if estimate is None or estimate < self.estimate_threshold:
+            return super().count
+        return estimate
+
+
+class LargeTableAdminMixin:
+    """ModelAdmin settings for changelists over very large tables."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False  # Skips the unfiltered COUNT(*) behind "N total"
+    show_facets = admin.ShowFacets.NEVER
+
+    @property
+    def media(self):
+        media = super().media
+        if any(isinstance(spec, tuple) and issubclass(spec[1], AutocompleteFilter) for spec in self.list_filter):
+            media += AutocompleteSelect(None, self.admin_site).media
+            media += forms.Media(js=['core/admin/autocomplete_filter.js'])
+        return media
@@ -0,0 +1,145 @@
+"""
+In-process background batching.
+
+A BatchWorker owns a bounded queue and a daemon thread that drains it in
+batches: up to `batch_size` items, or whatever arrived within
+`flush_seconds` of the first one, handed to `handle()` together. Request
+code only pays for a queue put.
+
+When the queue is full, `put()` waits up to `enqueue_timeout` for room and
+then handles the batch at the head of the queue in the calling thread, so a
+backlog slows producers down instead of losing items or growing without
+bound. A caller inside a transaction does that once the transaction
+commits instead: handled there, the batch would be written in (and rolled
+back with) the caller's transaction.
+
+`start()` runs the thread in this process and, after a fork (preloading
+servers), in the child. The queue is flushed at exit. Without a running
+thread (management commands, tests) items wait until `flush()`.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from functools import partial
+
+from django.db import close_old_connections, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+
+class BatchWorker:
+    name = 'batch-worker'
+
+    def __init__(self, queue_size, batch_size, flush_seconds, enqueue_timeout):
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.enqueue_timeout = enqueue_timeout
+        self._reset()
+        self._started = False
+        self._stopping = threading.Event()
+
+    def handle(self, items):
+        """Process one batch. Runs in the worker thread, or in a producer under backpressure."""
+        raise NotImplementedError
+
+    def _reset(self):
+        self.queue = queue.Queue(maxsize=self.queue_size)
+        self.thread = None
+
+    def start(self):
+        """Run the worker thread in this process (and in processes forked from it)."""
+        if self._started:
+            return
+        self._started = True
+        atexit.register(self.stop)
+        os.register_at_fork(after_in_child=self._restart_in_child)
+        self._spawn()
+
+    def _spawn(self):
+        self._stopping.clear()
+        self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self.thread.start()
+
+    def _restart_in_child(self):
+        # The parent's thread doesn't exist here and its queue's lock may be held
+        self._reset()
+        self._spawn()
+
+    def stop(self, timeout=10):
+        """Stop the worker thread and handle whatever is still queued."""
+        self._stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+        self.flush()
+
+    def put(self, item):
+        """Queue `item`. Returns False if the caller had to handle a batch itself to make room."""
+        try:
+            self.queue.put(item, timeout=self.enqueue_timeout)
+            return True
+        except queue.Full:
+            if connection.in_atomic_block:
+                transaction.on_commit(partial(self._make_room, item))
+                return True
+            return self._make_room(item)
+
+    def _make_room(self, item):
+        while True:
+            self._handle(self.take(self.batch_size))
+            try:
+                self.queue.put_nowait(item)
+                return False
+            except queue.Full:
+                continue
+
+    def take(self, limit, wait=None):
+        """
+        Up to `limit` queued items. With `wait`, blocks up to that long for
+        the first one and then up to that long again while the batch fills.
+        """
+        items = []
+        try:
+            if not wait:
+                while len(items) < limit:
+                    items.append(self.queue.get_nowait())
+                return items
+            items.append(self.queue.get(timeout=wait))
+            deadline = time.monotonic() + wait
+            while len(items) < limit and (remaining := deadline - time.monotonic()) > 0:
+                items.append(self.queue.get(timeout=remaining))
+        except queue.Empty:
+            pass
+        return items
+
+    def _run(self):
+        while not self._stopping.is_set():
+            items = self.take(self.batch_size, wait=self.flush_seconds)
+            if items:
+                close_old_connections()  # Honour CONN_MAX_AGE like a request would
+                self._handle(items)
+        close_old_connections()
+
+    def _handle(self, items):
+        if not items:
+            return
+        try:
+            self.handle(items)
+        except Exception:
+            logger.exception('%s failed to handle %d item(s)', self.name, len(items))
+
+    def flush(self):
+        """Handle every queued item now, from the calling thread. Returns how many were taken off the queue."""
+        taken = 0
+        while items := self.take(self.batch_size):
+            self._handle(items)
+            taken += len(items)
+        return taken
+
+    def discard(self):
+        """Drop everything queued (for tests)."""
+        self.take(self.queue.maxsize or self.queue.qsize())
@@ -0,0 +1,43 @@
+# core/conditional.py
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+
+def make_etag(*parts):
+    """Build a quoted ETag from any values that change whenever the representation does."""
+    return quote_etag(hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest())
+
+
+class ConditionalGetMixin:
+    """
+    Generic view mixin answering If-None-Match with a 304.
+
+    Subclasses implement `get_etag_parts()`, which should be much cheaper than
+    building the response: when the client's copy is still current we return
+    before the queryset is loaded or anything is serialized. Runs after
+    authentication and permission checks.
+
+    There is deliberately no Last-Modified: the validators aggregate many
+    rows, and deleting one leaves no newer timestamp behind, so an
+    If-Modified-Since check would answer 304 for a representation that did
+    change. Only the ETag (which includes row counts) catches that.
+    """
+    def get_etag_parts(self):
+        """Return values that change whenever the representation for the current request does."""
+        raise NotImplementedError('`get_etag_parts()` must be implemented.')
+
+    def get(self, request, *args, **kwargs):
+        # The query string selects the representation (e.g. ?fields=), so it is part of the ETag
+        etag = make_etag(request.get_full_path(), *self.get_etag_parts())
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+
+        if response.status_code in (200, 304):
+            response.headers['ETag'] = etag
+            # Let clients keep a copy but always revalidate it
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
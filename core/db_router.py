@@ -0,0 +1,176 @@
+"""
+Read-replica routing with read-your-writes pinning.
+
+ReplicaRoutingMiddleware marks safe (GET/HEAD/OPTIONS) requests as allowed
+to read from the replica; everything else, and all code running outside a
+request, uses the primary. A request that writes sets a short-lived cookie
+pinning that client to the primary for REPLICA_PIN_SECONDS, so a student
+reloading their attempt right after an autosave never sees it missing.
+Reads also stay on the primary once the request has written, inside
+transactions, and whenever the replica lags more than
+REPLICA_MAX_LAG_SECONDS or can't be reached.
+
+Routing is off unless settings.DATABASES has the REPLICA_DATABASE alias.
+Reporting code outside requests can opt in with `with read_replica(): ...`.
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from . import metrics
+
+PIN_COOKIE = 'db_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+routing_decisions = metrics.registry.counter(
+    'db_routing_decisions_total', 'Database chosen for reads, by the reason it was chosen.',
+    ['database', 'reason'])
+replica_fallbacks = metrics.registry.counter(
+    'db_replica_fallbacks_total', 'Replica-eligible reads sent to the primary because the replica was unhealthy.',
+    ['reason'])
+replica_lag = metrics.registry.gauge('db_replica_lag_seconds', 'Replication lag at the last check.')
+
+
+class RoutingState:
+    __slots__ = ('use_replica', 'wrote')
+
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.wrote = False
+
+
+_state = contextvars.ContextVar('db_routing', default=None)
+
+
+def replica_database():
+    """The replica alias, or None when no replica is configured."""
+    alias = settings.REPLICA_DATABASE
+    return alias if alias in settings.DATABASES else None
+
+
+@contextmanager
+def routing(use_replica):
+    """Route the reads of the enclosed block; yields the RoutingState."""
+    state = RoutingState(use_replica)
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+def read_replica():
+    """Let the enclosed reads go to the replica, e.g. for reports and exports."""
+    return routing(use_replica=True)
+
+
+class ReplicaHealth:
+    """Per-process replica lag check, repeated at most every REPLICA_LAG_CHECK_SECONDS."""
+    def __init__(self):
+        self.checked_at = None
+        self.problem = None
+
+    def reset(self):
+        self.checked_at = None
+        self.problem = None
+
+    def check(self, alias):
+        """None if the replica is fit to read from, else 'lag' or 'unavailable'."""
+        now = time.monotonic()
+        if self.checked_at is not None and now - self.checked_at < settings.REPLICA_LAG_CHECK_SECONDS:
+            return self.problem
+        self.checked_at = now
+        try:
+            lag = measure_lag(alias)
+        except DatabaseError:
+            self.problem = 'unavailable'
+        else:
+            replica_lag.set(lag)
+            self.problem = 'lag' if lag > settings.REPLICA_MAX_LAG_SECONDS else None
+        return self.problem
+
+
+health = ReplicaHealth()
+
+
+def measure_lag(alias):
+    """Seconds the replica is behind the primary; 0 on backends without replication."""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT CASE WHEN pg_is_in_recovery() '
+            'THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) ELSE 0 END'
+        )
+        return float(cursor.fetchone()[0])
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        database, reason = self._route_read()
+        routing_decisions.inc(database=database, reason=reason)
+        return database
+
+    def _route_read(self):
+        state = _state.get()
+        alias = replica_database()
+        if alias is None or state is None or not state.use_replica:
+            return DEFAULT_DB_ALIAS, 'primary'
+        if state.wrote:
+            return DEFAULT_DB_ALIAS, 'pinned'
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS, 'transaction'
+        problem = health.check(alias)
+        if problem is not None:
+            replica_fallbacks.inc(reason=problem)
+            return DEFAULT_DB_ALIAS, problem
+        return alias, 'replica'
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True  # The rest of the request reads its own writes
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, replica_database()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # The replica follows the primary's schema through replication
+        if db == replica_database():
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """Sends the reads of safe requests to the replica unless the client is pinned to the primary."""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if replica_database() is None:
+            return self.get_response(request)
+
+        safe = request.method in SAFE_METHODS
+        pinned = self._pinned(request)
+        with routing(use_replica=safe and not pinned) as state:
+            response = self.get_response(request)
+        if state.wrote or not safe:
+            pin_until = int(time.time()) + settings.REPLICA_PIN_SECONDS
+            response.set_cookie(PIN_COOKIE, str(pin_until), max_age=settings.REPLICA_PIN_SECONDS,
+                                httponly=True, samesite='Lax')
+        return response
+
+    @staticmethod
+    def _pinned(request):
+        try:
+            return int(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
@@ -0,0 +1,171 @@
+# core/fieldsets.py
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import permissions
+from rest_framework.serializers import BaseSerializer, ModelSerializer, SerializerMethodField
+
+
+def parse_fieldset(fields=None, expand=None):
+    """
+    Turn the `?fields=` and `?expand=` query params into a fieldset tree.
+
+    `fields=id,status,answers.id` restricts the response to those fields (dotted
+    names reach into nested serializers) and `expand=answers` adds a nested
+    relation in full on top of that. Each node maps a field name to its own
+    subtree, or to None when the whole field should be rendered. Returns None
+    (render everything) when no `fields` were requested.
+    """
+    if not fields:
+        return None
+
+    tree = {}
+    for path in _split(fields):
+        node = tree
+        parts = path.split('.')
+        for part in parts[:-1]:
+            if part in node and node[part] is None:
+                break  # Already included in full
+            node = node.setdefault(part, {})
+        else:
+            node[parts[-1]] = None
+    for path in _split(expand):
+        # Expanding `questions.options` renders questions in full, options included
+        tree[path.split('.')[0]] = None
+    return tree
+
+
+def _split(value):
+    return [part.strip() for part in (value or '').split(',') if part.strip()]
+
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin that only renders the fields named in `fieldset`.
+
+    Pass the tree built by `parse_fieldset` as the `fieldset` keyword argument;
+    nested serializers using this mixin receive their part of the tree.
+    """
+    def __init__(self, *args, fieldset=None, **kwargs):
+        self._fieldset = fieldset
+        super().__init__(*args, **kwargs)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self._fieldset is None:
+            return fields
+
+        for name in list(fields):
+            if name not in self._fieldset:
+                del fields[name]
+        for name, subset in self._fieldset.items():
+            child = getattr(fields.get(name), 'child', fields.get(name))
+            if isinstance(child, SparseFieldsMixin):
+                child._fieldset = subset
+        return fields
+
+
+def _projection(serializer, prefix=''):
+    """
+    Work out which columns and relations `serializer` reads.
+
+    Returns `(only, select_related, prefetch, complete)`. `complete` is False
+    when a field reads something we can't map to a column, in which case the
+    caller must not restrict columns with `only()`.
+    """
+    opts = serializer.Meta.model._meta
+    only = {prefix + opts.pk.name}
+    select_related = []
+    prefetch = []
+    complete = True
+    dependencies = getattr(serializer.Meta, 'field_dependencies', {})
+
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+
+        if isinstance(field, SerializerMethodField) or field.source == '*':
+            if field.field_name not in dependencies:
+                complete = False
+                continue
+            for dependency in dependencies[field.field_name]:
+                only.add(prefix + dependency)
+                if '__' in dependency:
+                    relation = prefix + dependency.rsplit('__', 1)[0]
+                    only.add(relation)
+                    select_related.append(relation)
+            continue
+
+        try:
+            model_field = opts.get_field(field.source)
+        except FieldDoesNotExist:
+            complete = False
+            continue
+
+        if model_field.many_to_many or model_field.one_to_many:
+            # Many-valued relations cost one extra query each, so only
+            # prefetch the ones that were actually requested.
+            related_model = model_field.related_model
+            child = getattr(field, 'child', None)
+            if isinstance(child, ModelSerializer):
+                extra = (model_field.field.name,) if model_field.one_to_many else ()
+                queryset = _project(related_model._default_manager.all(), child, extra)
+            else:
+                queryset = related_model._default_manager.only(related_model._meta.pk.name)
+            prefetch.append(Prefetch(prefix + field.source, queryset=queryset))
+        elif isinstance(field, BaseSerializer):
+            # Nested to-one serializer: join it in and project its columns too
+            only.add(prefix + field.source)
+            select_related.append(prefix + field.source)
+            nested = _projection(field, prefix + field.source + '__')
+            only |= nested[0]
+            select_related += nested[1]
+            prefetch += nested[2]
+            complete = complete and nested[3]
+        else:
+            only.add(prefix + field.source)
+
+    return only, select_related, prefetch, complete
+
+
+def _project(queryset, serializer, extra=()):
+    only, select_related, prefetch, complete = _projection(serializer)
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    if complete:
+        queryset = queryset.only(*only, *extra)
+    return queryset
+
+
+def project_queryset(queryset, serializer_class, fieldset=None):
+    """
+    Restrict `queryset` to what `serializer_class` renders for `fieldset`.
+
+    Loads only the needed columns, joins to-one relations the serializer reads
+    and prefetches only the many-valued relations that were requested.
+    """
+    return _project(queryset, serializer_class(fieldset=fieldset))
+
+
+class SparseFieldsViewMixin:
+    """
+    Generic view mixin adding `?fields=` / `?expand=` support to read views.
+
+    The serializer class must use `SparseFieldsMixin`.
+    """
+    def get_fieldset(self):
+        if self.request.method not in permissions.SAFE_METHODS:
+            return None
+        if not hasattr(self, '_fieldset'):
+            params = self.request.query_params
+            self._fieldset = parse_fieldset(params.get('fields'), params.get('expand'))
+        return self._fieldset
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fieldset', self.get_fieldset())
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return project_queryset(queryset, self.get_serializer_class(), self.get_fieldset())
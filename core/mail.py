@@ -0,0 +1,76 @@
+"""
+Outgoing email, sent off the request path.
+
+`send()` puts an EmailMessage on a bounded in-process queue. A background
+thread (core/background.py) sends the queued messages in batches of up to
+MAIL_BATCH_SIZE over one EMAIL_BACKEND connection, so a request never waits
+on SMTP. A batch that fails is retried up to MAIL_MAX_RETRIES times on a
+new connection, then logged with its recipients and dropped. Messages are
+counted in `mail_messages_total{outcome}`.
+
+The thread is started by the WSGI/ASGI entry points. Without it (management
+commands, tests) messages wait in the queue until `flush()`.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+
+from . import metrics
+from .background import BatchWorker
+
+logger = logging.getLogger(__name__)
+
+mail_messages = metrics.registry.counter(
+    'mail_messages_total', 'Outgoing emails by outcome: queued, sent or dropped.', ['outcome'])
+mail_queue_depth = metrics.registry.gauge('mail_queue_depth', 'Emails waiting to be sent.')
+
+
+class MailQueue(BatchWorker):
+    name = 'mail-sender'
+
+    def __init__(self):
+        super().__init__(settings.MAIL_QUEUE_SIZE, settings.MAIL_BATCH_SIZE, settings.MAIL_FLUSH_SECONDS,
+                         settings.MAIL_ENQUEUE_TIMEOUT)
+
+    def put(self, message):
+        super().put(message)
+        mail_messages.inc(outcome='queued')
+
+    def handle(self, messages):
+        for attempt in range(settings.MAIL_MAX_RETRIES + 1):
+            try:
+                # One connection (one SMTP session) for the whole batch
+                get_connection().send_messages(messages)
+            except Exception:
+                if attempt == settings.MAIL_MAX_RETRIES:
+                    mail_messages.inc(len(messages), outcome='dropped')
+                    logger.exception('Dropped %d emails to %s', len(messages),
+                                     [message.to for message in messages])
+                    return
+                time.sleep(0.5 * 2 ** attempt)
+            else:
+                mail_messages.inc(len(messages), outcome='sent')
+                return
+
+
+outbox = MailQueue()
+
+
+@metrics.registry.collector
+def collect_mail_queue():
+    mail_queue_depth.set(outbox.queue.qsize())
+
+
+def send(message):
+    """Queue an EmailMessage for sending."""
+    outbox.put(message)
+
+
+def start():
+    outbox.start()
+
+
+def flush():
+    return outbox.flush()
@@ -0,0 +1,79 @@
+import copy
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.utils import load_backend
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the database cost of a short request (connect if needed, one query, end of '
+        'request) with a new connection per request and with the configured DB_CONN_MODE.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Simulated requests per mode')
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        configured = copy.deepcopy(connections.settings[options['database']])
+        per_request = copy.deepcopy(configured)
+        per_request['CONN_MAX_AGE'] = 0
+        per_request['OPTIONS'].pop('pool', None)
+
+        results = {}
+        for name, settings_dict in [('new connection per request', per_request),
+                                    (f"configured ({mode_label(configured)})", configured)]:
+            results[name] = self.measure(settings_dict, options['requests'])
+            samples, opened = results[name]
+            self.stdout.write(
+                f'{name}: {len(samples)} requests, {opened} connections opened, '
+                f'mean {statistics.mean(samples) * 1000:.2f} ms, '
+                f'p50 {percentile(samples, 50) * 1000:.2f} ms, p95 {percentile(samples, 95) * 1000:.2f} ms'
+            )
+
+        (before, _), (after, _) = results.values()
+        saved = statistics.mean(before) - statistics.mean(after)
+        self.stdout.write(self.style.SUCCESS(f'Connection overhead saved per request: {saved * 1000:.2f} ms'))
+
+    def measure(self, settings_dict, requests):
+        """Run `requests` simulated requests on a private connection built from `settings_dict`."""
+        backend = load_backend(settings_dict['ENGINE'])
+        connection = backend.DatabaseWrapper(settings_dict, alias='benchmark')
+        opened = 0
+
+        def count(sender, **kwargs):
+            nonlocal opened
+            if kwargs['connection'] is connection:
+                opened += 1
+
+        connection_created.connect(count, weak=False)
+        samples = []
+        try:
+            for _ in range(requests):
+                start = time.perf_counter()
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                    cursor.fetchone()
+                # What Django's request_finished handler does
+                connection.close_if_unusable_or_obsolete()
+                samples.append(time.perf_counter() - start)
+        finally:
+            connection_created.disconnect(count)
+            connection.close()
+            if getattr(connection, 'pool', None) is not None:
+                connection.close_pool()
+        return samples, opened
+
+
+def mode_label(settings_dict):
+    if settings_dict['OPTIONS'].get('pool'):
+        return 'pool'
+    return f"CONN_MAX_AGE={settings_dict['CONN_MAX_AGE']}"
+
+
+def percentile(samples, percent):
+    return statistics.quantiles(samples, n=100, method='inclusive')[percent - 1]
@@ -0,0 +1,222 @@
+# core/metrics.py
+"""
+Minimal in-process metrics registry with Prometheus text exposition.
+
+Every worker process keeps its own counters; recording is a dict lookup and a
+few additions under a per-metric lock, cheap enough to leave on under load.
+"""
+import logging
+import threading
+from bisect import bisect_left
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in (*zip(names, values), *extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(self._render_samples(items))
+        return lines
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def _render_samples(self, items):
+        for key, value in items:
+            yield f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+
+
+class Gauge(Counter):
+    type = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, then sum and count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, **labels):
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def _render_samples(self, items):
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float('inf')), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, [('le', _format_value(bound))])
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            labels = _format_labels(self.labelnames, key)
+            yield f'{self.name}_sum{labels} {_format_value(total)}'
+            yield f'{self.name}_count{labels} {count}'
+
+
+class Registry:
+    """Holds every metric of the process; metrics are created on first use."""
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif type(metric) is not cls:
+                raise ValueError(f'Metric {name} is already registered as a {metric.type}.')
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def collector(self, func):
+        """Register `func` to update metrics from outside state just before each render."""
+        self._collectors.append(func)
+        return func
+
+    def clear(self):
+        """Reset every recorded value (mainly for tests)."""
+        for metric in list(self._metrics.values()):
+            metric.clear()
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        for collect in self._collectors:
+            try:
+                collect()
+            except Exception:
+                logger.exception('Metrics collector %s failed', collect.__name__)
+        lines = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+# ===== HTTP REQUEST METRICS =====
+
+http_requests = registry.counter(
+    'http_requests_total', 'HTTP requests by route, method and status code.',
+    ['method', 'route', 'status'])
+http_exceptions = registry.counter(
+    'http_request_exceptions_total', 'Unhandled exceptions raised by views.',
+    ['method', 'route', 'exception'])
+http_latency = registry.histogram(
+    'http_request_duration_seconds', 'Time spent handling the request.',
+    ['method', 'route'], LATENCY_BUCKETS)
+http_db_queries = registry.histogram(
+    'http_request_db_queries', 'Database queries executed per request.',
+    ['method', 'route'], QUERY_COUNT_BUCKETS)
+http_db_time = registry.histogram(
+    'http_request_db_duration_seconds', 'Time spent in the database per request.',
+    ['method', 'route'], LATENCY_BUCKETS)
+http_response_size = registry.histogram(
+    'http_response_size_bytes', 'Size of the response body.',
+    ['method', 'route'], SIZE_BUCKETS)
+
+# ===== DATABASE CONNECTION POOL METRICS =====
+
+db_pool_connections = registry.gauge(
+    'db_pool_connections', 'Connections held by the pool, by state.', ['database', 'state'])
+db_pool_waiting = registry.gauge(
+    'db_pool_requests_waiting', 'Requests currently waiting for a pooled connection.', ['database'])
+db_pool_requests = registry.counter(
+    'db_pool_requests_total', 'Connections handed out by the pool.', ['database'])
+db_pool_queued = registry.counter(
+    'db_pool_requests_queued_total', 'Requests that had to wait for a connection.', ['database'])
+db_pool_wait = registry.counter(
+    'db_pool_wait_seconds_total', 'Time spent waiting for a pooled connection.', ['database'])
+db_pool_errors = registry.counter(
+    'db_pool_request_errors_total', 'Requests that timed out or failed waiting for a connection.', ['database'])
+
+
+@registry.collector
+def collect_db_pools():
+    """Read the stats of every configured psycopg pool (DB_CONN_MODE=pool)."""
+    for alias in connections:
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is None:
+            continue
+        stats = pool.pop_stats()  # Counters reset on read, so they're added up here
+        size, available = stats.get('pool_size', 0), stats.get('pool_available', 0)
+        db_pool_connections.set(available, database=alias, state='idle')
+        db_pool_connections.set(size - available, database=alias, state='in_use')
+        db_pool_waiting.set(stats.get('requests_waiting', 0), database=alias)
+        db_pool_requests.inc(stats.get('requests_num', 0), database=alias)
+        db_pool_queued.inc(stats.get('requests_queued', 0), database=alias)
+        db_pool_wait.inc(stats.get('requests_wait_ms', 0) / 1000, database=alias)
+        db_pool_errors.inc(stats.get('requests_errors', 0), database=alias)
@@ -0,0 +1,67 @@
+# core/middleware.py
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics
+
+
+class QueryStats:
+    """Database execute wrapper counting queries and the time spent in them."""
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+class RequestMetricsMiddleware:
+    """
+    Records latency, DB query count/time, response size and status per route.
+
+    Routes are labelled with their URL pattern (e.g. `api/exams/<int:pk>/`),
+    never the raw path, so the number of series stays bounded.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'METRICS_ENABLED', True)
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        stats = QueryStats()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        route = self._route(request)
+        method = request.method
+        metrics.http_requests.inc(method=method, route=route, status=response.status_code)
+        metrics.http_latency.observe(duration, method=method, route=route)
+        metrics.http_db_queries.observe(stats.count, method=method, route=route)
+        metrics.http_db_time.observe(stats.duration, method=method, route=route)
+        if not response.streaming:
+            metrics.http_response_size.observe(len(response.content), method=method, route=route)
+        return response
+
+    def process_exception(self, request, exception):
+        if self.enabled:
+            metrics.http_exceptions.inc(method=request.method, route=self._route(request),
+                                        exception=type(exception).__name__)
+
+    @staticmethod
+    def _route(request):
+        match = getattr(request, 'resolver_match', None)
+        return match.route if match is not None else 'unmatched'
@@ -0,0 +1,95 @@
+"""
+One-time passwords confirming a password login.
+
+Issuing an OTP writes nothing to the database and sends nothing in the
+request. The code is hashed (HMAC keyed with SECRET_KEY, salted with a
+random per-challenge nonce) and the hash becomes part of a cache key that
+expires after OTP_TTL_SECONDS. The client gets a signed challenge naming
+the user and the nonce, and the code is emailed through the background mail
+queue (core/mail.py).
+
+Checking a code is one cache round trip: deleting the key for (nonce, hash)
+succeeds only if the code is right, unexpired and unused, and doing it with
+a delete makes each code single-use even under concurrent submissions. A
+wrong code increments the challenge's failure counter; after
+OTP_MAX_ATTEMPTS failures the code is revoked and the user has to log in
+again. Guesses already in flight at that moment are bounded by the throttle
+on the verify route.
+"""
+import secrets
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+from django.core.mail import EmailMessage
+from django.utils.crypto import salted_hmac
+
+from . import mail, metrics
+
+SIGNING_SALT = 'core.otp'
+
+otp_verifications = metrics.registry.counter(
+    'otp_verifications_total', 'Login OTP checks by outcome: ok, wrong, expired or locked.', ['outcome'])
+
+
+class OTPError(Exception):
+    pass
+
+
+def _cache():
+    return caches[settings.OTP_CACHE]
+
+
+def _digest(nonce, code):
+    return salted_hmac(SIGNING_SALT, f'{nonce}:{code}').hexdigest()
+
+
+def _keys(nonce):
+    """Cache keys for the challenge's failure count and its code's hash (kept so it can be revoked)."""
+    return f'otp:{nonce}:failures', f'otp:{nonce}:digest'
+
+
+def issue(user):
+    """Create a code for `user`, queue the email carrying it, and return the challenge to confirm it with."""
+    nonce = secrets.token_urlsafe(16)
+    code = f'{secrets.randbelow(10 ** settings.OTP_DIGITS):0{settings.OTP_DIGITS}d}'
+    digest = _digest(nonce, code)
+    failures_key, digest_key = _keys(nonce)
+    _cache().set_many({f'otp:{nonce}:code:{digest}': user.pk, failures_key: 0, digest_key: digest},
+                      timeout=settings.OTP_TTL_SECONDS)
+    minutes = max(1, settings.OTP_TTL_SECONDS // 60)
+    mail.send(EmailMessage(
+        subject='Your login code',
+        body=f'Your login code is {code}. It expires in {minutes} minute{"s" if minutes != 1 else ""}.\n\n'
+             'If you did not try to log in, change your password.',
+        to=[user.email],
+    ))
+    return signing.dumps({'user': user.pk, 'nonce': nonce}, salt=SIGNING_SALT)
+
+
+def verify(challenge, code):
+    """The id of the user `challenge` was issued to, if `code` confirms it; raises OTPError otherwise."""
+    try:
+        payload = signing.loads(challenge, salt=SIGNING_SALT, max_age=settings.OTP_TTL_SECONDS)
+    except signing.BadSignature:  # Includes expired challenges
+        otp_verifications.inc(outcome='expired')
+        raise OTPError('Invalid or expired code. Please log in again.')
+    nonce = payload['nonce']
+    cache = _cache()
+    if cache.delete(f'otp:{nonce}:code:{_digest(nonce, str(code).strip())}'):
+        otp_verifications.inc(outcome='ok')
+        return payload['user']
+
+    failures_key, digest_key = _keys(nonce)
+    try:
+        failures = cache.incr(failures_key)
+    except ValueError:  # The challenge expired or was revoked
+        otp_verifications.inc(outcome='expired')
+        raise OTPError('Invalid or expired code. Please log in again.')
+    if failures >= settings.OTP_MAX_ATTEMPTS:
+        digest = cache.get(digest_key)
+        cache.delete_many([failures_key, digest_key, f'otp:{nonce}:code:{digest}'])
+        otp_verifications.inc(outcome='locked')
+        raise OTPError('Too many incorrect codes. Please log in again.')
+    otp_verifications.inc(outcome='wrong')
+    raise OTPError('Incorrect code.')
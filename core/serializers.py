@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
+from .fieldsets import SparseFieldsMixin
 from .models import User, StudentProfile, FacultyProfile, HODProfile, StudentGroup
 
 # Serializer for User Registration
@@ -49,21 +50,21 @@ class UserLoginSerializer(serializers.Serializer):
 
 
 # Serializer for Student Group Model
-class StudentGroupSerializer(serializers.ModelSerializer):
+class StudentGroupSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = StudentGroup
         fields = '__all__'  # Serialize all fields: 'id', 'name', 'description'
 
 
 # Detailed Serializer for User Model (for profile views)
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'email', 'first_name', 'last_name', 'user_type')
 
 
 # Serializer for Student Profile (Includes User data)
-class StudentProfileSerializer(serializers.ModelSerializer):
+class StudentProfileSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user = UserProfileSerializer(read_only=True)  # Nest the user info
     group = StudentGroupSerializer(read_only=True)  # Nest the group info
     group_id = serializers.PrimaryKeyRelatedField(  # Allow setting group by ID
@@ -76,7 +77,7 @@ class StudentProfileSerializer(serializers.ModelSerializer):
 
 
 # Serializer for Faculty Profile (Includes User data)
-class FacultyProfileSerializer(serializers.ModelSerializer):
+class FacultyProfileSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user = UserProfileSerializer(read_only=True)
 
     class Meta:
@@ -85,7 +86,7 @@ class FacultyProfileSerializer(serializers.ModelSerializer):
 
 
 # Serializer for HOD Profile (Includes User data and Groups)
-class HODProfileSerializer(serializers.ModelSerializer):
+class HODProfileSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user = UserProfileSerializer(read_only=True)
     responsible_for_groups = StudentGroupSerializer(many=True, read_only=True)  # Nest groups info
     group_ids = serializers.PrimaryKeyRelatedField(  # Allow setting groups by list of IDs
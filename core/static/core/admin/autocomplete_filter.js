@@ -0,0 +1,13 @@
+'use strict';
+{
+    // Reload the changelist filtered by the object picked in an AutocompleteFilter
+    django.jQuery(document).on('change', '.autocomplete-filter select', function() {
+        const url = new URL(window.location.href);
+        url.searchParams.delete(this.name);
+        url.searchParams.delete('p');
+        if (this.value) {
+            url.searchParams.set(this.name, this.value);
+        }
+        window.location.href = url.toString();
+    });
+}
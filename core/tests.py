@@ -1,3 +1,292 @@
-from django.test import TestCase
+import datetime
+import decimal
+import json
+import re
+import unittest.mock
+import uuid
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from django.contrib.auth.hashers import make_password
+from django.core import mail as django_mail
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from . import db_router
+from . import mail
+from . import renderers
+from . import throttling
+from .admin_tools import EstimatedCountPaginator, estimated_count
+from .models import User, StudentGroup, StudentProfile, HODProfile
+
+
+class QueryBudgetTests(TestCase):
+    """Fixed query budgets for the authentication and profile endpoints."""
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = StudentGroup.objects.create(name='MCA ISMS 2024')
+        cls.student = User.objects.create(email='student@jainuniversity.ac.in', user_type='student',
+                                          password=make_password('password'))
+        StudentProfile.objects.create(user=cls.student, student_id='STU00001', group=cls.group)
+        cls.hod = User.objects.create(email='hod@jainuniversity.ac.in', user_type='hod')
+        profile = HODProfile.objects.create(user=cls.hod, faculty_id='HOD001')
+        profile.responsible_for_groups.add(
+            cls.group, *StudentGroup.objects.bulk_create([StudentGroup(name=f'Group {i}') for i in range(20)])
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_login(self):
+        # Session creation and save run inside savepoints, which count too
+        with self.assertNumQueries(9):
+            response = self.client.post(reverse('user-login'), {
+                'email': 'student@jainuniversity.ac.in', 'password': 'password'
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_register(self):
+        with self.assertNumQueries(3):
+            response = self.client.post(reverse('user-register'), {
+                'email': 'new.student@jainuniversity.ac.in', 'password': 'password123',
+                'user_type': 'student',
+            }, format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def test_student_profile(self):
+        self.client.force_login(self.student)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('current-user-profile'))
+        self.assertEqual(response.data['profile']['group']['name'], 'MCA ISMS 2024')
+
+    def test_student_profile_sparse_fields(self):
+        self.client.force_login(self.student)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('current-user-profile'), {'fields': 'student_id'})
+        self.assertEqual(response.data['profile'], {'student_id': 'STU00001'})
+
+    def test_hod_profile(self):
+        self.client.force_login(self.hod)
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('current-user-profile'))
+        self.assertEqual(len(response.data['profile']['responsible_for_groups']), 21)
+
+    @override_settings(METRICS_TOKEN='scrape-token')
+    def test_metrics(self):
+        self.client.get(reverse('user-logout'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-token')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('http_requests_total{', response.content.decode())
+
+    def test_metrics_requires_token(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 403)
+
+    def test_benchmark_db_connections(self):
+        out = StringIO()
+        call_command('benchmark_db_connections', requests=5, stdout=out)
+        self.assertIn('new connection per request: 5 requests', out.getvalue())
+        self.assertIn('Connection overhead saved per request', out.getvalue())
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    def setUp(self):
+        User.objects.bulk_create([User(email=f'user{i}@jainuniversity.ac.in') for i in range(5)])
+
+    def test_small_results_are_counted_exactly(self):
+        with unittest.mock.patch('core.admin_tools.estimated_count', return_value=7):
+            paginator = EstimatedCountPaginator(User.objects.order_by('id'), 2)
+            self.assertEqual(paginator.count, 5)
+            self.assertEqual(paginator.num_pages, 3)
+
+    def test_large_results_use_the_estimate(self):
+        with unittest.mock.patch('core.admin_tools.estimated_count', return_value=2_000_000):
+            paginator = EstimatedCountPaginator(User.objects.order_by('id'), 100)
+            with self.assertNumQueries(0):
+                self.assertEqual(paginator.count, 2_000_000)
+
+    def test_no_estimate_without_postgres(self):
+        if connection.vendor != 'postgresql':
+            self.assertIsNone(estimated_count(User.objects.all()))
+
+
+@unittest.mock.patch('core.db_router.replica_database', return_value='replica')
+class ReplicaRouterTests(SimpleTestCase):
+    # Not a TestCase: its wrapping transaction would keep every read on the primary
+    databases = {'default'}
+
+    def setUp(self):
+        self.router = db_router.ReplicaRouter()
+        self.factory = RequestFactory()
+        db_router.health.reset()
+        db_router.routing_decisions.clear()
+        db_router.replica_fallbacks.clear()
+
+    def route(self, request):
+        """Run `request` through the middleware; the view reports where a read would go."""
+        def view(request):
+            return HttpResponse(self.router.db_for_read(User))
+        return db_router.ReplicaRoutingMiddleware(view)(request)
+
+    def test_safe_requests_read_from_the_replica(self, _):
+        with unittest.mock.patch.object(db_router.health, 'check', return_value=None):
+            response = self.route(self.factory.get('/api/exams/'))
+        self.assertEqual(response.content, b'replica')
+        self.assertNotIn(db_router.PIN_COOKIE, response.cookies)
+        self.assertEqual(db_router.routing_decisions.value(database='replica', reason='replica'), 1)
+
+    def test_writes_pin_the_client_to_the_primary(self, _):
+        response = self.route(self.factory.post('/api/attempts/1/submit/'))
+        self.assertEqual(response.content, b'default')
+        pin = response.cookies[db_router.PIN_COOKIE]
+        self.assertEqual(pin['max-age'], 10)
+
+        request = self.factory.get('/api/attempts/1/')
+        request.COOKIES[db_router.PIN_COOKIE] = pin.value
+        self.assertEqual(self.route(request).content, b'default')
+
+    def test_reads_after_a_write_stay_on_the_primary(self, _):
+        with db_router.read_replica(), unittest.mock.patch.object(db_router.health, 'check', return_value=None):
+            self.assertEqual(self.router.db_for_read(User), 'replica')
+            self.assertEqual(self.router.db_for_write(User), 'default')
+            self.assertEqual(self.router.db_for_read(User), 'default')
+
+    def test_transactions_read_from_the_primary(self, _):
+        with db_router.read_replica(), transaction.atomic():
+            self.assertEqual(self.router.db_for_read(User), 'default')
+
+    def test_lagging_replica_falls_back_to_the_primary(self, _):
+        with db_router.read_replica(), unittest.mock.patch('core.db_router.measure_lag', return_value=30.0) as lag:
+            self.assertEqual(self.router.db_for_read(User), 'default')
+            self.assertEqual(self.router.db_for_read(User), 'default')
+        self.assertEqual(lag.call_count, 1)  # The check result is reused for a while
+        self.assertEqual(db_router.replica_fallbacks.value(reason='lag'), 2)
+        self.assertEqual(db_router.replica_lag.value(), 30.0)
+
+    def test_no_routing_outside_requests(self, _):
+        self.assertEqual(self.router.db_for_read(User), 'default')
+        self.assertIs(self.router.allow_migrate('replica', 'core'), False)
+
+
+class FastJSONTests(SimpleTestCase):
+    data = {
+        'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'at': datetime.datetime(2025, 8, 31, 14, 55, 37, tzinfo=datetime.timezone.utc),
+        'score': decimal.Decimal('7.50'),
+        'text': 'Line\u2028separator',
+        'answers': [{1: 'a'}],
+    }
+
+    def test_renders_like_the_stdlib_renderer(self):
+        expected = json.loads(JSONRenderer().render(self.data))
+        self.assertEqual(json.loads(renderers.FastJSONRenderer().render(self.data)), expected)
+        self.assertIn(b'\\u2028', renderers.FastJSONRenderer().render(self.data))
+
+    def test_parses_and_reports_errors(self):
+        parser = renderers.FastJSONParser()
+        self.assertEqual(parser.parse(BytesIO(b'{"answer": "\xc3\xa9"}')), {'answer': '\u00e9'})
+        with self.assertRaises(ParseError):
+            parser.parse(BytesIO(b'{"answer": '))
+
+    def test_falls_back_without_orjson(self):
+        with unittest.mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(renderers.FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+            self.assertEqual(renderers.FastJSONParser().parse(BytesIO(b'[1]')), [1])
+
+
+class TokenBucketTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = LocMemCache('token-bucket-tests', {})
+        self.bucket = throttling.TokenBucket('3/s')
+
+    def consume(self, now):
+        return self.bucket.consume(self.cache, 'bucket', now=now)
+
+    def test_burst_then_refill(self):
+        self.assertEqual([self.consume(100.0) for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(self.consume(100.0), 1 / 3, places=3)
+        self.assertAlmostEqual(self.consume(100.2), 1 / 3 - 0.2, places=3)  # Rejections cost nothing
+        self.assertEqual(self.consume(100.34), 0.0)
+        self.assertGreater(self.consume(100.34), 0)
+
+    def test_idle_bucket_refills_only_to_capacity(self):
+        self.consume(100.0)
+        self.assertEqual([self.consume(200.0) for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertGreater(self.consume(200.0), 0)
+
+    def test_rates(self):
+        self.assertEqual(throttling.parse_rate('120/min'), (120, 60.0))
+        with self.assertRaises(throttling.ImproperlyConfigured):
+            throttling.parse_rate('fast')
+
+
+@override_settings(LOGIN_OTP_REQUIRED=True)
+class OTPLoginTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create(email='student@jainuniversity.ac.in', user_type='student',
+                                          password=make_password('password'))
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        mail.outbox.discard()
+
+    def log_in(self):
+        response = self.client.post(reverse('user-login'), {
+            'email': 'student@jainuniversity.ac.in', 'password': 'password'
+        }, format='json')
+        self.assertEqual(response.status_code, 202)
+        mail.flush()
+        code = re.search(r'\b(\d{6})\b', django_mail.outbox[-1].body).group(1)
+        return response.data['challenge'], code
+
+    def verify(self, challenge, code):
+        return self.client.post(reverse('user-login-verify'), {'challenge': challenge, 'code': code}, format='json')
+
+    def test_login_with_code(self):
+        # Issuing the code only reads the user: nothing is written and nothing is sent in the request
+        with self.assertNumQueries(1):
+            challenge, code = self.log_in()
+        self.assertEqual(django_mail.outbox[-1].to, ['student@jainuniversity.ac.in'])
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+        response = self.verify(challenge, code)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user']['email'], 'student@jainuniversity.ac.in')
+        self.assertEqual(self.client.session['_auth_user_id'], str(self.student.pk))
+        self.student.refresh_from_db()
+        self.assertIsNone(self.student.otp)
+
+        self.assertEqual(self.verify(challenge, code).status_code, 400)  # Codes are single-use
+
+    def test_too_many_wrong_codes_revoke_the_code(self):
+        challenge, code = self.log_in()
+        wrong = f'{(int(code) + 1) % 10 ** 6:06d}'
+        for _ in range(4):
+            self.assertEqual(self.verify(challenge, wrong).data['error'], 'Incorrect code.')
+        self.assertEqual(self.verify(challenge, wrong).data['error'], 'Too many incorrect codes. Please log in again.')
+        response = self.verify(challenge, code)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('expired', response.data['error'])
+
+    def test_tampered_challenge(self):
+        challenge, code = self.log_in()
+        response = self.verify(challenge[:-2] + 'xx', code)
+        self.assertEqual(response.status_code, 400)
+
+    def test_batches_share_a_connection(self):
+        for i in range(3):
+            mail.send(django_mail.EmailMessage('Subject', 'Body', to=[f'user{i}@jainuniversity.ac.in']))
+        with unittest.mock.patch('core.mail.get_connection', wraps=django_mail.get_connection) as get_connection:
+            self.assertEqual(mail.flush(), 3)
+        get_connection.assert_called_once_with()
+        self.assertEqual(len(django_mail.outbox), 3)
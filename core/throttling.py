@@ -0,0 +1,149 @@
+"""
+Token-bucket throttles kept in the shared cache.
+
+Routes opt in from their urls.py, with one bucket per scope:
+
+    path('attempts/<int:attempt_id>/submit/',
+         throttled(views.submit_answer, user='120/min', attempt='60/min', endpoint='2000/s')),
+
+- `user`: per signed-in user (per client IP for anonymous requests)
+- `attempt`: per exam attempt, from the route's `attempt_id`, and per caller,
+  so nobody can drain the bucket of an attempt that isn't theirs
+- `endpoint`: one bucket for the route across all clients
+
+A rate of `N/period` (period s, min, hour or day, as in DRF) is a bucket of
+N tokens refilled at N per period. Buckets are stored GCRA-style: one
+integer per bucket, the time at which it will be full again, moved forward
+with the cache's atomic `incr`. Checking a bucket is normally one cache round
+trip, and every worker shares the same buckets, provided CACHES points at
+Redis or memcached. Rejected requests get a 429 naming the exhausted bucket,
+with a Retry-After header, and are counted in
+`throttle_rejections_total{route,scope}`.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.throttling import BaseThrottle
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+SCOPES = ('user', 'attempt', 'endpoint')
+# Buckets of clients that go quiet simply expire; an expired bucket is a full one
+KEY_TIMEOUT = 24 * 60 * 60
+
+throttle_rejections = metrics.registry.counter(
+    'throttle_rejections_total', 'Requests rejected with 429 because a token bucket was empty.',
+    ['route', 'scope'])
+
+
+class Throttled(APIException):
+    status_code = status.HTTP_429_TOO_MANY_REQUESTS
+    default_code = 'throttled'
+
+    def __init__(self, scope, rate, wait):
+        # Rounded up for Retry-After by DRF's exception handler
+        self.wait = max(1, int(wait + 0.999))
+        super().__init__({
+            'error': 'Too many requests',
+            'scope': scope,
+            'limit': rate,
+            'retry_after': round(wait, 3),
+        })
+
+
+def parse_rate(rate):
+    """'120/min' -> (120, 60.0)."""
+    try:
+        count, period = rate.split('/')
+        return int(count), float(PERIODS[period[0]])
+    except (ValueError, KeyError):
+        raise ImproperlyConfigured(f'Invalid throttle rate {rate!r}; use e.g. "10/s" or "120/min"')
+
+
+class TokenBucket:
+    """A bucket of `count` tokens refilled at `count` per `period` seconds."""
+    def __init__(self, rate):
+        self.rate = rate
+        count, period = parse_rate(rate)
+        self.interval = int(period * 1_000_000) // count  # Microseconds per token
+        self.capacity = self.interval * count
+
+    def consume(self, cache, key, now=None):
+        """Take a token. Returns 0.0 if one was available, else the seconds until one will be."""
+        now = int((time.time() if now is None else now) * 1_000_000)
+        try:
+            full_at = cache.incr(key, self.interval)
+        except ValueError:
+            # New (or expired) bucket; if another worker created it first, use theirs
+            if cache.add(key, now + self.interval, KEY_TIMEOUT):
+                return 0.0
+            full_at = cache.incr(key, self.interval)
+        if full_at - self.interval < now:
+            # The bucket had filled up while idle: restart it from now. Racing requests may each
+            # do this, which at worst lets a couple of extra requests through
+            cache.set(key, now + self.interval, KEY_TIMEOUT)
+            return 0.0
+        if full_at - now > self.capacity:
+            cache.decr(key, self.interval)  # Rejected requests take no token
+            return (full_at - self.capacity - now) / 1_000_000
+        return 0.0
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """One scope's bucket for one route; built by `throttled()`."""
+    route = None
+    scope = None
+    bucket = None
+
+    def allow_request(self, request, view):
+        if not settings.THROTTLE_ENABLED:
+            return True
+        key = f'throttle:{self.route}:{self.scope}:{self.get_bucket_ident(request, view)}'
+        cache = caches[settings.THROTTLE_CACHE]
+        wait = self.bucket.consume(cache, key)
+        if wait:
+            throttle_rejections.inc(route=self.route, scope=self.scope)
+            # Once a minute per bucket, so a client stuck in a loop can be found without flooding the log
+            if cache.add(f'{key}:logged', 1, 60):
+                logger.warning('Throttled %s on %s (%s bucket, %s): user %s, %s', request.method, self.route,
+                               self.scope, self.bucket.rate, request.user.pk, self.get_ident(request))
+            raise Throttled(self.scope, self.bucket.rate, wait)
+        return True
+
+    def get_bucket_ident(self, request, view):
+        if self.scope == 'endpoint':
+            return 'all'
+        if request.user.is_authenticated:
+            caller = request.user.pk
+        else:
+            caller = f'ip-{self.get_ident(request)}'
+        if self.scope == 'attempt':
+            # Tokens are taken before the view checks ownership of the attempt
+            return f"{view.kwargs['attempt_id']}:{caller}"
+        return caller
+
+
+def throttled(view, **rates):
+    """
+    `view`, an @api_view function, with a token bucket per scope given in
+    `rates` (user=, attempt=, endpoint=). Buckets are checked in that order,
+    after authentication and permissions.
+    """
+    unknown = set(rates) - set(SCOPES)
+    if unknown:
+        raise ImproperlyConfigured(f'Unknown throttle scopes {sorted(unknown)}; use {", ".join(SCOPES)}')
+    route = view.cls.__name__  # The view function's name
+    throttle_classes = [
+        type(f'{scope.title()}TokenBucketThrottle', (TokenBucketThrottle,),
+             {'route': route, 'scope': scope, 'bucket': TokenBucket(rates[scope])})
+        for scope in SCOPES if scope in rates
+    ]
+    return view.cls.as_view(throttle_classes=throttle_classes)
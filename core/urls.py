@@ -1,12 +1,17 @@
 from django.urls import path
 from . import views
+from .throttling import throttled
 
 urlpatterns = [
     # Authentication URLs
     path('auth/register/', views.user_registration_view, name='user-register'),
     path('auth/login/', views.user_login_view, name='user-login'),
+    path('auth/login/verify/', throttled(views.verify_login_otp_view, user='10/min'), name='user-login-verify'),
     path('auth/logout/', views.user_logout_view, name='user-logout'),
     
     # Profile URLs
     path('profile/me/', views.current_user_profile_view, name='current-user-profile'),
+
+    # Internal URLs
+    path('internal/metrics/', views.metrics_view, name='metrics'),
 ]
\ No newline at end of file
@@ -1,10 +1,15 @@
 from rest_framework import status, permissions
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
+from django.conf import settings
 from django.contrib.auth import login, logout
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.crypto import constant_time_compare
 from django.views.decorators.csrf import ensure_csrf_cookie
 
+from . import metrics, otp
+from .fieldsets import parse_fieldset, project_queryset
 from .models import User, StudentProfile, FacultyProfile, HODProfile
 from .serializers import (
     UserRegistrationSerializer, UserLoginSerializer, 
@@ -45,6 +50,13 @@ def user_login_view(request):
         serializer = UserLoginSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
             user = serializer.validated_data['user']
+            if settings.LOGIN_OTP_REQUIRED:
+                # No session yet: the client confirms the emailed code at auth/login/verify/
+                return Response({
+                    'message': 'Enter the code sent to your email',
+                    'otp_required': True,
+                    'challenge': otp.issue(user),
+                }, status=status.HTTP_202_ACCEPTED)
             login(request, user)  # This creates the session
             return Response({
                 'message': 'Login successful',
@@ -53,6 +65,26 @@ def user_login_view(request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@permission_classes([permissions.AllowAny])
+@ensure_csrf_cookie
+def verify_login_otp_view(request):
+    """Second login step when LOGIN_OTP_REQUIRED: exchange the challenge and emailed code for a session"""
+    challenge, code = request.data.get('challenge'), request.data.get('code')
+    if not challenge or not code:
+        return Response({'error': 'challenge and code are required'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        user_id = otp.verify(challenge, code)
+    except otp.OTPError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    user = get_object_or_404(User, pk=user_id, is_active=True)
+    login(request, user)
+    return Response({
+        'message': 'Login successful',
+        'user': UserProfileSerializer(user).data
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['POST'])
 def user_logout_view(request):
     logout(request)
@@ -71,16 +103,36 @@ def current_user_profile_view(request):
     data['user'] = UserProfileSerializer(user).data
     
     # Get the role-specific profile based on user_type
+    # ?fields= / ?expand= narrow the profile payload and the query behind it
+    fieldset = parse_fieldset(request.query_params.get('fields'), request.query_params.get('expand'))
     if user.user_type == 'student':
-        profile = get_object_or_404(StudentProfile, user=user)
-        data['profile'] = StudentProfileSerializer(profile).data
+        queryset = project_queryset(StudentProfile.objects.all(), StudentProfileSerializer, fieldset)
+        profile = get_object_or_404(queryset, user=user)
+        data['profile'] = StudentProfileSerializer(profile, fieldset=fieldset).data
     elif user.user_type == 'faculty':
-        profile = get_object_or_404(FacultyProfile, user=user)
-        data['profile'] = FacultyProfileSerializer(profile).data
+        queryset = project_queryset(FacultyProfile.objects.all(), FacultyProfileSerializer, fieldset)
+        profile = get_object_or_404(queryset, user=user)
+        data['profile'] = FacultyProfileSerializer(profile, fieldset=fieldset).data
     elif user.user_type == 'hod':
-        profile = get_object_or_404(HODProfile, user=user)
-        data['profile'] = HODProfileSerializer(profile).data
+        queryset = project_queryset(HODProfile.objects.all(), HODProfileSerializer, fieldset)
+        profile = get_object_or_404(queryset, user=user)
+        data['profile'] = HODProfileSerializer(profile, fieldset=fieldset).data
     else:  # admin or other types
         data['profile'] = None
     
-    return Response(data, status=status.HTTP_200_OK)
\ No newline at end of file
+    return Response(data, status=status.HTTP_200_OK)
+
+
+# ===== INTERNAL VIEWS =====
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def metrics_view(request):
+    """Prometheus scrape endpoint, open to staff sessions or the METRICS_TOKEN bearer token"""
+    token = settings.METRICS_TOKEN
+    authorized = request.user.is_staff or bool(
+        token and constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}')
+    )
+    if not authorized:
+        return Response({'error': 'Not allowed'}, status=status.HTTP_403_FORBIDDEN)
+    return HttpResponse(metrics.registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,67 +1,222 @@
 from django.contrib import admin
-from .models import Exam, Question, Option, ExamAttempt, Answer
+from django.db.models import Count, Q
+from django.utils import timezone
+from core.admin_tools import AutocompleteFilter, LargeTableAdminMixin
+from . import audit, notifications, rollups, search
+from .models import (
+    Exam, Question, Option, ExamAttempt, Answer, SimilarityMatch, ExamArchive, GroupExamRollup, GroupTermRollup,
+    AuditEvent, NOTIFICATION_KINDS, NotificationDispatch,
+)
 
 @admin.register(Exam)
-class ExamAdmin(admin.ModelAdmin):
-    list_display = ['title', 'created_by', 'start_time', 'end_time', 'status', 'is_proctored']
-    list_filter = ['status', 'is_proctored', 'created_by', 'allowed_groups']
+class ExamAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ['title', 'created_by', 'start_time', 'end_time', 'status', 'is_proctored', 'questions_count']
+    list_filter = ['status', 'is_proctored', ('created_by', AutocompleteFilter), 'allowed_groups']
+    list_select_related = ['created_by']
     filter_horizontal = ['allowed_groups']  # Better widget for selecting groups
+    autocomplete_fields = ['created_by']
     search_fields = ['title', 'description']
     date_hierarchy = 'created_at'
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(question_count=Count('questions'))
     
-    # Display related questions in admin
+    # Display related questions in admin (counted in the changelist query)
     def questions_count(self, obj):
-        return obj.questions.count()
+        return obj.question_count
     questions_count.short_description = 'Questions'
+    questions_count.admin_order_field = 'question_count'
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # Groups are saved by now. Students hear about the exam when it is scheduled and when its results are published
+        exam = form.instance
+        kinds = []
+        if 'status' in form.changed_data and exam.status == 'scheduled':
+            kinds.append('scheduled')
+        if 'show_results_after' in form.changed_data and exam.show_results_after:
+            kinds.append('results')
+        for kind in kinds:
+            dispatches = notifications.notify(exam, kind)
+            self.message_user(request, f'Notifying {dispatches[0].recipients if dispatches else 0} students: '
+                                       f'{dict(NOTIFICATION_KINDS)[kind].lower()}.')
 
 
 @admin.register(Question)
-class QuestionAdmin(admin.ModelAdmin):
-    list_display = ['exam', 'question_type', 'points', 'order', 'created_at']
-    list_filter = ['question_type', 'exam', 'exam__created_by']
+class QuestionAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ['exam', 'question_type', 'points', 'order', 'options_count', 'created_at']
+    list_filter = ['question_type', ('exam', AutocompleteFilter), ('exam__created_by', AutocompleteFilter)]
+    list_select_related = ['exam']
+    autocomplete_fields = ['exam']
     search_fields = ['question_text', 'exam__title']
     ordering = ['exam', 'order']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(option_count=Count('options'))
+
+    def get_search_results(self, request, queryset, search_term):
+        # Full-text/trigram matching on the indexed question text instead of a scan per word
+        if not search_term.strip():
+            return queryset, False
+        matches = search.matching(Question.objects.all(), search_term.strip()).values('pk')
+        return queryset.filter(Q(pk__in=matches) | Q(exam__title__icontains=search_term)), False
     
-    # Display options count for MCQ questions
+    # Display options count for MCQ questions (counted in the changelist query)
     def options_count(self, obj):
         if obj.question_type == 'mcq':
-            return obj.options.count()
+            return obj.option_count
         return 'N/A'
     options_count.short_description = 'Options'
+    options_count.admin_order_field = 'option_count'
 
 
 @admin.register(Option)
-class OptionAdmin(admin.ModelAdmin):
+class OptionAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ['question', 'option_text', 'is_correct', 'order']
-    list_filter = ['question__exam', 'is_correct']
+    list_filter = [('question__exam', AutocompleteFilter), 'is_correct']
+    list_select_related = ['question']
+    autocomplete_fields = ['question']
     search_fields = ['option_text', 'question__question_text']
     list_editable = ['is_correct', 'order']  # Edit directly from list view
 
 
 @admin.register(ExamAttempt)
-class ExamAttemptAdmin(admin.ModelAdmin):
-    list_display = ['student', 'exam', 'attempt_number', 'status', 'score', 'violation_count']
-    list_filter = ['status', 'exam', 'student__studentprofile__group']
+class ExamAttemptAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ['student', 'exam', 'attempt_number', 'status', 'score', 'answered_count', 'graded_count',
+                    'violation_count']
+    list_filter = ['status', ('exam', AutocompleteFilter), ('student__studentprofile__group', AutocompleteFilter)]
+    list_select_related = ['student', 'exam']
+    autocomplete_fields = ['student', 'exam', 'reviewed_by']
     search_fields = ['student__email', 'exam__title']
-    readonly_fields = ['start_time', 'actual_duration']
+    readonly_fields = ['start_time', 'actual_duration', 'score', 'answered_count', 'graded_count']
+
+    def get_queryset(self, request):
+        # Autocomplete results are labelled with __str__, which reads both
+        return super().get_queryset(request).select_related('student', 'exam')
     
     # Add action for bulk status update
     actions = ['mark_as_reviewed']
     
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        exam_ids = [obj.exam_id]
+        if change and 'exam' in form.changed_data:
+            exam_ids.append(form.initial['exam'])  # Moved: the old exam's rollups lose it
+        rollups.mark_stale(exam_ids)
+
     def mark_as_reviewed(self, request, queryset):
-        updated = queryset.update(status='submitted', reviewed_by=request.user)
+        # Before the update: the changelist may be filtered on the status it changes
+        exam_ids = list(queryset.values_list('exam_id', flat=True).distinct())
+        # update() skips auto_now, so bump updated_at to invalidate client ETags
+        updated = queryset.update(status='submitted', reviewed_by=request.user, updated_at=timezone.now())
+        rollups.mark_stale(exam_ids)
         self.message_user(request, f"{updated} attempts marked as reviewed.")
     mark_as_reviewed.short_description = "Mark selected attempts as reviewed"
 
 
 @admin.register(Answer)
-class AnswerAdmin(admin.ModelAdmin):  # Fixed: Changed admin.Model to admin.ModelAdmin
-    list_display = ['attempt', 'question', 'points_awarded', 'submitted_at']
-    list_filter = ['question__question_type', 'attempt__exam']
+class AnswerAdmin(LargeTableAdminMixin, admin.ModelAdmin):  # Fixed: Changed admin.Model to admin.ModelAdmin
+    list_display = ['attempt', 'exam_name', 'question', 'points_awarded', 'submitted_at']
+    list_filter = ['question__question_type', ('attempt__exam', AutocompleteFilter)]
+    list_select_related = ['attempt__student', 'attempt__exam', 'question']
+    autocomplete_fields = ['attempt', 'question', 'mcq_answer', 'claimed_by']
     search_fields = ['attempt__student__email', 'question__question_text']
     readonly_fields = ['submitted_at']
     
     # Make it easy to filter by exam
     def exam_name(self, obj):
         return obj.attempt.exam.title
-    exam_name.short_description = 'Exam'
\ No newline at end of file
+    exam_name.short_description = 'Exam'
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        attempt_ids = [obj.attempt_id]
+        if change and 'attempt' in form.changed_data:
+            attempt_ids.append(form.initial['attempt'])
+        rollups.mark_stale(ExamAttempt.objects.filter(id__in=attempt_ids).values_list('exam_id', flat=True))
+        if 'points_awarded' in form.changed_data:
+            previous = form.initial.get('points_awarded')
+            audit.record('graded' if previous is None else 'regraded', obj.attempt_id, request.user.id,
+                         answer=obj.id, points=obj.points_awarded, previous_points=previous)
+
+
+@admin.register(SimilarityMatch)
+class SimilarityMatchAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ['question', 'kind', 'answer_a', 'answer_b', 'similarity', 'detected_at']
+    list_filter = ['kind', ('question__exam', AutocompleteFilter)]
+    list_select_related = ['question', 'answer_a__question', 'answer_a__attempt__student',
+                           'answer_b__question', 'answer_b__attempt__student']
+    raw_id_fields = ['question', 'answer_a', 'answer_b']
+
+
+@admin.register(ExamArchive)
+class ExamArchiveAdmin(admin.ModelAdmin):
+    list_display = ['exam', 'attempt_count', 'answer_count', 'size', 'archived_at', 'restored_at']
+    list_select_related = ['exam']
+    search_fields = ['exam__title']
+    # Written by the archive_exams / restore_exam commands only
+    readonly_fields = ['exam', 'file', 'sha256', 'size', 'attempt_count', 'answer_count', 'archived_at', 'restored_at']
+
+    def has_add_permission(self, request):
+        return False
+
+
+class RollupAdmin(admin.ModelAdmin):
+    """Rollups are written by refresh_rollups only."""
+    list_filter = ['term', ('group', AutocompleteFilter)]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(GroupExamRollup)
+class GroupExamRollupAdmin(RollupAdmin):
+    list_display = ['group', 'exam', 'term', 'eligible_count', 'attempt_count', 'mean_score', 'median_score',
+                    'violation_count', 'refreshed_at']
+    list_select_related = ['group', 'exam']
+    search_fields = ['exam__title', 'group__name']
+
+
+@admin.register(GroupTermRollup)
+class GroupTermRollupAdmin(RollupAdmin):
+    list_display = ['group', 'term', 'exam_count', 'attempt_count', 'mean_score', 'median_score',
+                    'violation_count', 'refreshed_at']
+    list_select_related = ['group']
+    search_fields = ['group__name']
+
+
+@admin.register(AuditEvent)
+class AuditEventAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    """Append-only: events are looked up by attempt or user, never edited."""
+    list_display = ['occurred_at', 'event', 'attempt', 'user']
+    # Both filters are served by the (attempt, occurred_at) and (user, occurred_at) indexes
+    list_filter = ['event', ('attempt', AutocompleteFilter), ('user', AutocompleteFilter)]
+    list_select_related = ['attempt__student', 'attempt__exam', 'user']
+    readonly_fields = ['event', 'attempt', 'user', 'occurred_at', 'detail']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(NotificationDispatch)
+class NotificationDispatchAdmin(admin.ModelAdmin):
+    """Delivery progress per exam, notification and channel; written by exams.notifications."""
+    list_display = ['exam', 'kind', 'channel', 'recipients', 'sent', 'failed', 'created_at', 'finished_at']
+    list_filter = ['kind', 'channel', ('exam', AutocompleteFilter)]
+    list_select_related = ['exam']
+    readonly_fields = ['exam', 'kind', 'channel', 'recipients', 'sent', 'failed', 'created_at', 'finished_at']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
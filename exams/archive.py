@@ -0,0 +1,225 @@
+"""
+Archival of long-finished exams.
+
+An exam's attempts are streamed into a gzip-compressed JSON Lines file in
+default storage, together with every row that deleting them cascades to:
+answers, chunked uploads, answer signatures and similarity matches. The file
+is read back and checked, and only then are the attempts it holds deleted
+from the hot tables in small batches; attempts created meanwhile stay. The
+exam, its questions and options stay too, so archived results remain
+attributable and the rows can be restored exactly, ids and timestamps
+included, with `restore_exam`. Signature bands aren't stored: they are
+recomputed from the restored signatures, so plagiarism results survive the
+round trip without re-indexing.
+
+File layout: one header line, then one line per row, parents first:
+
+    {"type": "header", "version": 2, "exam": 12, ...}
+    {"type": "attempt", "row": {"id": 40, "student_id": 6, ...}}
+    {"type": "answer", "row": {"id": 311, "attempt_id": 40, ...}}
+    {"type": "signature", "row": {"id": 95, "answer_id": 311, "signature": "<base64>", ...}}
+
+Version 1 archives hold attempts and answers only and are still restored.
+"""
+import base64
+import datetime
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (
+    Answer, AnswerSignature, ChunkedUpload, Exam, ExamArchive, ExamAttempt, SignatureBand, SimilarityMatch,
+)
+from .similarity import signature_bands
+
+FORMAT_VERSION = 2
+READABLE_VERSIONS = {1, 2}
+# Kind -> (model, path from its rows to their attempt), parents before children
+ARCHIVED_MODELS = {
+    'attempt': (ExamAttempt, ''),
+    'answer': (Answer, 'attempt__'),
+    'upload': (ChunkedUpload, 'attempt__'),
+    'signature': (AnswerSignature, 'answer__attempt__'),
+    'match': (SimilarityMatch, 'answer_a__attempt__'),
+}
+
+
+class ArchiveError(Exception):
+    pass
+
+
+class ArchiveEncoder(DjangoJSONEncoder):
+    """
+    DjangoJSONEncoder rounds times to milliseconds; archives keep them exact.
+    Binary fields are written as base64, which BinaryField.to_python reads.
+    """
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        if isinstance(o, (bytes, memoryview)):
+            return base64.b64encode(o).decode()
+        return super().default(o)
+
+
+def archivable_exams(older_than_days=None, now=None):
+    """Completed exams that ended more than `older_than_days` ago and aren't archived."""
+    days = settings.ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    cutoff = (now or timezone.now()) - datetime.timedelta(days=days)
+    archived = ExamArchive.objects.filter(restored_at__isnull=True).values('exam_id')
+    return Exam.objects.filter(status='completed', end_time__lt=cutoff).exclude(id__in=archived)
+
+
+def columns(model):
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def archived_rows(exam):
+    """
+    Yield (kind, row) for every attempt of `exam` and every row hanging off
+    one, streamed from the database. Rows of attempts created after the
+    attempts were read are left out.
+    """
+    last_attempt_id = None
+    for kind, (model, path) in ARCHIVED_MODELS.items():
+        rows = model.objects.filter(**{f'{path}exam': exam})
+        if kind != 'attempt':
+            if last_attempt_id is None:
+                continue
+            rows = rows.filter(**{f'{path}id__lte': last_attempt_id})
+        for row in rows.order_by('pk').values(*columns(model)).iterator(chunk_size=2000):
+            if kind == 'attempt':
+                last_attempt_id = row['id']
+            yield kind, row
+
+
+def write_archive(exam, fh):
+    """
+    Write the archive of `exam` to the binary file `fh`. Returns the row
+    counts and the ids of the attempts written.
+    """
+    counts = {kind: 0 for kind in ARCHIVED_MODELS}
+    attempt_ids = []
+    with gzip.GzipFile(fileobj=fh, mode='wb', mtime=0) as gz:
+        header = {'type': 'header', 'version': FORMAT_VERSION, 'exam': exam.id, 'title': exam.title,
+                  'archived_at': timezone.now()}
+        gz.write(json.dumps(header, cls=ArchiveEncoder).encode() + b'\n')
+        for kind, row in archived_rows(exam):
+            gz.write(json.dumps({'type': kind, 'row': row}, cls=ArchiveEncoder).encode() + b'\n')
+            counts[kind] += 1
+            if kind == 'attempt':
+                attempt_ids.append(row['id'])
+    return counts, attempt_ids
+
+
+def read_archive(archive):
+    """
+    Yield (kind, row) from the archive file after checking its SHA-256 and
+    row counts against the ExamArchive record. Raises ArchiveError.
+    """
+    hasher = hashlib.sha256()
+    with default_storage.open(archive.file, 'rb') as fh:
+        for block in iter(lambda: fh.read(1024 * 1024), b''):
+            hasher.update(block)
+    if hasher.hexdigest() != archive.sha256:
+        raise ArchiveError(f'Checksum mismatch for {archive.file}')
+
+    counts = {kind: 0 for kind in ARCHIVED_MODELS}
+    with default_storage.open(archive.file, 'rb') as fh, gzip.GzipFile(fileobj=fh, mode='rb') as gz:
+        header = json.loads(gz.readline())
+        if header.get('version') not in READABLE_VERSIONS or header.get('exam') != archive.exam_id:
+            raise ArchiveError(f'{archive.file} is not an archive of exam {archive.exam_id}')
+        for line in gz:
+            record = json.loads(line)
+            counts[record['type']] += 1
+            yield record['type'], record['row']
+    if (counts['attempt'], counts['answer']) != (archive.attempt_count, archive.answer_count):
+        raise ArchiveError(f'{archive.file} holds {counts}, expected {archive.attempt_count} attempts '
+                           f'and {archive.answer_count} answers')
+
+
+def verify_archive(archive):
+    """Read the whole archive back; raises ArchiveError if anything doesn't match."""
+    for _ in read_archive(archive):
+        pass
+
+
+def archive_exam(exam, batch_size=None):
+    """
+    Archive the attempts of `exam` with everything hanging off them and
+    delete them from the database. Returns the ExamArchive. Nothing is
+    deleted unless the stored file reads back intact, and only the attempts
+    in the file are.
+    """
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    with tempfile.TemporaryFile() as fh:
+        counts, attempt_ids = write_archive(exam, fh)
+        fh.seek(0)
+        hasher = hashlib.sha256()
+        for block in iter(lambda: fh.read(1024 * 1024), b''):
+            hasher.update(block)
+        fh.seek(0)
+        name = f"{settings.ARCHIVE_DIR}/exam-{exam.id}-{timezone.now():%Y%m%d%H%M%S}.jsonl.gz"
+        name = default_storage.save(name, File(fh))
+        size = fh.seek(0, os.SEEK_END)
+
+    archive = ExamArchive(exam=exam, file=name, sha256=hasher.hexdigest(), size=size,
+                          attempt_count=counts['attempt'], answer_count=counts['answer'])
+    verify_archive(archive)
+    archive.save()
+
+    # Small batches keep each transaction, and the locks it holds, short.
+    # Deleting attempts cascades to the rows archived with them.
+    for start in range(0, len(attempt_ids), batch_size):
+        with transaction.atomic():
+            ExamAttempt.objects.filter(id__in=attempt_ids[start:start + batch_size]).delete()
+    return archive
+
+
+def restore_exam(archive, batch_size=None):
+    """Put the archived rows back, with their original ids. Returns the row counts."""
+    if archive.restored_at is not None:
+        raise ArchiveError(f'{archive.file} was already restored')
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    counts = {kind: 0 for kind in ARCHIVED_MODELS}
+
+    def flush(kind, rows):
+        model, _ = ARCHIVED_MODELS[kind]
+        fields = {field.attname: field for field in model._meta.concrete_fields}
+        objs = [model(**{name: fields[name].to_python(value) for name, value in row.items()}) for row in rows]
+        # bulk_create stamps auto_now/auto_now_add fields, so put the archived values back afterwards
+        stamped = [name for name, field in fields.items() if getattr(field, 'auto_now', False)
+                   or getattr(field, 'auto_now_add', False)]
+        originals = [[getattr(obj, name) for name in stamped] for obj in objs]
+        model.objects.bulk_create(objs, batch_size=batch_size)
+        for obj, values in zip(objs, originals):
+            for name, value in zip(stamped, values):
+                setattr(obj, name, value)
+        model.objects.bulk_update(objs, stamped, batch_size=batch_size)
+        if model is AnswerSignature:
+            SignatureBand.objects.bulk_create(signature_bands(objs), batch_size=5000)
+        counts[kind] += len(objs)
+
+    with transaction.atomic():
+        pending, pending_kind = [], None
+        for kind, row in read_archive(archive):
+            if kind == 'answer':
+                row.update(claimed_by_id=None, claimed_until=None)
+            if pending and (kind != pending_kind or len(pending) >= batch_size):
+                flush(pending_kind, pending)
+                pending = []
+            pending_kind = kind
+            pending.append(row)
+        if pending:
+            flush(pending_kind, pending)
+        archive.restored_at = timezone.now()
+        archive.save(update_fields=['restored_at'])
+    return counts
@@ -0,0 +1,96 @@
+"""
+Audit trail of attempt lifecycle events, written off the request path.
+
+`record()` stamps the event and, once the caller's transaction commits
+(right away outside one), puts it on a bounded in-process queue; a
+background writer thread drains the queue into AuditEvent with one
+bulk_create per batch (AUDIT_BATCH_SIZE events, or whatever arrived within
+AUDIT_FLUSH_SECONDS). Hot views therefore pay for a queue put, not an insert,
+and a change that is rolled back leaves no event behind.
+
+When the queue is full (the database is slow or down) `record()` waits up
+to AUDIT_ENQUEUE_TIMEOUT for room and then writes the batch at the head of
+the queue itself, so a backlog slows requests down instead of losing
+events or growing without bound. A failed batch is retried up to
+AUDIT_MAX_RETRIES times and then logged with its events.
+
+The writer is started by the WSGI/ASGI entry points (and again in forked
+server workers); the queue is flushed on shutdown. Without a running writer
+(management commands, tests) events wait in the queue until `flush()`.
+"""
+import logging
+import time
+from functools import partial
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+from django.utils import timezone
+
+from core import metrics
+from core.background import BatchWorker
+
+from .models import AuditEvent
+
+logger = logging.getLogger(__name__)
+
+audit_events = metrics.registry.counter(
+    'audit_events_total', 'Audit events by how they were written: queued, written, inline or dropped.',
+    ['outcome'])
+audit_queue_depth = metrics.registry.gauge('audit_queue_depth', 'Audit events waiting to be written.')
+
+
+class AuditWriter(BatchWorker):
+    """Bounded queue of pending AuditEvents plus the thread that writes them."""
+    name = 'audit-writer'
+
+    def __init__(self):
+        super().__init__(settings.AUDIT_QUEUE_SIZE, settings.AUDIT_BATCH_SIZE, settings.AUDIT_FLUSH_SECONDS,
+                         settings.AUDIT_ENQUEUE_TIMEOUT)
+
+    def put(self, event):
+        if not super().put(event):
+            audit_events.inc(outcome='inline')
+        audit_events.inc(outcome='queued')
+
+    def handle(self, events):
+        for attempt in range(settings.AUDIT_MAX_RETRIES + 1):
+            try:
+                AuditEvent.objects.bulk_create(events)
+            except DatabaseError:
+                if attempt == settings.AUDIT_MAX_RETRIES:
+                    audit_events.inc(len(events), outcome='dropped')
+                    logger.exception('Dropped %d audit events: %s', len(events),
+                                     [(event.event, event.attempt_id, event.user_id, event.occurred_at.isoformat())
+                                      for event in events])
+                    return
+                close_old_connections()
+                time.sleep(0.5 * 2 ** attempt)
+            else:
+                audit_events.inc(len(events), outcome='written')
+                return
+
+
+writer = AuditWriter()
+
+
+@metrics.registry.collector
+def collect_audit_queue():
+    audit_queue_depth.set(writer.queue.qsize())
+
+
+def record(event, attempt_id=None, user_id=None, **detail):
+    """
+    Queue an audit event of type `event` (see AuditEvent.EVENT_TYPES),
+    stamped with the current time, when the caller's transaction commits.
+    """
+    event = AuditEvent(event=event, attempt_id=attempt_id, user_id=user_id, occurred_at=timezone.now(),
+                       detail=detail)
+    transaction.on_commit(partial(writer.put, event))
+
+
+def start():
+    writer.start()
+
+
+def flush():
+    return writer.flush()
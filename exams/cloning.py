@@ -0,0 +1,77 @@
+"""
+Copying exams, with their questions and options, for a new term.
+
+Everything is copied with set-based inserts inside one transaction: one
+bulk_create for the exams, their groups, their questions and their options
+(in batches for very large papers), whatever the number of exams. New
+question ids come back from the inserts (RETURNING on PostgreSQL and
+SQLite) in the order the rows were sent, which is how the options are
+remapped onto their copied questions. Attempts, answers and grading data
+are never copied.
+"""
+from collections import Counter
+
+from django.db import transaction
+
+from .models import Exam, Option, Question
+
+# Copied as they are; everything else is set by the clone itself
+EXAM_FIELDS = ['title', 'description', 'duration_minutes', 'max_attempts', 'shuffle_questions',
+               'show_results_after', 'is_proctored']
+QUESTION_FIELDS = ['question_text', 'question_type', 'points', 'order', 'code_template', 'test_cases', 'rubric']
+OPTION_FIELDS = ['option_text', 'is_correct', 'order']
+
+
+def clone_exams(exams, created_by=None, shift=None, groups=None, status='draft', batch_size=1000):
+    """
+    Copy `exams` (Exam instances or ids). The copies belong to `created_by`
+    (default: the original's creator), have their window moved by `shift` (a
+    timedelta), are open to `groups` (default: the original's groups) and
+    start in `status`, so they can be reviewed before being scheduled.
+    Returns {original exam id: copy}; each copy carries `question_count`
+    and `option_count`.
+    """
+    exam_ids = [exam.pk if isinstance(exam, Exam) else exam for exam in exams]
+    originals = list(Exam.objects.filter(id__in=exam_ids).order_by('id').prefetch_related('allowed_groups'))
+
+    with transaction.atomic():
+        copies = Exam.objects.bulk_create([
+            Exam(
+                **{field: getattr(exam, field) for field in EXAM_FIELDS},
+                created_by_id=created_by.pk if created_by else exam.created_by_id,
+                start_time=exam.start_time + shift if shift else exam.start_time,
+                end_time=exam.end_time + shift if shift else exam.end_time,
+                status=status,
+            )
+            for exam in originals
+        ])
+        cloned = {exam.id: copy for exam, copy in zip(originals, copies)}
+
+        Through = Exam.allowed_groups.through
+        Through.objects.bulk_create([
+            Through(exam_id=copy.id, studentgroup_id=group.pk)
+            for exam, copy in zip(originals, copies)
+            for group in (exam.allowed_groups.all() if groups is None else groups)
+        ], batch_size=batch_size)
+
+        questions = list(Question.objects.filter(exam_id__in=cloned).order_by('id')
+                         .values('id', 'exam_id', *QUESTION_FIELDS))
+        new_questions = Question.objects.bulk_create([
+            Question(exam=cloned[row['exam_id']], **{field: row[field] for field in QUESTION_FIELDS})
+            for row in questions
+        ], batch_size=batch_size)
+        question_ids = {row['id']: question.id for row, question in zip(questions, new_questions)}
+
+        options = list(Option.objects.filter(question__exam_id__in=cloned).order_by('id')
+                       .values('question_id', 'question__exam_id', *OPTION_FIELDS))
+        Option.objects.bulk_create([
+            Option(question_id=question_ids[row['question_id']], **{field: row[field] for field in OPTION_FIELDS})
+            for row in options
+        ], batch_size=batch_size)
+
+    question_counts = Counter(row['exam_id'] for row in questions)
+    option_counts = Counter(row['question__exam_id'] for row in options)
+    for exam_id, copy in cloned.items():
+        copy.question_count, copy.option_count = question_counts[exam_id], option_counts[exam_id]
+    return cloned
+
@@ -0,0 +1,204 @@
+"""
+Automatic grading of descriptive answers.
+
+Ungraded answers are grouped per question and sent to the configured scorer
+(`settings.GRADING_SCORER`) in batches, several batches at a time. Grades are
+cached by (question, rubric version, answer hash): identical answers are
+scored once, and re-running after a crash or for late submissions only pays
+for answers that were never seen. Grades are written back in bulk, but only
+to answers that are still ungraded and that no grader has claimed meanwhile.
+"""
+import hashlib
+import logging
+import re
+import time
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import audit
+from .models import Answer, ExamAttempt, GradingResult, Question
+from .rollups import mark_stale
+
+logger = logging.getLogger(__name__)
+
+Grade = namedtuple('Grade', ['points', 'feedback'])
+
+
+class ScorerError(Exception):
+    """A scorer failure worth retrying, e.g. a timeout from a remote model."""
+
+
+# Anything else a scorer raises is a bug and propagates
+RETRYABLE_ERRORS = (ScorerError, ConnectionError, TimeoutError)
+
+
+class Scorer:
+    """
+    Grades a batch of answers to one question. `score` receives the question
+    and a list of answer texts and returns one Grade per text, in order.
+    Batches are scored in worker threads, so scorers must not use the database.
+    """
+    name = None
+
+    def score(self, question, answers):
+        raise NotImplementedError
+
+
+STOPWORDS = frozenset('''
+    about above after again all also and any are because been before being between both but can
+    could did does doing down during each few for from further had has have having her here hers
+    him his how into its itself just more most not now off once only other our out over own same
+    she should some such than that the their them then there these they this those through too
+    under until very was were what when where which while who whom why will with would you your
+'''.split())
+_WORD = re.compile(r'[a-z0-9]+')
+
+
+def key_terms(text):
+    return {word for word in _WORD.findall(text.lower()) if len(word) > 2 and word not in STOPWORDS}
+
+
+class KeywordScorer(Scorer):
+    """
+    Deterministic offline scorer: awards the share of the rubric's key terms
+    (or the question's, without a rubric) that the answer uses, rounded to
+    half points.
+    """
+    name = 'keyword'
+
+    def score(self, question, answers):
+        terms = key_terms(question.rubric or question.question_text)
+        grades = []
+        for text in answers:
+            found = terms & key_terms(text)
+            coverage = len(found) / len(terms) if terms else 0.0
+            feedback = f'Covers {len(found)} of {len(terms)} key points.'
+            missing = sorted(terms - found)[:5]
+            if missing:
+                feedback += f" Missing: {', '.join(missing)}."
+            grades.append(Grade(round(question.points * coverage * 2) / 2, feedback))
+        return grades
+
+
+def get_scorer():
+    return import_string(settings.GRADING_SCORER)()
+
+
+def answer_hash(text):
+    return hashlib.sha1(text.strip().encode()).hexdigest()
+
+
+def pending_answers(exam_ids=None):
+    """Descriptive answers of finished attempts that have no points yet and that no grader holds."""
+    answers = Answer.objects.filter(
+        question__question_type='descriptive', points_awarded__isnull=True, claimed_by__isnull=True,
+    ).exclude(descriptive_answer='').exclude(attempt__status='in_progress')
+    if exam_ids is not None:
+        answers = answers.filter(attempt__exam_id__in=exam_ids)
+    return answers
+
+
+def score_with_retry(scorer, question, texts, retries, backoff):
+    for attempt in range(retries + 1):
+        try:
+            grades = scorer.score(question, texts)
+            if len(grades) != len(texts):
+                raise ScorerError(f'Expected {len(texts)} grades, got {len(grades)}')
+            return grades
+        except RETRYABLE_ERRORS:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt)
+
+
+def apply_grades(answers, grades):
+    """
+    Write `grades` (answer hash -> Grade) onto those of `answers` that are
+    still ungraded and unclaimed: a grader or an admin may have graded or
+    claimed them while the scorer ran. Returns how many were written.
+    """
+    matched = {answer.id: answer for answer in answers if answer_hash(answer.descriptive_answer) in grades}
+    if not matched:
+        return 0
+    now = timezone.now()
+    with transaction.atomic():
+        # Attempts before answers, the order every Answer write takes its locks in
+        ExamAttempt.objects.filter(id__in={answer.attempt_id for answer in matched.values()}).lock()
+        writable = set(Answer.objects.select_for_update(of=('self',)).filter(
+            id__in=matched, points_awarded__isnull=True, claimed_by__isnull=True,
+        ).values_list('id', flat=True))
+        graded = [answer for answer_id, answer in matched.items() if answer_id in writable]
+        for answer in graded:
+            answer.points_awarded, answer.feedback = grades[answer_hash(answer.descriptive_answer)]
+            answer.updated_at = now  # bulk_update skips auto_now; clients revalidate on it
+        Answer.objects.bulk_update(graded, ['points_awarded', 'feedback', 'updated_at'], batch_size=500)
+        # The attempts' totals were recounted by the update, which skips auto_now too
+        ExamAttempt.objects.filter(id__in={answer.attempt_id for answer in graded}).update(updated_at=now)
+    for answer in graded:
+        audit.record('graded', answer.attempt_id, answer=answer.id, points=answer.points_awarded, automatic=True)
+    return len(graded)
+
+
+def grade_pending(exam_ids=None, scorer=None, batch_size=None, concurrency=None, retries=None, backoff=1.0):
+    """
+    Grade every pending descriptive answer (optionally only for `exam_ids`).
+    Returns the number of answers `scored` by the scorer, taken from the
+    `cached` grades and left ungraded because the scorer `failed`.
+    """
+    scorer = scorer or get_scorer()
+    batch_size = batch_size or settings.GRADING_BATCH_SIZE
+    concurrency = concurrency or settings.GRADING_CONCURRENCY
+    retries = settings.GRADING_MAX_RETRIES if retries is None else retries
+    report = {'scored': 0, 'cached': 0, 'failed': 0}
+
+    answers = pending_answers(exam_ids).only('id', 'attempt_id', 'question_id', 'descriptive_answer').order_by('question_id', 'id')
+    by_question = defaultdict(list)
+    for answer in answers:
+        by_question[answer.question_id].append(answer)
+    questions = list(Question.objects.filter(id__in=by_question).only('id', 'exam_id', 'question_text', 'rubric', 'points'))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {}
+        for question in questions:
+            question_answers = by_question[question.id]
+            texts = {answer_hash(answer.descriptive_answer): answer.descriptive_answer for answer in question_answers}
+            cached = {
+                result.answer_hash: Grade(result.points, result.feedback)
+                for result in GradingResult.objects.filter(
+                    question=question, rubric_version=question.rubric_version, answer_hash__in=texts)
+            }
+            report['cached'] += apply_grades(question_answers, cached)
+
+            uncached = [digest for digest in texts if digest not in cached]
+            for start in range(0, len(uncached), batch_size):
+                batch = uncached[start:start + batch_size]
+                future = pool.submit(score_with_retry, scorer, question, [texts[digest] for digest in batch],
+                                     retries, backoff)
+                futures[future] = (question, batch)
+
+        # Results are written from this thread as batches finish
+        for future in as_completed(futures):
+            question, batch = futures[future]
+            batch_hashes = set(batch)
+            batch_answers = [answer for answer in by_question[question.id]
+                             if answer_hash(answer.descriptive_answer) in batch_hashes]
+            try:
+                grades = dict(zip(batch, future.result()))
+            except RETRYABLE_ERRORS:
+                logger.exception('Scoring %d answers to question %d failed', len(batch_answers), question.id)
+                report['failed'] += len(batch_answers)
+                continue
+            GradingResult.objects.bulk_create([
+                GradingResult(question=question, rubric_version=question.rubric_version, answer_hash=digest,
+                              points=grade.points, feedback=grade.feedback, scorer=scorer.name or '')
+                for digest, grade in grades.items()
+            ], ignore_conflicts=True)
+            report['scored'] += apply_grades(batch_answers, grades)
+    if report['scored'] or report['cached']:
+        mark_stale({question.exam_id for question in questions})
+    return report
@@ -0,0 +1,87 @@
+"""
+Work queue for graders sharing an exam.
+
+Each grader claims a batch of ungraded answers for a lease period. Claiming
+uses SELECT ... FOR UPDATE SKIP LOCKED, so concurrent graders are handed
+disjoint rows without waiting on each other. An answer whose lease ran out
+can be claimed by someone else. Grades are written in bulk, which also
+recounts the touched attempts' scores.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import audit
+from .models import Answer, ExamAttempt
+from .rollups import mark_stale
+
+MANUALLY_GRADED = ['descriptive', 'file_upload']
+
+
+def gradable_answers(exam):
+    """Answers to the exam's manually graded questions that have no points yet."""
+    return Answer.objects.filter(
+        question__exam=exam, question__question_type__in=MANUALLY_GRADED, points_awarded__isnull=True,
+    ).exclude(attempt__status='in_progress')
+
+
+def claim_answers(exam, grader, limit, question_id=None):
+    """
+    Claim up to `limit` ungraded answers for `grader`, one question at a
+    time, and return them. Answers the grader already holds are returned
+    again with a fresh lease.
+    """
+    now = timezone.now()
+    claimable = gradable_answers(exam).filter(
+        Q(claimed_by__isnull=True) | Q(claimed_until__lt=now) | Q(claimed_by=grader))
+    if question_id is not None:
+        claimable = claimable.filter(question_id=question_id)
+
+    lease_until = now + timedelta(seconds=settings.GRADING_LEASE_SECONDS)
+    with transaction.atomic():
+        ids = list(claimable.select_for_update(skip_locked=True, of=('self',))
+                   .order_by('question_id', 'id').values_list('id', flat=True)[:limit])
+        # Conditional, so backends without row locks still never hand out an answer twice
+        Answer.objects.filter(id__in=ids).filter(
+            Q(claimed_by__isnull=True) | Q(claimed_until__lt=now) | Q(claimed_by=grader),
+        ).update(claimed_by=grader, claimed_until=lease_until)
+    return Answer.objects.filter(id__in=ids, claimed_by=grader, claimed_until=lease_until) \
+        .select_related('question').order_by('question_id', 'id')
+
+
+def release_answers(exam, grader):
+    """Give back every ungraded answer of `exam` the grader holds. Returns how many."""
+    return gradable_answers(exam).filter(claimed_by=grader).update(claimed_by=None, claimed_until=None)
+
+
+def record_grades(exam, grader, grades):
+    """
+    Save `grades` ({answer id: (points, feedback)}) for the answers the grader
+    still holds, and refresh the score and review stamp of their attempts.
+    Returns the ids of the answers that were graded.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        # Attempts before answers, the order every Answer write takes its locks in
+        ExamAttempt.objects.filter(id__in=Answer.objects.filter(id__in=grades).values('attempt_id')).lock()
+        answers = list(Answer.objects.select_for_update(of=('self',)).filter(
+            id__in=grades, question__exam=exam, claimed_by=grader,
+        ).only('id', 'attempt_id'))
+        for answer in answers:
+            answer.points_awarded, answer.feedback = grades[answer.id]
+            answer.claimed_by = None
+            answer.claimed_until = None
+            answer.updated_at = now
+        Answer.objects.bulk_update(
+            answers, ['points_awarded', 'feedback', 'claimed_by', 'claimed_until', 'updated_at'], batch_size=500)
+        # bulk_update has already recounted the attempts' scores
+        ExamAttempt.objects.filter(id__in={answer.attempt_id for answer in answers}).update(
+            reviewed_by=grader, reviewed_at=now, updated_at=now)
+        if answers:
+            mark_stale([exam.id])
+    for answer in answers:
+        audit.record('graded', answer.attempt_id, grader.id, answer=answer.id, points=answer.points_awarded)
+    return [answer.id for answer in answers]
@@ -0,0 +1 @@
+"""Asyncio load generator replaying exam-day traffic against a running server."""
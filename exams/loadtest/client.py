@@ -0,0 +1,153 @@
+import asyncio
+import json
+import ssl
+import time
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urljoin, urlsplit
+
+
+class HttpError(Exception):
+    """A response with an unexpected status code."""
+    def __init__(self, response):
+        self.response = response
+        super().__init__(f'HTTP {response.status}')
+
+
+class Response:
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body) if self.body else None
+
+
+class HttpSession:
+    """
+    One simulated browser: a single keep-alive HTTP/1.1 connection plus a cookie
+    jar, so the session and CSRF cookies set at login are reused on every
+    request. Each request is timed and recorded in `stats` under its endpoint
+    name.
+    """
+    def __init__(self, base_url, stats, timeout=30):
+        parts = urlsplit(base_url)
+        self.base_url = base_url if base_url.endswith('/') else base_url + '/'
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.ssl = ssl.create_default_context() if parts.scheme == 'https' else None
+        self.host_header = parts.netloc
+        self.stats = stats
+        self.timeout = timeout
+        self.cookies = {}
+        self._reader = self._writer = None
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._reader = self._writer = None
+
+    async def get(self, path, name, params=None, headers=None, expect=(200,)):
+        if params:
+            path = f'{path}?{urlencode(params)}'
+        return await self.request('GET', path, name, headers=headers, expect=expect)
+
+    async def post(self, path, name, data=None, expect=(200,)):
+        return await self.request('POST', path, name, data=data, expect=expect)
+
+    async def request(self, method, path, name, data=None, headers=None, expect=(200,)):
+        """Send a request, record its latency and raise HttpError unless the status is expected."""
+        body = json.dumps(data).encode() if data is not None else b''
+        start = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(self._roundtrip(method, path, body, headers or {}), self.timeout)
+        except Exception as exc:
+            self.stats.record(name, time.perf_counter() - start, error=type(exc).__name__)
+            await self.close()
+            raise
+        if response.status not in expect:
+            self.stats.record(name, time.perf_counter() - start, error=f'HTTP {response.status}')
+            raise HttpError(response)
+        self.stats.record(name, time.perf_counter() - start)
+        return response
+
+    async def _roundtrip(self, method, path, body, extra_headers):
+        url = urlsplit(urljoin(self.base_url, path.lstrip('/')))
+        target = url.path + (f'?{url.query}' if url.query else '')
+        headers = {
+            'Host': self.host_header,
+            'Accept': 'application/json',
+            'Connection': 'keep-alive',
+            **extra_headers,
+        }
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{key}={value}' for key, value in self.cookies.items())
+        if method not in ('GET', 'HEAD'):
+            headers['Content-Type'] = 'application/json'
+            headers['Content-Length'] = str(len(body))
+            if 'csrftoken' in self.cookies:
+                headers['X-CSRFToken'] = self.cookies['csrftoken']
+        head = f'{method} {target} HTTP/1.1\r\n' + ''.join(f'{k}: {v}\r\n' for k, v in headers.items()) + '\r\n'
+
+        # A kept-alive connection may have been closed by the server meanwhile;
+        # retry once on a fresh one in that case.
+        for retry in (False, True):
+            reused = self._writer is not None
+            if not reused:
+                self._reader, self._writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+            try:
+                self._writer.write(head.encode('latin-1') + body)
+                await self._writer.drain()
+                return await self._read_response()
+            except (ConnectionError, asyncio.IncompleteReadError):
+                await self.close()
+                if not reused or retry:
+                    raise
+
+    async def _read_response(self):
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise asyncio.IncompleteReadError(b'', None)
+        status = int(status_line.split()[1])
+
+        headers = {}
+        cookies = []
+        while True:
+            line = (await self._reader.readline()).decode('latin-1').rstrip('\r\n')
+            if not line:
+                break
+            key, _, value = line.partition(':')
+            key, value = key.strip().lower(), value.strip()
+            if key == 'set-cookie':
+                cookies.append(value)
+            headers[key] = value
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            body = await self._read_chunked()
+        elif 'content-length' in headers:
+            body = await self._reader.readexactly(int(headers['content-length']))
+        elif status in (204, 304):
+            body = b''
+        else:
+            body = await self._reader.read()
+            headers['connection'] = 'close'
+
+        for cookie in cookies:
+            for key, morsel in SimpleCookie(cookie).items():
+                if morsel['max-age'] == '0':
+                    self.cookies.pop(key, None)
+                else:
+                    self.cookies[key] = morsel.value
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return Response(status, headers, body)
+
+    async def _read_chunked(self):
+        chunks = []
+        while True:
+            size = int((await self._reader.readline()).split(b';')[0], 16)
+            if size == 0:
+                await self._reader.readline()
+                return b''.join(chunks)
+            chunks.append(await self._reader.readexactly(size))
+            await self._reader.readline()
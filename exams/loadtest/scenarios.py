@@ -0,0 +1,114 @@
+import asyncio
+import random
+
+from .client import HttpError, HttpSession
+from .stats import Stats
+
+
+class ScenarioError(Exception):
+    pass
+
+
+async def login(session, student, options):
+    """Log in through auth/login/, which sets the session and CSRF cookies."""
+    await session.post('auth/login/', 'login', {
+        'email': options['email_format'].format(student),
+        'password': options['password'],
+    })
+
+
+async def pick_exam(session, options):
+    exams = (await session.get('exams/', 'exam-list', params={'fields': 'id'})).json()
+    if options['exam']:
+        return options['exam']
+    if not exams:
+        raise ScenarioError('No exam is open for this student')
+    return exams[0]['id']
+
+
+async def exam_day(session, student, options, rng):
+    """
+    A full sitting: log in, list exams, open the paper, start, autosave an
+    answer every `autosave_interval` seconds, check in with the proctoring
+    status poll every `poll_interval` seconds and complete after `duration`.
+    """
+    await login(session, student, options)
+    exam_id = await pick_exam(session, options)
+    paper = (await session.get(f'exams/{exam_id}/', 'exam-detail',
+                               params={'fields': 'id,questions.id,questions.question_type'})).json()
+    questions = paper['questions'] or [{'id': None, 'question_type': 'descriptive'}]
+    attempt_id = (await session.post(f'exams/{exam_id}/start/', 'start')).json()['attempt_id']
+
+    loop = asyncio.get_running_loop()
+    now = loop.time()
+    deadline = now + options['duration']
+    # Jitter the first tick so students don't autosave in lockstep
+    next_autosave = now + rng.uniform(0, options['autosave_interval'])
+    next_poll = now + rng.uniform(0, options['poll_interval'])
+    while True:
+        wake = min(next_autosave, next_poll, deadline)
+        await asyncio.sleep(max(0.0, wake - loop.time()))
+        now = loop.time()
+        if now >= deadline:
+            break
+        try:
+            if now >= next_autosave:
+                question = rng.choice(questions)
+                await session.post(f'attempts/{attempt_id}/submit/', 'submit', {
+                    'question_id': question['id'],
+                    'answer': f'Autosaved answer {rng.getrandbits(32):08x}',
+                    'answer_type': question['question_type'],
+                })
+                next_autosave = now + options['autosave_interval']
+            if now >= next_poll:
+                await session.get(f'attempts/{attempt_id}/', 'proctor-poll',
+                                  params={'fields': 'id,status,violation_count'})
+                next_poll = now + options['poll_interval']
+        except HttpError:
+            pass  # Recorded in the stats; a real client keeps going too
+
+    await session.post(f'attempts/{attempt_id}/complete/', 'complete')
+
+
+async def poll(session, student, options, rng):
+    """Read-heavy: keep revalidating the exam paper with If-None-Match."""
+    await login(session, student, options)
+    exam_id = await pick_exam(session, options)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + options['duration']
+    etag = None
+    await asyncio.sleep(rng.uniform(0, options['poll_interval']))
+    while loop.time() < deadline:
+        headers = {'If-None-Match': etag} if etag else {}
+        response = await session.get(f'exams/{exam_id}/', 'exam-detail', headers=headers, expect=(200, 304))
+        etag = response.headers.get('etag', etag)
+        await asyncio.sleep(options['poll_interval'])
+
+
+SCENARIOS = {
+    'exam_day': exam_day,
+    'poll': poll,
+}
+
+
+async def run(options):
+    """Run `options['students']` concurrent students through the scenario and return the Stats."""
+    stats = Stats()
+    scenario = SCENARIOS[options['scenario']]
+    students = options['students']
+
+    async def simulate(index):
+        student = options['first_student'] + index
+        # Spread arrivals over the ramp-up window like a real exam start
+        await asyncio.sleep(options['ramp_up'] * index / max(students, 1))
+        session = HttpSession(options['base_url'], stats, timeout=options['timeout'])
+        try:
+            await scenario(session, student, options, random.Random(options['seed'] + student))
+        except Exception as exc:
+            stats.errors[('scenario', f'{type(exc).__name__}: {exc}'[:60])] += 1
+        finally:
+            await session.close()
+
+    await asyncio.gather(*(simulate(index) for index in range(students)))
+    stats.stop()
+    return stats
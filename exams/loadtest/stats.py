@@ -0,0 +1,75 @@
+import math
+import time
+from collections import Counter, defaultdict
+
+
+def percentile(sorted_samples, percent):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, math.ceil(percent / 100 * len(sorted_samples)))
+    return sorted_samples[rank - 1]
+
+
+class Stats:
+    """Latencies and errors per endpoint for one load-test run."""
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = Counter()
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def record(self, name, latency, error=None):
+        self.latencies[name].append(latency)
+        if error:
+            self.errors[(name, error)] += 1
+
+    def stop(self):
+        self.finished = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    def summary(self):
+        """Per-endpoint counts, throughput and latency percentiles (in seconds)."""
+        endpoints = {}
+        for name, samples in sorted(self.latencies.items()):
+            samples = sorted(samples)
+            errors = sum(count for (endpoint, _), count in self.errors.items() if endpoint == name)
+            endpoints[name] = {
+                'requests': len(samples),
+                'errors': errors,
+                'rps': len(samples) / self.elapsed if self.elapsed else 0.0,
+                'p50': percentile(samples, 50),
+                'p90': percentile(samples, 90),
+                'p95': percentile(samples, 95),
+                'p99': percentile(samples, 99),
+                'max': samples[-1],
+            }
+        total = sum(endpoint['requests'] for endpoint in endpoints.values())
+        return {
+            'elapsed': self.elapsed,
+            'requests': total,
+            'rps': total / self.elapsed if self.elapsed else 0.0,
+            'endpoints': endpoints,
+            'errors': [
+                {'endpoint': endpoint, 'error': error, 'count': count}
+                for (endpoint, error), count in self.errors.most_common()
+            ],
+        }
+
+    def format_report(self):
+        summary = self.summary()
+        lines = [
+            f"{summary['requests']} requests in {summary['elapsed']:.1f}s ({summary['rps']:.1f} req/s)",
+            '',
+            f"{'endpoint':<16}{'reqs':>8}{'errors':>8}{'req/s':>9}{'p50':>9}{'p90':>9}{'p95':>9}{'p99':>9}{'max':>9}",
+        ]
+        for name, row in summary['endpoints'].items():
+            timings = ''.join(f'{row[key] * 1000:>7.0f}ms' for key in ('p50', 'p90', 'p95', 'p99', 'max'))
+            lines.append(f"{name:<16}{row['requests']:>8}{row['errors']:>8}{row['rps']:>9.1f}{timings}")
+        if summary['errors']:
+            lines += ['', 'Errors:']
+            lines += [f"  {row['endpoint']:<16}{row['error']:<28}{row['count']:>6}" for row in summary['errors']]
+        return '\n'.join(lines)
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from exams.archive import ArchiveError, archivable_exams, archive_exam, verify_archive
+from exams.models import Exam, ExamArchive
+
+
+class Command(BaseCommand):
+    help = (
+        'Move the attempts and answers of exams completed more than ARCHIVE_AFTER_DAYS ago '
+        'into compressed archives and delete them from the database. Use restore_exam to '
+        'bring an exam back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, help='Default: ARCHIVE_AFTER_DAYS')
+        parser.add_argument('--exam', type=int, action='append',
+                            help='Archive this exam whatever its age (repeatable)')
+        parser.add_argument('--batch-size', type=int, help='Attempts deleted per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only list the exams that would be archived')
+        parser.add_argument('--verify', action='store_true',
+                            help='Instead of archiving, check every stored archive reads back intact')
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            return self.verify()
+
+        if options['exam']:
+            exams = Exam.objects.filter(id__in=options['exam'])
+            archived = ExamArchive.objects.filter(exam__in=exams, restored_at__isnull=True)
+            if archived.exists():
+                raise CommandError(f"Already archived: {', '.join(str(a.exam_id) for a in archived)}")
+        else:
+            exams = archivable_exams(options['older_than_days'])
+
+        for exam in exams.order_by('end_time'):
+            if options['dry_run']:
+                self.stdout.write(f'Would archive {exam.title} (ended {exam.end_time:%Y-%m-%d})')
+                continue
+            archive = archive_exam(exam, batch_size=options['batch_size'])
+            self.stdout.write(f'Archived {exam.title}: {archive.attempt_count} attempts, '
+                              f'{archive.answer_count} answers, {archive.size} bytes in {archive.file}')
+        self.stdout.write(self.style.SUCCESS('Done'))
+
+    def verify(self):
+        failed = 0
+        for archive in ExamArchive.objects.filter(restored_at__isnull=True).select_related('exam'):
+            try:
+                verify_archive(archive)
+            except (ArchiveError, OSError) as exc:
+                failed += 1
+                self.stderr.write(self.style.ERROR(f'{archive}: {exc}'))
+        if failed:
+            raise CommandError(f'{failed} archive(s) failed verification')
+        self.stdout.write(self.style.SUCCESS('All archives verified'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from exams.storage import purge_stale_uploads
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete unfinished chunked uploads that have been idle for CHUNKED_UPLOAD_EXPIRY_HOURS, '
+        'with their temp files, and temp files left behind by deleted uploads. Run it daily from cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-hours', type=int, help='Default: CHUNKED_UPLOAD_EXPIRY_HOURS')
+
+    def handle(self, *args, **options):
+        uploads, files = purge_stale_uploads(options['older_than_hours'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {uploads} stale upload(s) and {files} orphaned temp file(s)'))
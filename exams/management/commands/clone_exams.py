@@ -0,0 +1,45 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import StudentGroup, User
+from exams.cloning import clone_exams
+from exams.models import Exam
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy exams with all their questions and options, e.g. to re-run last term\'s exams for new '
+        'student groups. Copies start as drafts.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('exam_ids', nargs='+', type=int, help='Exams to copy')
+        parser.add_argument('--shift-days', type=int, default=0, help='Move the copies\' start and end by this many days')
+        parser.add_argument('--group', type=int, action='append', dest='groups',
+                            help='Open the copies to this student group instead of the original groups (repeatable)')
+        parser.add_argument('--created-by', help='Email of the owner of the copies (default: the original owner)')
+        parser.add_argument('--status', choices=[status for status, _ in Exam.EXAM_STATUS], default='draft')
+
+    def handle(self, *args, **options):
+        missing = set(options['exam_ids']) - set(Exam.objects.filter(id__in=options['exam_ids']).values_list('id', flat=True))
+        if missing:
+            raise CommandError(f'No such exam(s): {", ".join(map(str, sorted(missing)))}')
+        groups = None
+        if options['groups']:
+            groups = list(StudentGroup.objects.filter(id__in=options['groups']))
+            if len(groups) != len(set(options['groups'])):
+                raise CommandError('Unknown student group in --group')
+        created_by = None
+        if options['created_by']:
+            try:
+                created_by = User.objects.get(email=options['created_by'])
+            except User.DoesNotExist:
+                raise CommandError(f"No user with email {options['created_by']}")
+
+        cloned = clone_exams(options['exam_ids'], created_by=created_by, shift=timedelta(days=options['shift_days']),
+                             groups=groups, status=options['status'])
+        for source_id, copy in cloned.items():
+            self.stdout.write(f'Exam {source_id} -> {copy.id} ({copy.question_count} questions, '
+                              f'{copy.option_count} options), {copy.start_time:%Y-%m-%d %H:%M}')
+        self.stdout.write(self.style.SUCCESS(f'Cloned {len(cloned)} exam(s)'))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from exams.models import Exam
+from exams.similarity import index_exam
+
+
+class Command(BaseCommand):
+    help = (
+        'Flag near-duplicate descriptive and code answers. Only answers that are new or '
+        'changed since the last run are signed and compared, so it is cheap to re-run.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('exam_ids', nargs='*', type=int, help='Exams to check; defaults to all')
+        parser.add_argument('--threshold', type=float,
+                            help='Minimum similarity to flag (default: PLAGIARISM_SIMILARITY_THRESHOLD)')
+
+    def handle(self, *args, **options):
+        exams = Exam.objects.all()
+        if options['exam_ids']:
+            exams = exams.filter(id__in=options['exam_ids'])
+            missing = set(options['exam_ids']) - set(exams.values_list('id', flat=True))
+            if missing:
+                raise CommandError(f"No exam with id {', '.join(map(str, sorted(missing)))}")
+        total = 0
+        for exam in exams.order_by('id'):
+            found = index_exam(exam, options['threshold'])
+            total += found
+            self.stdout.write(f'{exam.title}: {found} new match(es)')
+        self.stdout.write(self.style.SUCCESS(f'Done, {total} new match(es) flagged'))
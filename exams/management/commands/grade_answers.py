@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+from exams import audit
+from exams.grading import grade_pending, pending_answers
+
+
+class Command(BaseCommand):
+    help = (
+        'Grade ungraded descriptive answers of finished attempts with the configured scorer '
+        '(GRADING_SCORER). Grades are cached per answer text, so re-running is cheap.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('exam_ids', nargs='*', type=int, help='Exams to grade; defaults to all')
+        parser.add_argument('--scorer', help='Dotted path of a Scorer class (default: GRADING_SCORER)')
+        parser.add_argument('--batch-size', type=int, help='Answers per scorer call (default: GRADING_BATCH_SIZE)')
+        parser.add_argument('--concurrency', type=int, help='Batches scored at once (default: GRADING_CONCURRENCY)')
+        parser.add_argument('--retries', type=int, help='Retries per failed batch (default: GRADING_MAX_RETRIES)')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the pending answers')
+
+    def handle(self, *args, **options):
+        exam_ids = options['exam_ids'] or None
+        if options['dry_run']:
+            self.stdout.write(f'{pending_answers(exam_ids).count()} answer(s) waiting to be graded')
+            return
+
+        scorer = import_string(options['scorer'])() if options['scorer'] else None
+        report = grade_pending(exam_ids, scorer=scorer, batch_size=options['batch_size'],
+                               concurrency=options['concurrency'], retries=options['retries'])
+        audit.flush()
+        self.stdout.write(f"Scored {report['scored']}, reused {report['cached']} cached grade(s)")
+        if report['failed']:
+            self.stderr.write(self.style.WARNING(f"{report['failed']} answer(s) could not be graded; re-run to retry"))
+        else:
+            self.stdout.write(self.style.SUCCESS('Done'))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from exams import notifications
+from exams.models import NOTIFICATION_KINDS, Exam
+
+
+class Command(BaseCommand):
+    help = (
+        'Notify every student of an exam\'s groups that it was scheduled or that its results were published, '
+        'on every channel in NOTIFICATION_CHANNELS, and report the deliveries.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('exam_id', type=int)
+        parser.add_argument('--kind', choices=[kind for kind, _ in NOTIFICATION_KINDS], default='scheduled')
+
+    def handle(self, *args, **options):
+        try:
+            exam = Exam.objects.get(id=options['exam_id'])
+        except Exam.DoesNotExist:
+            raise CommandError(f"No such exam: {options['exam_id']}")
+
+        dispatches = notifications.notify(exam, options['kind'])
+        notifications.flush()  # No background worker in a command: deliver here
+        for dispatch in dispatches:
+            dispatch.refresh_from_db()
+            self.stdout.write(f'{dispatch.channel}: {dispatch.sent} of {dispatch.recipients} sent, '
+                              f'{dispatch.failed} failed')
+        self.stdout.write(self.style.SUCCESS(f'Notified students of exam {exam.id}'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from exams.models import Exam
+from exams.rollups import refresh_exams, refresh_stale
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the per-group HOD rollups of exams whose attempts were finished or graded '
+        'since the last run. Run it every few minutes from cron; --all rebuilds every exam.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Rebuild the rollups of every exam')
+        parser.add_argument('--exam', type=int, action='append', help='Refresh this exam (repeatable)')
+        parser.add_argument('--limit', type=int, help='Refresh at most this many stale exams')
+
+    def handle(self, *args, **options):
+        if options['all']:
+            refreshed = refresh_exams(Exam.objects.values_list('id', flat=True))
+        elif options['exam']:
+            refreshed = refresh_exams(options['exam'])
+        else:
+            refreshed = refresh_stale(options['limit'])
+        self.stdout.write(self.style.SUCCESS(f'Refreshed the rollups of {refreshed} exam(s)'))
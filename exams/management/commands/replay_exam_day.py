@@ -0,0 +1,40 @@
+import asyncio
+import json
+
+from django.core.management.base import BaseCommand
+
+from exams.loadtest.scenarios import SCENARIOS, run
+
+
+class Command(BaseCommand):
+    help = (
+        'Rehearse an exam sitting against a running server: N students log in, list exams, '
+        'start, autosave, poll and complete, then report throughput, latency percentiles '
+        'per endpoint and errors. Pair with seed_scale, whose students it logs in as.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000/api/')
+        parser.add_argument('--scenario', choices=sorted(SCENARIOS), default='exam_day')
+        parser.add_argument('--students', type=int, default=50)
+        parser.add_argument('--first-student', type=int, default=0, help='Number of the first student login')
+        parser.add_argument('--email-format', default='seed.s{:07d}@jainuniversity.ac.in',
+                            help='Login email pattern, formatted with the student number')
+        parser.add_argument('--password', default='password')
+        parser.add_argument('--exam', type=int, help='Exam id to sit; defaults to the first open exam')
+        parser.add_argument('--duration', type=float, default=60, help='Seconds each student stays in the exam')
+        parser.add_argument('--autosave-interval', type=float, default=30)
+        parser.add_argument('--poll-interval', type=float, default=15)
+        parser.add_argument('--ramp-up', type=float, default=10, help='Seconds over which students arrive')
+        parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--json', help='Also write the summary to this file')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Replaying '{options['scenario']}' with {options['students']} students "
+                          f"against {options['base_url']}")
+        stats = asyncio.run(run(options))
+        self.stdout.write(stats.format_report())
+        if options['json']:
+            with open(options['json'], 'w') as fh:
+                json.dump(stats.summary(), fh, indent=2)
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from exams.archive import ArchiveError, restore_exam
+from exams.models import ExamArchive
+
+
+class Command(BaseCommand):
+    help = "Restore an archived exam's attempts, answers and the rows archived with them, with their original ids."
+
+    def add_arguments(self, parser):
+        parser.add_argument('exam_id', type=int)
+        parser.add_argument('--batch-size', type=int, help='Rows inserted per query')
+
+    def handle(self, *args, **options):
+        archive = ExamArchive.objects.filter(exam_id=options['exam_id'], restored_at__isnull=True).first()
+        if archive is None:
+            raise CommandError(f"Exam {options['exam_id']} has no archive to restore")
+        try:
+            counts = restore_exam(archive, batch_size=options['batch_size'])
+        except ArchiveError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f"Restored {counts['attempt']} attempts and {counts['answer']} answers from {archive.file}"))
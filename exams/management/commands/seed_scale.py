@@ -0,0 +1,241 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import User, StudentGroup, StudentProfile, FacultyProfile, HODProfile
+from exams.models import Exam, Question, Option, ExamAttempt, Answer
+
+DOMAIN = 'jainuniversity.ac.in'
+
+
+def parse_mix(value):
+    """Parse 'a=0.7,b=0.3' into ([names], [weights])."""
+    names, weights = [], []
+    try:
+        for part in value.split(','):
+            name, weight = part.split('=')
+            names.append(name.strip())
+            weights.append(float(weight))
+    except ValueError:
+        raise CommandError(f'Invalid distribution "{value}", expected e.g. "a=0.7,b=0.3".')
+    if not any(weights):
+        raise CommandError(f'Distribution "{value}" has no positive weight.')
+    return names, weights
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate large, deterministic volumes of groups, students, faculty, exams, '
+        'questions, options, attempts and answers for load and scale testing.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--students', type=int, default=1000)
+        parser.add_argument('--faculty', type=int, default=20)
+        parser.add_argument('--hods', type=int, default=2)
+        parser.add_argument('--exams', type=int, default=10)
+        parser.add_argument('--questions', type=int, default=50, help='Questions per exam')
+        parser.add_argument('--options', type=int, default=4, help='Options per MCQ question')
+        parser.add_argument('--question-mix', default='mcq=0.6,coding=0.2,descriptive=0.15,file_upload=0.05')
+        parser.add_argument('--participation', type=float, default=0.9,
+                            help='Share of eligible students that attempt each exam')
+        parser.add_argument('--status-mix', default='submitted=0.8,in_progress=0.1,timed_out=0.07,violation=0.03',
+                            help='Distribution of attempt statuses')
+        parser.add_argument('--correct-rate', type=float, default=0.6, help='Probability an MCQ answer is correct')
+        parser.add_argument('--graded-rate', type=float, default=0.5,
+                            help='Share of descriptive/coding answers that already have points')
+        parser.add_argument('--days', type=int, default=180, help='Spread exam dates over this many past days')
+        parser.add_argument('--prefix', default='seed', help='Prefix for generated emails, IDs and names')
+        parser.add_argument('--password', default='password', help='Password shared by every generated user')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed; same seed, same data')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.options = options
+        self.batch_size = options['batch_size']
+        self.prefix = options['prefix']
+        self.now = timezone.now()
+
+        if User.objects.filter(email__startswith=f'{self.prefix}.').exists():
+            raise CommandError(f'Data with prefix "{self.prefix}" already exists; use another --prefix.')
+
+        # One hash for everyone: hashing per user is what makes create_user slow
+        self.password = make_password(options['password'])
+
+        with transaction.atomic():
+            groups = self.create_groups()
+            students_by_group = self.create_students(groups)
+            faculty = self.create_staff(groups)
+        for exam_number in range(options['exams']):
+            with transaction.atomic():
+                self.create_exam(exam_number, groups, students_by_group, faculty)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {options['students']} students in {len(groups)} groups, "
+            f"{options['exams']} exams with {options['questions']} questions each."
+        ))
+
+    def bulk_create(self, model, objects):
+        return model.objects.bulk_create(objects, batch_size=self.batch_size)
+
+    def create_groups(self):
+        return self.bulk_create(StudentGroup, [
+            StudentGroup(name=f'{self.prefix} Group {i:03d}') for i in range(max(self.options['groups'], 1))
+        ])
+
+    def create_students(self, groups):
+        students_by_group = {group.id: [] for group in groups}
+        total = self.options['students']
+        for start in range(0, total, self.batch_size):
+            numbers = range(start, min(start + self.batch_size, total))
+            users = self.bulk_create(User, [
+                User(email=f'{self.prefix}.s{i:07d}@{DOMAIN}', password=self.password, user_type='student',
+                     first_name='Student', last_name=f'{i:07d}')
+                for i in numbers
+            ])
+            profiles = []
+            for i, user in zip(numbers, users):
+                group = groups[i % len(groups)]
+                students_by_group[group.id].append(user.id)
+                profiles.append(StudentProfile(user=user, student_id=f'{self.prefix[:5].upper()}{i:07d}', group=group))
+            self.bulk_create(StudentProfile, profiles)
+            self.stdout.write(f'  students: {numbers.stop}/{total}')
+        return students_by_group
+
+    def create_staff(self, groups):
+        faculty = self.bulk_create(User, [
+            User(email=f'{self.prefix}.f{i:04d}@{DOMAIN}', password=self.password, user_type='faculty',
+                 first_name='Faculty', last_name=f'{i:04d}')
+            for i in range(max(self.options['faculty'], 1))
+        ])
+        self.bulk_create(FacultyProfile, [
+            FacultyProfile(user=user, faculty_id=f'{self.prefix[:5].upper()}F{i:04d}') for i, user in enumerate(faculty)
+        ])
+
+        hods = self.bulk_create(User, [
+            User(email=f'{self.prefix}.h{i:03d}@{DOMAIN}', password=self.password, user_type='hod',
+                 first_name='HOD', last_name=f'{i:03d}')
+            for i in range(self.options['hods'])
+        ])
+        profiles = self.bulk_create(HODProfile, [
+            HODProfile(user=user, faculty_id=f'{self.prefix[:5].upper()}H{i:03d}') for i, user in enumerate(hods)
+        ])
+        through = HODProfile.responsible_for_groups.through
+        self.bulk_create(through, [
+            through(hodprofile_id=profile.pk, studentgroup_id=group.id)
+            for i, profile in enumerate(profiles)
+            for group in groups[i::len(profiles)]
+        ])
+        return faculty
+
+    def create_exam(self, number, groups, students_by_group, faculty):
+        rng = self.rng
+        start_time = self.now - timedelta(days=rng.uniform(0, self.options['days']))
+        end_time = start_time + timedelta(hours=2)
+        exam = Exam.objects.create(
+            title=f'{self.prefix} Exam {number:04d}',
+            description='Generated by seed_scale',
+            created_by=rng.choice(faculty),
+            start_time=start_time,
+            end_time=end_time,
+            duration_minutes=90,
+            status='completed' if end_time < self.now else 'active',
+        )
+        allowed = rng.sample(groups, k=min(len(groups), rng.randint(1, 2)))
+        exam.allowed_groups.add(*allowed)
+
+        question_types, weights = parse_mix(self.options['question_mix'])
+        questions = self.bulk_create(Question, [
+            Question(exam=exam, question_text=f'{self.prefix} question {i} of exam {number}',
+                     question_type=rng.choices(question_types, weights)[0],
+                     points=rng.choice([1, 2, 5, 10]), order=i)
+            for i in range(self.options['questions'])
+        ])
+        options = self.bulk_create(Option, [
+            Option(question=question, option_text=f'Option {o}', order=o, is_correct=(o == 0))
+            for question in questions if question.question_type == 'mcq'
+            for o in range(self.options['options'])
+        ])
+        options_by_question = {}
+        for option in options:
+            options_by_question.setdefault(option.question_id, []).append(option)
+
+        students = [student for group in allowed for student in students_by_group[group.id]]
+        participants = [student for student in students if rng.random() < self.options['participation']]
+        self.create_attempts(exam, questions, options_by_question, participants)
+        self.stdout.write(f'  exam {number + 1}/{self.options["exams"]}: '
+                          f'{len(questions)} questions, {len(participants)} attempts')
+
+    def create_attempts(self, exam, questions, options_by_question, participants):
+        rng = self.rng
+        statuses, weights = parse_mix(self.options['status_mix'])
+        max_score = sum(question.points for question in questions)
+
+        # Size attempt chunks so each chunk's answers fit in about one batch
+        chunk = max(1, self.batch_size // max(len(questions), 1))
+        for start in range(0, len(participants), chunk):
+            attempts = []
+            answers_by_attempt = []
+            for student_id in participants[start:start + chunk]:
+                status = rng.choices(statuses, weights)[0]
+                finished = status != 'in_progress'
+                answers = self.build_answers(questions, options_by_question, finished)
+                duration = rng.randint(10, exam.duration_minutes)
+                attempts.append(ExamAttempt(
+                    student_id=student_id, exam=exam, status=status,
+                    end_time=exam.start_time + timedelta(minutes=duration) if finished else None,
+                    actual_duration=duration if finished else None,
+                    violation_count=rng.randint(1, 5) if status == 'violation' else 0,
+                    screen_switch_count=rng.choices([0, 1, 2, 5], [70, 15, 10, 5])[0],
+                    max_score=max_score,
+                ))
+                answers_by_attempt.append(answers)
+
+            attempts = self.bulk_create(ExamAttempt, attempts)
+            for attempt, answers in zip(attempts, answers_by_attempt):
+                for answer in answers:
+                    answer.attempt_id = attempt.id
+            # Also fills in each attempt's score and answer counts
+            self.bulk_create(Answer, [answer for answers in answers_by_attempt for answer in answers])
+
+        # start_time is auto_now_add, so put it back inside the exam window afterwards
+        ExamAttempt.objects.filter(exam=exam).update(start_time=exam.start_time)
+
+    def build_answers(self, questions, options_by_question, finished):
+        rng = self.rng
+        answers = []
+        # Unfinished attempts have only answered part of the paper
+        answered = questions if finished else questions[:rng.randint(0, len(questions))]
+        for question in answered:
+            answer = Answer(question_id=question.id)
+            if question.question_type == 'mcq' and options_by_question.get(question.id):
+                choices = options_by_question[question.id]
+                correct = rng.random() < self.options['correct_rate']
+                answer.mcq_answer = choices[0] if correct else rng.choice(choices[1:] or choices)
+                answer.is_correct = answer.mcq_answer.is_correct
+                answer.points_awarded = question.points if answer.is_correct else 0
+            elif question.question_type == 'coding':
+                answer.code_answer = f'def solve(data):\n    return sorted(data)[:{rng.randint(1, 9)}]\n'
+            elif question.question_type == 'descriptive':
+                answer.descriptive_answer = ' '.join(rng.choices(WORDS, k=rng.randint(20, 120)))
+            else:
+                answer.file_answer = f'exam_answers/{self.prefix}-{question.id}-{rng.getrandbits(32):08x}.pdf'
+
+            if answer.points_awarded is None and question.question_type != 'file_upload' \
+                    and finished and rng.random() < self.options['graded_rate']:
+                answer.points_awarded = float(rng.randint(0, question.points))
+            answers.append(answer)
+        return answers
+
+
+WORDS = (
+    'algorithm data structure complexity memory process thread network protocol database index '
+    'query transaction normalization schema security encryption hashing compiler interpreter '
+    'recursion iteration stack queue tree graph sorting searching cache latency throughput'
+).split()
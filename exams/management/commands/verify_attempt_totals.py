@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q, Sum
+
+from exams.models import ExamAttempt
+from exams.rollups import mark_stale
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare every attempt's stored score, answered_count and graded_count with its "
+        'answers and report the ones that drifted. With --repair, recount them.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--exam', type=int, action='append', help='Only check this exam (repeatable)')
+        parser.add_argument('--repair', action='store_true', help='Recount the attempts that drifted')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--tolerance', type=float, default=1e-6, help='Allowed score difference')
+
+    def handle(self, *args, **options):
+        attempts = ExamAttempt.objects.order_by('id')
+        if options['exam']:
+            attempts = attempts.filter(exam_id__in=options['exam'])
+
+        checked, drifted = 0, []
+        last_id = 0
+        while True:
+            # Keyset pagination: each batch is one aggregate query, however deep we are
+            batch = list(attempts.filter(id__gt=last_id).annotate(
+                actual_score=Sum('answers__points_awarded'),
+                actual_answered=Count('answers'),
+                actual_graded=Count('answers', filter=Q(answers__points_awarded__isnull=False)),
+            ).values_list('id', 'score', 'answered_count', 'graded_count',
+                          'actual_score', 'actual_answered', 'actual_graded')[:options['batch_size']])
+            if not batch:
+                break
+            for attempt_id, score, answered, graded, actual_score, actual_answered, actual_graded in batch:
+                score_drift = (score is None) != (actual_score is None) or (
+                    score is not None and abs(score - actual_score) > options['tolerance'])
+                if score_drift or answered != actual_answered or graded != actual_graded:
+                    drifted.append(attempt_id)
+                    self.stdout.write(
+                        f'Attempt {attempt_id}: score {score} != {actual_score}, answered {answered} != '
+                        f'{actual_answered} or graded {graded} != {actual_graded}'
+                    )
+            checked += len(batch)
+            last_id = batch[-1][0]
+
+        if options['repair'] and drifted:
+            for start in range(0, len(drifted), options['batch_size']):
+                ExamAttempt.objects.filter(id__in=drifted[start:start + options['batch_size']]).recount()
+            mark_stale(ExamAttempt.objects.filter(id__in=drifted).values_list('exam_id', flat=True).distinct())
+            self.stdout.write(self.style.SUCCESS(f'Checked {checked} attempts, repaired {len(drifted)}'))
+        elif drifted:
+            self.stdout.write(self.style.WARNING(
+                f'Checked {checked} attempts, {len(drifted)} drifted; re-run with --repair to fix them'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Checked {checked} attempts, no drift'))
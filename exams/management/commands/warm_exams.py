@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from exams.models import Exam
+from exams.warmup import warm_exam, warm_upcoming_exams
+
+
+class Command(BaseCommand):
+    help = (
+        'Prepare exams that are about to open: create a not_started attempt for every eligible '
+        'student and cache the papers and start tickets. Run it every few minutes from cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--exam', type=int, action='append', help='Warm this exam whatever its start time (repeatable)')
+        parser.add_argument('--within', type=int, help='Minutes ahead to look (default: EXAM_WARMUP_MINUTES)')
+
+    def handle(self, *args, **options):
+        if options['exam']:
+            results = {exam.id: warm_exam(exam) for exam in Exam.objects.filter(id__in=options['exam'])}
+        else:
+            results = warm_upcoming_exams(options['within'])
+
+        for exam_id, result in results.items():
+            self.stdout.write(f"Exam {exam_id}: provisioned {result['provisioned']} attempts, "
+                              f"cached {result['tickets']} start tickets")
+        self.stdout.write(self.style.SUCCESS(f'Warmed {len(results)} exam(s)'))
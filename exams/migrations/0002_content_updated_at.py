@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("exams", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="answer",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="examattempt",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="option",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="question",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:36
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("exams", "0002_content_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChunkedUpload",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("filename", models.CharField(max_length=255)),
+                ("size", models.PositiveBigIntegerField(help_text="Total size announced by the client, in bytes")),
+                ("received_bytes", models.PositiveBigIntegerField(default=0)),
+                ("sha256", models.CharField(blank=True, max_length=64)),
+                ("status", models.CharField(choices=[("uploading", "Uploading"), ("complete", "Complete")], default="uploading", max_length=20)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("attempt", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="uploads", to="exams.examattempt")),
+                ("question", models.ForeignKey(limit_choices_to={"question_type": "file_upload"}, on_delete=django.db.models.deletion.CASCADE, to="exams.question")),
+            ],
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("exams", "0003_chunkedupload"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AnswerSignature",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("kind", models.CharField(choices=[("descriptive", "Descriptive Answer"), ("code", "Code Answer")], max_length=20)),
+                ("source_hash", models.CharField(help_text="SHA-1 of the text the signature was computed from", max_length=40)),
+                ("signature", models.BinaryField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("answer", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="signatures", to="exams.answer")),
+                ("question", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="exams.question")),
+            ],
+            options={
+                "indexes": [models.Index(fields=["question", "kind"], name="exams_answe_questio_9a2341_idx")],
+                "unique_together": {("answer", "kind")},
+            },
+        ),
+        migrations.CreateModel(
+            name="SignatureBand",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("kind", models.CharField(choices=[("descriptive", "Descriptive Answer"), ("code", "Code Answer")], max_length=20)),
+                ("band", models.PositiveSmallIntegerField()),
+                ("bucket", models.BigIntegerField()),
+                ("answer", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="exams.answer")),
+                ("question", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="exams.question")),
+            ],
+            options={
+                "indexes": [models.Index(fields=["question", "kind", "band", "bucket"], name="exams_signa_questio_9bb1be_idx")],
+            },
+        ),
+        migrations.CreateModel(
+            name="SimilarityMatch",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("kind", models.CharField(choices=[("descriptive", "Descriptive Answer"), ("code", "Code Answer")], max_length=20)),
+                ("similarity", models.FloatField(help_text="Jaccard similarity of the answers' shingles")),
+                ("detected_at", models.DateTimeField(auto_now_add=True)),
+                ("answer_a", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="exams.answer")),
+                ("answer_b", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="exams.answer")),
+                ("question", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="similarity_matches", to="exams.question")),
+            ],
+            options={
+                "ordering": ["-similarity"],
+                "unique_together": {("answer_a", "answer_b", "kind")},
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("exams", "0004_answer_similarity"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="question",
+            name="rubric",
+            field=models.TextField(blank=True, help_text="Key points a full-marks answer covers, used for automatic grading"),
+        ),
+        migrations.CreateModel(
+            name="GradingResult",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("rubric_version", models.CharField(max_length=40)),
+                ("answer_hash", models.CharField(help_text="SHA-1 of the answer text", max_length=40)),
+                ("points", models.FloatField()),
+                ("feedback", models.TextField(blank=True)),
+                ("scorer", models.CharField(max_length=100)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("question", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="grading_results", to="exams.question")),
+            ],
+            options={
+                "unique_together": {("question", "rubric_version", "answer_hash")},
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:45
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_totals(apps, schema_editor):
+    ExamAttempt = apps.get_model("exams", "ExamAttempt")
+    Answer = apps.get_model("exams", "Answer")
+    answers = Answer.objects.filter(attempt=OuterRef("pk")).order_by().values("attempt")
+    graded = answers.filter(points_awarded__isnull=False)
+    ExamAttempt.objects.update(
+        score=Subquery(graded.annotate(total=Sum("points_awarded")).values("total")),
+        answered_count=Coalesce(Subquery(answers.annotate(count=Count("id")).values("count")), 0),
+        graded_count=Coalesce(Subquery(graded.annotate(count=Count("id")).values("count")), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("exams", "0006_answer_claims"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="examattempt",
+            name="answered_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="examattempt",
+            name="graded_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name="examattempt",
+            name="score",
+            field=models.FloatField(blank=True, help_text="Sum of the points awarded so far", null=True),
+        ),
+        migrations.RunPython(backfill_totals, migrations.RunPython.noop),
+    ]
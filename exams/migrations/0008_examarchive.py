@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("exams", "0007_attempt_totals"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ExamArchive",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("file", models.CharField(help_text="Name of the archive in default storage", max_length=255)),
+                ("sha256", models.CharField(max_length=64)),
+                ("size", models.PositiveBigIntegerField(help_text="Size of the archive in bytes")),
+                ("attempt_count", models.PositiveIntegerField()),
+                ("answer_count", models.PositiveIntegerField()),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+                ("restored_at", models.DateTimeField(blank=True, null=True)),
+                ("exam", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="archives", to="exams.exam")),
+            ],
+            options={
+                "ordering": ["-archived_at"],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("exams", "0008_examarchive"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="examattempt",
+            name="status",
+            field=models.CharField(choices=[("not_started", "Not Started"), ("in_progress", "In Progress"), ("submitted", "Submitted"), ("timed_out", "Timed Out"), ("violation", "Violation Detected")], default="in_progress", max_length=20),
+        ),
+    ]
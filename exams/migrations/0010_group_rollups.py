@@ -0,0 +1,62 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0003_alter_user_managers"),
+        ("exams", "0009_attempt_not_started"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StaleRollup",
+            fields=[
+                ("exam", models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name="+", serialize=False, to="exams.exam")),
+                ("marked_at", models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name="GroupExamRollup",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("term", models.CharField(help_text="Month the exam's academic term started, e.g. 2025-07", max_length=7)),
+                ("eligible_count", models.PositiveIntegerField(help_text="Students in the group")),
+                ("attempt_count", models.PositiveIntegerField(help_text="Finished attempts")),
+                ("scored_count", models.PositiveIntegerField(help_text="Finished attempts with a score")),
+                ("mean_score", models.FloatField(blank=True, null=True)),
+                ("median_score", models.FloatField(blank=True, null=True)),
+                ("violation_count", models.PositiveIntegerField(help_text="Finished attempts with a proctoring violation")),
+                ("refreshed_at", models.DateTimeField(auto_now=True)),
+                ("exam", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="group_rollups", to="exams.exam")),
+                ("group", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="exam_rollups", to="core.studentgroup")),
+            ],
+            options={
+                "ordering": ["group_id", "-exam_id"],
+                "unique_together": {("group", "exam")},
+            },
+        ),
+        migrations.CreateModel(
+            name="GroupTermRollup",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("term", models.CharField(help_text="Month the academic term started, e.g. 2025-07", max_length=7)),
+                ("exam_count", models.PositiveIntegerField()),
+                ("eligible_count", models.PositiveIntegerField(help_text="Sum over the exams of the students expected to sit them")),
+                ("attempt_count", models.PositiveIntegerField(help_text="Finished attempts")),
+                ("scored_count", models.PositiveIntegerField(help_text="Finished attempts with a score")),
+                ("mean_score", models.FloatField(blank=True, null=True)),
+                ("median_score", models.FloatField(blank=True, null=True)),
+                ("violation_count", models.PositiveIntegerField(help_text="Finished attempts with a proctoring violation")),
+                ("refreshed_at", models.DateTimeField(auto_now=True)),
+                ("group", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="term_rollups", to="core.studentgroup")),
+            ],
+            options={
+                "ordering": ["group_id", "-term"],
+                "unique_together": {("group", "term")},
+            },
+        ),
+    ]
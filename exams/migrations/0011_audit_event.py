@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("exams", "0010_group_rollups"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AuditEvent",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("event", models.CharField(choices=[("started", "Started"), ("answer_saved", "Answer Saved"), ("tab_switch", "Tab Switched"), ("completed", "Completed"), ("graded", "Graded"), ("regraded", "Regraded")], max_length=20)),
+                ("occurred_at", models.DateTimeField(help_text="When it happened, not when it was written")),
+                ("detail", models.JSONField(blank=True, default=dict)),
+                ("attempt", models.ForeignKey(db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name="audit_events", to="exams.examattempt")),
+                ("user", models.ForeignKey(db_constraint=False, db_index=False, help_text="Who did it; empty for automatic grading", null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name="+", to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                "ordering": ["occurred_at", "id"],
+                "indexes": [models.Index(fields=["attempt", "occurred_at"], name="audit_attempt_idx"), models.Index(fields=["user", "occurred_at"], name="audit_user_idx")],
+            },
+        ),
+    ]
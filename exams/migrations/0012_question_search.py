@@ -0,0 +1,65 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:20
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# PostgreSQL only: the trigger that maintains exams_question.search_vector, its GIN index,
+# and trigram indexes matching the UPPER(col::text) LIKE that icontains compiles to
+SEARCH_SQL = """
+CREATE FUNCTION exams_question_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.question_text, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.rubric, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.code_template, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER exams_question_search_vector_trigger
+    BEFORE INSERT OR UPDATE ON exams_question
+    FOR EACH ROW EXECUTE FUNCTION exams_question_search_vector();
+
+UPDATE exams_question SET search_vector = NULL;
+
+CREATE INDEX question_search_idx ON exams_question USING gin (search_vector);
+CREATE INDEX question_text_trgm_idx ON exams_question USING gin (UPPER(question_text::text) gin_trgm_ops);
+CREATE INDEX option_text_trgm_idx ON exams_option USING gin (UPPER(option_text::text) gin_trgm_ops);
+"""
+
+DROP_SEARCH_SQL = """
+DROP INDEX IF EXISTS option_text_trgm_idx;
+DROP INDEX IF EXISTS question_text_trgm_idx;
+DROP INDEX IF EXISTS question_search_idx;
+DROP TRIGGER IF EXISTS exams_question_search_vector_trigger ON exams_question;
+DROP FUNCTION IF EXISTS exams_question_search_vector();
+"""
+
+
+def create_search(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(SEARCH_SQL)
+
+
+def drop_search(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(DROP_SEARCH_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("exams", "0011_audit_event"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name="question",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        # The UPDATE fires the trigger once per existing question to backfill
+        migrations.RunPython(create_search, drop_search),
+    ]
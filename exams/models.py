@@ -1,6 +1,34 @@
-from django.db import models
+import hashlib
+import uuid
+
+from django.contrib.postgres.search import SearchVectorField
+from django.core.cache import cache
+from django.db import NotSupportedError, models, transaction
+from django.db.models import Avg, Count, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
 from core.models import User, StudentGroup
 
+
+class ExamQuerySet(models.QuerySet):
+    def with_overview(self):
+        """
+        Annotate question_count, total_points, <status>_count for every attempt
+        status and average_score (of finished attempts), all in the same query.
+        """
+        # Questions come from subqueries so joining them doesn't multiply the attempt rows
+        questions = Question.objects.filter(exam=OuterRef('pk')).order_by().values('exam')
+        finished = ['submitted', 'timed_out', 'violation']
+        return self.annotate(
+            question_count=Coalesce(Subquery(questions.annotate(count=Count('id')).values('count')), 0),
+            total_points=Coalesce(Subquery(questions.annotate(total=Sum('points')).values('total')), 0),
+            average_score=Avg('attempts__score', filter=Q(attempts__status__in=finished)),
+            **{
+                f'{status}_count': Count('attempts', filter=Q(attempts__status=status))
+                for status, _ in ExamAttempt.ATTEMPT_STATUS
+            },
+        )
+
+
 class Exam(models.Model):
     EXAM_STATUS = (
         ('draft', 'Draft'),
@@ -31,9 +59,20 @@ class Exam(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ExamQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.title} - {self.get_status_display()}"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # A rescheduled exam must not keep the start window cached by the warmup
+        cache.delete(self.window_cache_key(self.pk))
+
+    @staticmethod
+    def window_cache_key(exam_id):
+        return f'exam-window:{exam_id}'
+
     class Meta:
         ordering = ['-created_at']
 
@@ -55,12 +94,24 @@ class Question(models.Model):
     # For coding questions
     code_template = models.TextField(blank=True, help_text="Initial code template for coding questions")
     test_cases = models.JSONField(blank=True, null=True, help_text="JSON structure for test cases")
+
+    # For descriptive questions
+    rubric = models.TextField(blank=True, help_text="Key points a full-marks answer covers, used for automatic grading")
+
+    # Full-text search document, kept up to date by a database trigger on PostgreSQL (see exams/search.py)
+    search_vector = SearchVectorField(null=True, editable=False)
     
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Q{self.order}: {self.question_text[:50]}..."
 
+    @property
+    def rubric_version(self):
+        """Changes whenever anything the automatic grader looks at changes."""
+        return hashlib.sha1(f'{self.points}\x00{self.question_text}\x00{self.rubric}'.encode()).hexdigest()
+
     class Meta:
         ordering = ['order']
 
@@ -70,6 +121,7 @@ class Option(models.Model):
     option_text = models.CharField(max_length=500)
     is_correct = models.BooleanField(default=False)
     order = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Option {self.order}: {self.option_text[:30]}..."
@@ -78,8 +130,35 @@ class Option(models.Model):
         ordering = ['order']
 
 
+def attempt_totals():
+    """Expressions recomputing an attempt's denormalized totals from its answers."""
+    answers = Answer.objects.filter(attempt=OuterRef('pk')).order_by().values('attempt')
+    graded = answers.filter(points_awarded__isnull=False)
+    return {
+        'score': Subquery(graded.annotate(total=Sum('points_awarded')).values('total')),
+        'answered_count': Coalesce(Subquery(answers.annotate(count=Count('id')).values('count')), 0),
+        'graded_count': Coalesce(Subquery(graded.annotate(count=Count('id')).values('count')), 0),
+    }
+
+
+class ExamAttemptQuerySet(models.QuerySet):
+    def recount(self):
+        """Recompute score, answered_count and graded_count from the answers, in one UPDATE."""
+        return self.update(**attempt_totals())
+
+    def lock(self):
+        """
+        Row-lock these attempts until the end of the transaction, in id order
+        so concurrent writers can't deadlock. Answer writes take it before
+        writing and recounting, so a second writer's recount sees the first
+        writer's answers instead of overwriting its totals.
+        """
+        return list(self.select_for_update().order_by('id').values_list('id', flat=True))
+
+
 class ExamAttempt(models.Model):
     ATTEMPT_STATUS = (
+        ('not_started', 'Not Started'),  # Provisioned by the exam warmup
         ('in_progress', 'In Progress'),
         ('submitted', 'Submitted'),
         ('timed_out', 'Timed Out'),
@@ -100,13 +179,19 @@ class ExamAttempt(models.Model):
     screen_switch_count = models.PositiveIntegerField(default=0)
     status = models.CharField(max_length=20, choices=ATTEMPT_STATUS, default='in_progress')
     
-    # Results
-    score = models.FloatField(null=True, blank=True)
+    # Results. score and the counts are kept in step with the answers by
+    # AnswerQuerySet and Answer.save()/delete(); verify_attempt_totals repairs drift.
+    score = models.FloatField(null=True, blank=True, help_text="Sum of the points awarded so far")
     max_score = models.PositiveIntegerField(null=True, blank=True)
+    answered_count = models.PositiveIntegerField(default=0)
+    graded_count = models.PositiveIntegerField(default=0)
     
     reviewed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, 
                                   limit_choices_to={'user_type__in': ['faculty', 'hod']}, related_name='reviewed_attempts')
     reviewed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ExamAttemptQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.student.email} - {self.exam.title} - Attempt {self.attempt_number}"
@@ -115,6 +200,42 @@ class ExamAttempt(models.Model):
         unique_together = ['student', 'exam', 'attempt_number']
 
 
+class AnswerQuerySet(models.QuerySet):
+    """
+    Bulk writes that can change an attempt's totals recount the attempts
+    they touched, so ExamAttempt.score and the counts never need a SUM on read.
+    The write and the recount share a transaction that holds the attempts'
+    row locks (ExamAttemptQuerySet.lock).
+    """
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        attempts = ExamAttempt.objects.filter(id__in={obj.attempt_id for obj in objs})
+        with transaction.atomic(using=self.db):
+            attempts.lock()
+            objs = super().bulk_create(objs, *args, **kwargs)
+            attempts.recount()
+        return objs
+
+    def update(self, **kwargs):
+        # bulk_update() goes through here too, one batch at a time
+        if 'points_awarded' not in kwargs:
+            return super().update(**kwargs)
+        attempts = ExamAttempt.objects.filter(id__in=set(self.values_list('attempt_id', flat=True)))
+        with transaction.atomic(using=self.db):
+            attempts.lock()
+            rows = super().update(**kwargs)
+            attempts.recount()
+        return rows
+
+    def delete(self):
+        attempts = ExamAttempt.objects.filter(id__in=set(self.values_list('attempt_id', flat=True)))
+        with transaction.atomic(using=self.db):
+            attempts.lock()
+            result = super().delete()
+            attempts.recount()
+        return result
+
+
 class Answer(models.Model):
     attempt = models.ForeignKey(ExamAttempt, on_delete=models.CASCADE, related_name='answers')
     question = models.ForeignKey(Question, on_delete=models.CASCADE)
@@ -129,11 +250,314 @@ class Answer(models.Model):
     is_correct = models.BooleanField(null=True, blank=True)
     points_awarded = models.FloatField(null=True, blank=True)
     feedback = models.TextField(blank=True)
+
+    # Manual grading queue: the grader holding this answer and until when
+    claimed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    claimed_until = models.DateTimeField(null=True, blank=True)
     
     submitted_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = AnswerQuerySet.as_manager()
 
     def __str__(self):
         return f"Answer for {self.question} by {self.attempt.student.email}"
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'points_awarded' not in update_fields:
+            return super().save(*args, **kwargs)
+        attempt = ExamAttempt.objects.filter(id=self.attempt_id)
+        with transaction.atomic():
+            attempt.lock()
+            super().save(*args, **kwargs)
+            attempt.recount()
+
+    def delete(self, *args, **kwargs):
+        attempt = ExamAttempt.objects.filter(id=self.attempt_id)
+        with transaction.atomic():
+            attempt.lock()
+            result = super().delete(*args, **kwargs)
+            attempt.recount()
+        return result
+
+    class Meta:
+        unique_together = ['attempt', 'question']
+        indexes = [models.Index(fields=['question', 'points_awarded'], name='answer_grading_idx')]
+
+
+class ChunkedUpload(models.Model):
+    """A file answer being uploaded in chunks; resumable from `received_bytes`."""
+    UPLOAD_STATUS = (
+        ('uploading', 'Uploading'),
+        ('complete', 'Complete'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    attempt = models.ForeignKey(ExamAttempt, on_delete=models.CASCADE, related_name='uploads')
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, limit_choices_to={'question_type': 'file_upload'})
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField(help_text="Total size announced by the client, in bytes")
+    received_bytes = models.PositiveBigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True)
+    status = models.CharField(max_length=20, choices=UPLOAD_STATUS, default='uploading')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.received_bytes}/{self.size} bytes)"
+
+
+class AnswerSignature(models.Model):
+    """MinHash signature of an answer's text or code, used for plagiarism detection."""
+    SIGNATURE_KINDS = (
+        ('descriptive', 'Descriptive Answer'),
+        ('code', 'Code Answer'),
+    )
+
+    answer = models.ForeignKey(Answer, on_delete=models.CASCADE, related_name='signatures')
+    question = models.ForeignKey(Question, on_delete=models.CASCADE)
+    kind = models.CharField(max_length=20, choices=SIGNATURE_KINDS)
+    source_hash = models.CharField(max_length=40, help_text="SHA-1 of the text the signature was computed from")
+    signature = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} signature of answer {self.answer_id}"
+
+    class Meta:
+        unique_together = ['answer', 'kind']
+        indexes = [models.Index(fields=['question', 'kind'])]
+
+
+class SignatureBand(models.Model):
+    """One LSH band bucket of a signature; answers sharing a bucket are compared."""
+    answer = models.ForeignKey(Answer, on_delete=models.CASCADE, related_name='+')
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='+')
+    kind = models.CharField(max_length=20, choices=AnswerSignature.SIGNATURE_KINDS)
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        indexes = [models.Index(fields=['question', 'kind', 'band', 'bucket'])]
+
+
+class SimilarityMatch(models.Model):
+    """A verified pair of near-duplicate answers to the same question."""
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='similarity_matches')
+    kind = models.CharField(max_length=20, choices=AnswerSignature.SIGNATURE_KINDS)
+    answer_a = models.ForeignKey(Answer, on_delete=models.CASCADE, related_name='+')
+    answer_b = models.ForeignKey(Answer, on_delete=models.CASCADE, related_name='+')
+    similarity = models.FloatField(help_text="Jaccard similarity of the answers' shingles")
+    detected_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Answers {self.answer_a_id} and {self.answer_b_id}: {self.similarity:.0%}"
+
+    class Meta:
+        ordering = ['-similarity']
+        unique_together = ['answer_a', 'answer_b', 'kind']
+
+
+class GradingResult(models.Model):
+    """
+    A scorer's grade for one answer text, reused for every identical answer
+    to the question until the question or its rubric changes.
+    """
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='grading_results')
+    rubric_version = models.CharField(max_length=40)
+    answer_hash = models.CharField(max_length=40, help_text="SHA-1 of the answer text")
+    points = models.FloatField()
+    feedback = models.TextField(blank=True)
+    scorer = models.CharField(max_length=100)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.points} points for answer {self.answer_hash[:8]} to question {self.question_id}"
+
+    class Meta:
+        unique_together = ['question', 'rubric_version', 'answer_hash']
+
+
+class ExamArchive(models.Model):
+    """
+    A compressed JSON Lines file holding an exam's attempts and answers,
+    which have been removed from the database until the archive is restored.
+    """
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name='archives')
+    file = models.CharField(max_length=255, help_text="Name of the archive in default storage")
+    sha256 = models.CharField(max_length=64)
+    size = models.PositiveBigIntegerField(help_text="Size of the archive in bytes")
+    attempt_count = models.PositiveIntegerField()
+    answer_count = models.PositiveIntegerField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    restored_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Archive of {self.exam.title} ({self.attempt_count} attempts)"
+
+    class Meta:
+        ordering = ['-archived_at']
+
+
+class GroupExamRollup(models.Model):
+    """
+    How one student group did in one exam, over its finished attempts.
+    Recomputed by exams/rollups.py after attempts are finished or graded.
+    """
+    group = models.ForeignKey(StudentGroup, on_delete=models.CASCADE, related_name='exam_rollups')
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name='group_rollups')
+    term = models.CharField(max_length=7, help_text="Month the exam's academic term started, e.g. 2025-07")
+    eligible_count = models.PositiveIntegerField(help_text="Students in the group")
+    attempt_count = models.PositiveIntegerField(help_text="Finished attempts")
+    scored_count = models.PositiveIntegerField(help_text="Finished attempts with a score")
+    mean_score = models.FloatField(null=True, blank=True)
+    median_score = models.FloatField(null=True, blank=True)
+    violation_count = models.PositiveIntegerField(help_text="Finished attempts with a proctoring violation")
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def participation(self):
+        return self.attempt_count / self.eligible_count if self.eligible_count else None
+
+    @property
+    def violation_rate(self):
+        return self.violation_count / self.attempt_count if self.attempt_count else None
+
+    def __str__(self):
+        return f"{self.group} in {self.exam.title}"
+
+    class Meta:
+        ordering = ['group_id', '-exam_id']
+        unique_together = ['group', 'exam']
+
+
+class GroupTermRollup(models.Model):
+    """A student group's results across all exams of one academic term."""
+    group = models.ForeignKey(StudentGroup, on_delete=models.CASCADE, related_name='term_rollups')
+    term = models.CharField(max_length=7, help_text="Month the academic term started, e.g. 2025-07")
+    exam_count = models.PositiveIntegerField()
+    eligible_count = models.PositiveIntegerField(help_text="Sum over the exams of the students expected to sit them")
+    attempt_count = models.PositiveIntegerField(help_text="Finished attempts")
+    scored_count = models.PositiveIntegerField(help_text="Finished attempts with a score")
+    mean_score = models.FloatField(null=True, blank=True)
+    median_score = models.FloatField(null=True, blank=True)
+    violation_count = models.PositiveIntegerField(help_text="Finished attempts with a proctoring violation")
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    participation = GroupExamRollup.participation
+    violation_rate = GroupExamRollup.violation_rate
+
+    def __str__(self):
+        return f"{self.group} in term {self.term}"
+
+    class Meta:
+        ordering = ['group_id', '-term']
+        unique_together = ['group', 'term']
+
+
+class StaleRollup(models.Model):
+    """An exam whose group rollups need recomputing (see refresh_rollups)."""
+    exam = models.OneToOneField(Exam, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    marked_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Rollups of exam {self.exam_id} are stale"
+
+
+class AuditEventQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        raise NotSupportedError('Audit events are append-only')
+
+    def delete(self):
+        raise NotSupportedError('Audit events are append-only')
+
+
+class AuditEvent(models.Model):
+    """
+    One step in an attempt's life, for settling disputes. Written in batches
+    by exams.audit; rows are never changed or deleted, and they outlive the
+    attempts and users they refer to (the foreign keys have no constraint).
+    """
+    EVENT_TYPES = (
+        ('started', 'Started'),
+        ('answer_saved', 'Answer Saved'),
+        ('tab_switch', 'Tab Switched'),
+        ('completed', 'Completed'),
+        ('graded', 'Graded'),
+        ('regraded', 'Regraded'),
+    )
+
+    event = models.CharField(max_length=20, choices=EVENT_TYPES)
+    attempt = models.ForeignKey(ExamAttempt, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False,
+                                null=True, related_name='audit_events')
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False,
+                             null=True, related_name='+', help_text="Who did it; empty for automatic grading")
+    occurred_at = models.DateTimeField(help_text="When it happened, not when it was written")
+    detail = models.JSONField(default=dict, blank=True)
+
+    objects = AuditEventQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.get_event_display()} on attempt {self.attempt_id} at {self.occurred_at}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise NotSupportedError('Audit events are append-only')
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise NotSupportedError('Audit events are append-only')
+
+    class Meta:
+        ordering = ['occurred_at', 'id']
+        indexes = [
+            models.Index(fields=['attempt', 'occurred_at'], name='audit_attempt_idx'),
+            models.Index(fields=['user', 'occurred_at'], name='audit_user_idx'),
+        ]
+
+
+NOTIFICATION_KINDS = (
+    ('scheduled', 'Exam Scheduled'),
+    ('results', 'Results Published'),
+)
+
+
+class NotificationDispatch(models.Model):
+    """Delivery progress of one notification about an exam, over one channel (see exams.notifications)."""
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name='notification_dispatches')
+    kind = models.CharField(max_length=20, choices=NOTIFICATION_KINDS)
+    channel = models.CharField(max_length=20)
+    recipients = models.PositiveIntegerField()
+    sent = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0, help_text="Deliveries still failing after all retries")
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def pending(self):
+        return self.recipients - self.sent - self.failed
+
+    def __str__(self):
+        return f"{self.get_kind_display()} for {self.exam_id} by {self.channel}: {self.sent}/{self.recipients}"
+
+    class Meta:
+        ordering = ['-created_at', 'id']
+
+
+class Notification(models.Model):
+    """A message in a user's in-app inbox."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications', db_index=False)
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, null=True, related_name='+')
+    kind = models.CharField(max_length=20, choices=NOTIFICATION_KINDS)
+    subject = models.CharField(max_length=200)
+    body = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    read_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.subject} for {self.user_id}"
+
     class Meta:
-        unique_together = ['attempt', 'question']
\ No newline at end of file
+        ordering = ['-created_at', '-id']
+        indexes = [models.Index(fields=['user', '-created_at'], name='notification_user_idx')]
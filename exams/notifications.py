@@ -0,0 +1,212 @@
+"""
+Telling every student of an exam's groups that it was scheduled or that its
+results were published.
+
+`notify(exam, kind)` does the cheap part in the caller. It resolves the
+recipients with one query per allowed group. It renders the message from
+the exams/notifications/<kind>_{subject,body}.txt templates once per
+language, not once per student. It creates a NotificationDispatch per
+channel to count deliveries against, and it queues the deliveries in
+chunks of NOTIFICATION_BATCH_SIZE recipients. The deliveries are queued only
+once the caller's transaction commits. Until then the worker could not see
+the dispatch rows, and a rollback must not send anything.
+
+A background worker (core/background.py) delivers queued chunks,
+NOTIFICATION_CONCURRENCY at a time. A failed chunk is retried with
+exponential backoff up to NOTIFICATION_MAX_RETRIES times. After that its
+recipients count as failed. The dispatch counters are bumped once per
+dispatch per batch of chunks, so a fan-out's progress can be followed at
+GET /api/exams/<id>/notifications/ while it runs.
+
+Channels are the Channel subclasses named in NOTIFICATION_CHANNELS. Email
+goes through EMAIL_BACKEND, which is the file or locmem backend locally and
+in tests. In-app notifications are rows in Notification. Users have no
+language preference yet, so everyone is sent LANGUAGE_CODE.
+"""
+import logging
+import time
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.utils import timezone, translation
+from django.utils.module_loading import import_string
+
+from core import metrics
+from core.background import BatchWorker
+from core.models import StudentProfile
+
+from .models import Notification, NotificationDispatch
+
+logger = logging.getLogger(__name__)
+
+Recipient = namedtuple('Recipient', ['user_id', 'email', 'language'])
+Message = namedtuple('Message', ['exam_id', 'kind', 'subject', 'body'])
+Delivery = namedtuple('Delivery', ['dispatch_id', 'channel', 'message', 'recipients'])
+
+notification_deliveries = metrics.registry.counter(
+    'notifications_total', 'Notifications by channel and outcome: sent or failed.', ['channel', 'outcome'])
+notification_queue_depth = metrics.registry.gauge(
+    'notification_queue_depth', 'Notification chunks waiting to be delivered.')
+
+
+class Channel:
+    """
+    Delivers one rendered message to a chunk of recipients, raising if it
+    can't (the whole chunk is then retried). Channels run in a pool of worker
+    threads and must not use the database, unless they set `uses_database`,
+    in which case they run in the worker itself.
+    """
+    name = None
+    uses_database = False
+
+    def deliver(self, message, recipients):
+        raise NotImplementedError
+
+
+class EmailChannel(Channel):
+    """One email per recipient, the whole chunk sent over one EMAIL_BACKEND connection."""
+    name = 'email'
+
+    def deliver(self, message, recipients):
+        get_connection().send_messages([
+            EmailMessage(message.subject, message.body, to=[recipient.email]) for recipient in recipients
+        ])
+
+
+class InAppChannel(Channel):
+    """Rows in the recipients' in-app inbox (GET /api/notifications/)."""
+    name = 'in_app'
+    uses_database = True
+
+    def deliver(self, message, recipients):
+        Notification.objects.bulk_create([
+            Notification(user_id=recipient.user_id, exam_id=message.exam_id, kind=message.kind,
+                         subject=message.subject, body=message.body)
+            for recipient in recipients
+        ])
+
+
+def get_channels():
+    return [import_string(path)() for path in settings.NOTIFICATION_CHANNELS]
+
+
+def resolve_recipients(exam):
+    """Active students of the exam's groups, with one query per group."""
+    recipients = {}
+    for group_id in exam.allowed_groups.values_list('id', flat=True):
+        students = StudentProfile.objects.filter(group_id=group_id, is_active=True, user__is_active=True)
+        for user_id, email in students.values_list('user_id', 'user__email'):
+            recipients[user_id] = Recipient(user_id, email, settings.LANGUAGE_CODE)
+    return list(recipients.values())
+
+
+def render(exam, kind, language):
+    context = {'exam': exam}
+    with translation.override(language):
+        subject = render_to_string(f'exams/notifications/{kind}_subject.txt', context)
+        body = render_to_string(f'exams/notifications/{kind}_body.txt', context)
+    return Message(exam.id, kind, ' '.join(subject.split()), body.strip())
+
+
+def notify(exam, kind, channels=None):
+    """
+    Queue `kind` (see NOTIFICATION_KINDS) notifications about `exam` to its
+    students on every channel. Returns the NotificationDispatch rows
+    tracking them.
+    """
+    channels = channels or get_channels()
+    by_language = defaultdict(list)
+    for recipient in resolve_recipients(exam):
+        by_language[recipient.language].append(recipient)
+    messages = {language: render(exam, kind, language) for language in by_language}
+    total = sum(map(len, by_language.values()))
+
+    dispatches = NotificationDispatch.objects.bulk_create([
+        NotificationDispatch(exam=exam, kind=kind, channel=channel.name, recipients=total,
+                             finished_at=None if total else timezone.now())
+        for channel in channels
+    ])
+    size = settings.NOTIFICATION_BATCH_SIZE
+    queued = [
+        Delivery(dispatch.id, channel, messages[language], recipients[start:start + size])
+        for channel, dispatch in zip(channels, dispatches)
+        for language, recipients in by_language.items()
+        for start in range(0, len(recipients), size)
+    ]
+
+    def enqueue():
+        for delivery in queued:
+            deliveries.put(delivery)
+
+    transaction.on_commit(enqueue)
+    return dispatches
+
+
+def deliver_with_retry(delivery):
+    """Whether `delivery` went through, after up to NOTIFICATION_MAX_RETRIES retries."""
+    retries = settings.NOTIFICATION_MAX_RETRIES
+    for attempt in range(retries + 1):
+        try:
+            delivery.channel.deliver(delivery.message, delivery.recipients)
+            return True
+        except Exception:
+            if attempt == retries:
+                logger.exception('Failed to deliver %s notification of exam %d by %s to %d recipients',
+                                 delivery.message.kind, delivery.message.exam_id, delivery.channel.name,
+                                 len(delivery.recipients))
+                return False
+            time.sleep(settings.NOTIFICATION_RETRY_BACKOFF * 2 ** attempt)
+
+
+class DeliveryQueue(BatchWorker):
+    name = 'notification-sender'
+
+    def __init__(self):
+        super().__init__(settings.NOTIFICATION_QUEUE_SIZE, settings.NOTIFICATION_CONCURRENCY * 4,
+                         settings.NOTIFICATION_FLUSH_SECONDS, settings.NOTIFICATION_ENQUEUE_TIMEOUT)
+
+    def handle(self, deliveries):
+        counts = defaultdict(lambda: [0, 0])  # dispatch id -> [sent, failed]
+
+        def count(delivery, ok):
+            counts[delivery.dispatch_id][0 if ok else 1] += len(delivery.recipients)
+            notification_deliveries.inc(len(delivery.recipients), channel=delivery.channel.name,
+                                        outcome='sent' if ok else 'failed')
+
+        with ThreadPoolExecutor(max_workers=settings.NOTIFICATION_CONCURRENCY) as pool:
+            futures = {pool.submit(deliver_with_retry, delivery): delivery
+                       for delivery in deliveries if not delivery.channel.uses_database}
+            # Database channels run here while the pool works through the rest
+            for delivery in deliveries:
+                if delivery.channel.uses_database:
+                    count(delivery, deliver_with_retry(delivery))
+            for future in as_completed(futures):
+                count(futures[future], future.result())
+
+        for dispatch_id, (sent, failed) in counts.items():
+            NotificationDispatch.objects.filter(pk=dispatch_id).update(sent=F('sent') + sent,
+                                                                       failed=F('failed') + failed)
+        NotificationDispatch.objects.filter(
+            pk__in=counts, finished_at__isnull=True, recipients__lte=F('sent') + F('failed'),
+        ).update(finished_at=timezone.now())
+
+
+deliveries = DeliveryQueue()
+
+
+@metrics.registry.collector
+def collect_notification_queue():
+    notification_queue_depth.set(deliveries.queue.qsize())
+
+
+def start():
+    deliveries.start()
+
+
+def flush():
+    return deliveries.flush()
@@ -0,0 +1,49 @@
+"""
+Cached exam papers.
+
+The full representation of an exam (questions and options included) is the
+same for every student, so it is built once and cached under a key derived
+from the exam's content versions: any edit to the exam, a question or an
+option changes the key, and stale papers simply expire.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from core.conditional import make_etag
+from core.fieldsets import project_queryset
+
+from .models import Exam
+from .serializers import ExamSerializer
+
+
+def exam_content_versions(queryset):
+    """
+    Return one row per exam in `queryset` with everything its representation
+    depends on: the exam's own `updated_at` plus the count and latest change of
+    its questions and options. A single aggregate query.
+    """
+    return list(queryset.order_by('id').annotate(
+        question_count=Count('questions', distinct=True),
+        questions_updated=Max('questions__updated_at'),
+        option_count=Count('questions__options', distinct=True),
+        options_updated=Max('questions__options__updated_at'),
+    ).values_list('id', 'updated_at', 'question_count', 'questions_updated',
+                  'option_count', 'options_updated'))
+
+
+def paper_cache_key(version):
+    """`version` is one row of exam_content_versions()."""
+    etag = make_etag(*version).strip('"')
+    return f'exam-paper:{version[0]}:{etag}'
+
+
+def exam_paper(version):
+    """The serialized exam for `version`, from the cache or built and cached."""
+    key = paper_cache_key(version)
+    paper = cache.get(key)
+    if paper is None:
+        exam = project_queryset(Exam.objects.filter(pk=version[0]), ExamSerializer).get()
+        paper = ExamSerializer(exam).data
+        cache.set(key, paper, settings.EXAM_PAPER_CACHE_TIMEOUT)
+    return paper
@@ -0,0 +1,141 @@
+"""
+Precomputed group results for HOD dashboards.
+
+Reporting live would join attempts, student profiles and groups over the
+whole history, so results are kept per (group, exam) and per (group, term)
+in GroupExamRollup and GroupTermRollup. Finishing or grading an attempt only
+marks its exam stale (one upsert); `refresh_stale`, run by the
+refresh_rollups command, then recomputes just the stale exams and the terms
+they belong to.
+
+Exams whose attempts were archived keep their last rollups: their rows are
+no longer in the database to recompute from.
+"""
+import statistics
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Sum
+from django.utils import timezone
+
+from core.models import StudentProfile
+
+from .models import Exam, ExamArchive, ExamAttempt, GroupExamRollup, GroupTermRollup, StaleRollup
+
+FINISHED = ['submitted', 'timed_out', 'violation']
+
+
+def term_for(moment):
+    """The term an exam starting at `moment` belongs to, as the 'YYYY-MM' it started."""
+    local = timezone.localtime(moment)
+    months = sorted(settings.ACADEMIC_TERM_START_MONTHS)
+    started = [month for month in months if month <= local.month]
+    if started:
+        return f'{local.year}-{started[-1]:02d}'
+    return f'{local.year - 1}-{months[-1]:02d}'
+
+
+def mark_stale(exam_ids):
+    """Queue the rollups of `exam_ids` for recomputation."""
+    now = timezone.now()
+    StaleRollup.objects.bulk_create(
+        [StaleRollup(exam_id=exam_id, marked_at=now) for exam_id in set(exam_ids)],
+        update_conflicts=True, unique_fields=['exam'], update_fields=['marked_at'],
+    )
+
+
+def summarize(scores, violations):
+    """Rollup figures for the finished attempts with `scores` (None for ungraded)."""
+    scored = [score for score in scores if score is not None]
+    return {
+        'attempt_count': len(scores),
+        'scored_count': len(scored),
+        'mean_score': statistics.fmean(scored) if scored else None,
+        'median_score': statistics.median(scored) if scored else None,
+        'violation_count': violations,
+    }
+
+
+def refresh_exams(exam_ids):
+    """Recompute the group rollups of `exam_ids`, then their terms. Returns how many exams were refreshed."""
+    archived = ExamArchive.objects.filter(restored_at__isnull=True).values('exam_id')
+    exams = list(Exam.objects.filter(id__in=exam_ids).exclude(id__in=archived)
+                 .prefetch_related('allowed_groups').only('id', 'start_time'))
+    terms = set()
+    for exam in exams:
+        terms.update(refresh_exam(exam))
+    refresh_terms(terms)
+    return len(exams)
+
+
+def refresh_exam(exam):
+    """Recompute one exam's GroupExamRollup rows. Returns the (group id, term) pairs affected."""
+    scores, violations = defaultdict(list), defaultdict(int)
+    attempts = ExamAttempt.objects.filter(exam=exam, status__in=FINISHED).values_list(
+        'student__studentprofile__group_id', 'score', 'violation_count', 'status')
+    for group_id, score, violation_count, status in attempts.iterator(chunk_size=2000):
+        if group_id is not None:
+            scores[group_id].append(score)
+            violations[group_id] += violation_count > 0 or status == 'violation'
+
+    group_ids = {group.id for group in exam.allowed_groups.all()} | set(scores)
+    eligible = dict(StudentProfile.objects.filter(group_id__in=group_ids).values('group_id')
+                    .annotate(students=Count('pk')).values_list('group_id', 'students'))
+    term = term_for(exam.start_time)
+    rollups = [
+        GroupExamRollup(group_id=group_id, exam=exam, term=term, eligible_count=eligible.get(group_id, 0),
+                        **summarize(scores[group_id], violations[group_id]))
+        for group_id in group_ids
+    ]
+    with transaction.atomic():
+        # Groups dropped from the exam, or a rescheduled exam's old term, need their terms redone too
+        previous = set(GroupExamRollup.objects.filter(exam=exam).values_list('group_id', 'term'))
+        GroupExamRollup.objects.filter(exam=exam).exclude(group_id__in=group_ids).delete()
+        GroupExamRollup.objects.bulk_create(
+            rollups, update_conflicts=True, unique_fields=['group', 'exam'],
+            update_fields=['term', 'eligible_count', 'attempt_count', 'scored_count', 'mean_score',
+                           'median_score', 'violation_count', 'refreshed_at'],
+        )
+    return previous | {(group_id, term) for group_id in group_ids}
+
+
+def refresh_terms(pairs):
+    """Recompute GroupTermRollup for each (group id, term) in `pairs` from the exam rollups."""
+    for group_id, term in pairs:
+        totals = GroupExamRollup.objects.filter(group_id=group_id, term=term).aggregate(
+            exam_count=Count('id'), eligible=Sum('eligible_count'), attempts=Sum('attempt_count'),
+            scored=Sum('scored_count'), violations=Sum('violation_count'),
+            score_total=Sum(F('mean_score') * F('scored_count'), output_field=FloatField()),
+        )
+        if not totals['exam_count']:
+            GroupTermRollup.objects.filter(group_id=group_id, term=term).delete()
+            continue
+        # Medians don't combine, so the term median comes from the attempts still in the
+        # database; archived exams count towards every other figure through their rollups
+        scores = sorted(ExamAttempt.objects.filter(
+            exam__group_rollups__group_id=group_id, exam__group_rollups__term=term,
+            student__studentprofile__group_id=group_id, status__in=FINISHED, score__isnull=False,
+        ).values_list('score', flat=True))
+        GroupTermRollup.objects.update_or_create(group_id=group_id, term=term, defaults={
+            'exam_count': totals['exam_count'],
+            'eligible_count': totals['eligible'],
+            'attempt_count': totals['attempts'],
+            'scored_count': totals['scored'],
+            'mean_score': totals['score_total'] / totals['scored'] if totals['scored'] else None,
+            'median_score': statistics.median(scores) if scores else None,
+            'violation_count': totals['violations'],
+        })
+
+
+def refresh_stale(limit=None):
+    """Refresh every exam marked stale (at most `limit`). Returns how many were refreshed."""
+    started = timezone.now()
+    stale = StaleRollup.objects.order_by('marked_at').values_list('exam_id', flat=True)
+    exam_ids = list(stale[:limit] if limit else stale)
+    if not exam_ids:
+        return 0
+    refresh_exams(exam_ids)
+    # Exams marked again while we worked stay queued
+    StaleRollup.objects.filter(exam_id__in=exam_ids, marked_at__lte=started).delete()
+    return len(exam_ids)
@@ -0,0 +1,43 @@
+"""
+Question-bank search.
+
+On PostgreSQL, questions carry a `search_vector` (question text weighted
+over rubric over code template) that a trigger keeps up to date on every
+insert and update, bulk inserts included, and that a GIN index serves.
+Whole words go through full-text search (stemmed, so "sorting" finds
+"sorted"). Word fragments and identifiers that stemming would miss, like
+"bina" or "O(n log n)", go through a trigram GIN index on the question
+text. That index also serves the plain `icontains` lookups the admin and
+other filters emit. Both indexes are combined in one bitmap scan, and
+results are ranked by text rank plus trigram word similarity.
+
+Other databases (SQLite in tests) fall back to unranked substring matching.
+"""
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db import connections
+from django.db.models import F, Q, Value
+
+from .models import Question
+
+# Must match the configuration the trigger in migration 0012 indexes with
+SEARCH_CONFIG = 'english'
+MIN_QUERY_LENGTH = 3  # Shorter fragments can't use the trigram index
+
+
+def matching(questions, text):
+    """`questions` narrowed to those matching `text`, annotated with `rank` (higher is better)."""
+    if connections[questions.db].vendor == 'postgresql':
+        query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+        return questions.filter(Q(search_vector=query) | Q(question_text__icontains=text)).annotate(
+            rank=SearchRank(F('search_vector'), query) + TrigramWordSimilarity(text, 'question_text'))
+    return questions.filter(Q(question_text__icontains=text) | Q(rubric__icontains=text)).annotate(rank=Value(0.0))
+
+
+def search_questions(text, question_type=None, author_id=None):
+    """Questions matching `text`, best first, optionally of one type or from one author's exams."""
+    questions = Question.objects.select_related('exam')
+    if question_type:
+        questions = questions.filter(question_type=question_type)
+    if author_id:
+        questions = questions.filter(exam__created_by_id=author_id)
+    return matching(questions, text).order_by('-rank', '-id')
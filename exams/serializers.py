@@ -1,12 +1,16 @@
 from rest_framework import serializers
-from .models import Exam, Question, Option, ExamAttempt, Answer
+from core.fieldsets import SparseFieldsMixin
+from .models import (
+    Exam, Question, Option, ExamAttempt, Answer, ChunkedUpload, SimilarityMatch, GroupExamRollup, GroupTermRollup,
+    AuditEvent, Notification, NotificationDispatch,
+)
 
-class OptionSerializer(serializers.ModelSerializer):
+class OptionSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Option
         fields = ['id', 'option_text', 'is_correct', 'order']
 
-class QuestionSerializer(serializers.ModelSerializer):
+class QuestionSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     options = OptionSerializer(many=True, read_only=True)
     
     class Meta:
@@ -14,7 +18,7 @@ class QuestionSerializer(serializers.ModelSerializer):
         fields = ['id', 'exam', 'question_text', 'question_type', 'points', 'order', 
                  'code_template', 'test_cases', 'options', 'created_at']
 
-class ExamSerializer(serializers.ModelSerializer):
+class ExamSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     questions = QuestionSerializer(many=True, read_only=True)
     created_by_name = serializers.SerializerMethodField(read_only=True)
     
@@ -29,15 +33,18 @@ class ExamSerializer(serializers.ModelSerializer):
                  'shuffle_questions', 'show_results_after', 'is_proctored',
                  'status', 'questions', 'created_at', 'updated_at']
         read_only_fields = ['created_by', 'status']
+        field_dependencies = {
+            'created_by_name': ['created_by__first_name', 'created_by__last_name', 'created_by__email'],
+        }
 
-class AnswerSerializer(serializers.ModelSerializer):
+class AnswerSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Answer
         fields = ['id', 'attempt', 'question', 'mcq_answer', 'descriptive_answer',
                  'code_answer', 'file_answer', 'points_awarded', 'feedback', 'submitted_at']
         read_only_fields = ['attempt', 'points_awarded', 'feedback']
 
-class ExamAttemptSerializer(serializers.ModelSerializer):
+class ExamAttemptSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     answers = AnswerSerializer(many=True, read_only=True)
     student_name = serializers.SerializerMethodField(read_only=True)
     
@@ -49,5 +56,107 @@ class ExamAttemptSerializer(serializers.ModelSerializer):
         model = ExamAttempt
         fields = ['id', 'student', 'student_name', 'exam', 'attempt_number',
                  'start_time', 'end_time', 'actual_duration', 'violation_count',
-                 'screen_switch_count', 'status', 'score', 'max_score', 'answers']
-        read_only_fields = ['student', 'score', 'max_score']
\ No newline at end of file
+                 'screen_switch_count', 'status', 'score', 'max_score', 'answered_count', 'graded_count',
+                 'answers']
+        read_only_fields = ['student', 'score', 'max_score', 'answered_count', 'graded_count']
+        field_dependencies = {
+            'student_name': ['student__first_name', 'student__last_name', 'student__email'],
+        }
+
+class ChunkedUploadSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ChunkedUpload
+        fields = ['id', 'attempt', 'question', 'filename', 'size', 'received_bytes', 'sha256', 'status']
+        read_only_fields = ['attempt', 'received_bytes', 'sha256', 'status']
+
+class SimilarityMatchSerializer(serializers.ModelSerializer):
+    student_a = serializers.EmailField(source='answer_a.attempt.student.email', read_only=True)
+    student_b = serializers.EmailField(source='answer_b.attempt.student.email', read_only=True)
+
+    class Meta:
+        model = SimilarityMatch
+        fields = ['id', 'question', 'kind', 'answer_a', 'student_a', 'answer_b', 'student_b',
+                  'similarity', 'detected_at']
+
+class GradingAnswerSerializer(serializers.ModelSerializer):
+    question_text = serializers.CharField(source='question.question_text', read_only=True)
+    question_type = serializers.CharField(source='question.question_type', read_only=True)
+    max_points = serializers.IntegerField(source='question.points', read_only=True)
+
+    class Meta:
+        model = Answer
+        fields = ['id', 'attempt', 'question', 'question_text', 'question_type', 'max_points',
+                  'descriptive_answer', 'file_answer', 'claimed_until']
+
+class GradeSerializer(serializers.Serializer):
+    answer = serializers.IntegerField()
+    points_awarded = serializers.FloatField(min_value=0)
+    feedback = serializers.CharField(allow_blank=True, required=False, default='')
+
+class QuestionSearchResultSerializer(serializers.ModelSerializer):
+    exam_title = serializers.CharField(source='exam.title', read_only=True)
+    author = serializers.IntegerField(source='exam.created_by_id', read_only=True)
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Question
+        fields = ['id', 'exam', 'exam_title', 'author', 'question_text', 'question_type', 'points', 'rank']
+
+class ExamCloneSerializer(serializers.Serializer):
+    exams = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=200)
+    shift_days = serializers.IntegerField(required=False, default=0)
+    groups = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+class GroupExamRollupSerializer(serializers.ModelSerializer):
+    group_name = serializers.CharField(source='group.name', read_only=True)
+    exam_title = serializers.CharField(source='exam.title', read_only=True)
+    exam_start_time = serializers.DateTimeField(source='exam.start_time', read_only=True)
+
+    class Meta:
+        model = GroupExamRollup
+        fields = ['group', 'group_name', 'exam', 'exam_title', 'exam_start_time', 'term', 'eligible_count',
+                  'attempt_count', 'participation', 'scored_count', 'mean_score', 'median_score',
+                  'violation_count', 'violation_rate', 'refreshed_at']
+
+class GroupTermRollupSerializer(serializers.ModelSerializer):
+    group_name = serializers.CharField(source='group.name', read_only=True)
+
+    class Meta:
+        model = GroupTermRollup
+        fields = ['group', 'group_name', 'term', 'exam_count', 'eligible_count', 'attempt_count',
+                  'participation', 'scored_count', 'mean_score', 'median_score', 'violation_count',
+                  'violation_rate', 'refreshed_at']
+
+class ExamOverviewSerializer(serializers.ModelSerializer):
+    """An exam with the figures of Exam.objects.with_overview()."""
+    question_count = serializers.IntegerField(read_only=True)
+    total_points = serializers.IntegerField(read_only=True)
+    attempt_counts = serializers.SerializerMethodField()
+    average_score = serializers.FloatField(read_only=True)
+
+    def get_attempt_counts(self, obj):
+        return {status: getattr(obj, f'{status}_count') for status, _ in ExamAttempt.ATTEMPT_STATUS}
+
+    class Meta:
+        model = Exam
+        fields = ['id', 'title', 'status', 'start_time', 'end_time', 'duration_minutes', 'question_count',
+                  'total_points', 'attempt_counts', 'average_score']
+
+class AuditEventSerializer(serializers.ModelSerializer):
+    user_email = serializers.EmailField(source='user.email', read_only=True)
+
+    class Meta:
+        model = AuditEvent
+        fields = ['id', 'event', 'attempt', 'user', 'user_email', 'occurred_at', 'detail']
+
+class NotificationDispatchSerializer(serializers.ModelSerializer):
+    pending = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = NotificationDispatch
+        fields = ['id', 'kind', 'channel', 'recipients', 'sent', 'failed', 'pending', 'created_at', 'finished_at']
+
+class NotificationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Notification
+        fields = ['id', 'exam', 'kind', 'subject', 'body', 'created_at', 'read_at']
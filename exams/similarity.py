@@ -0,0 +1,199 @@
+"""
+Near-duplicate detection for descriptive and code answers.
+
+Answers are shingled (code is tokenized and normalized first, so renaming
+variables doesn't hide a copy), summarized as MinHash signatures and split
+into LSH bands. Only answers sharing a band bucket become candidates, and
+only candidates are compared exactly, so a question with n answers costs
+roughly O(n) instead of O(n²) comparisons. Signatures and bands are stored,
+so re-running only processes new or changed answers.
+"""
+import hashlib
+import random
+import re
+import struct
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Answer, AnswerSignature, SignatureBand, SimilarityMatch
+
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+WORD_SHINGLE = 3
+CODE_SHINGLE = 5
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240901)  # Fixed: stored signatures must stay comparable
+PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+ANSWER_FIELDS = {
+    'descriptive': 'descriptive_answer',
+    'code': 'code_answer',
+}
+
+CODE_KEYWORDS = frozenset('''
+    and as assert async await break case catch class const continue def default del do elif else
+    enum except extends final finally for from function global if implements import in instanceof
+    interface is lambda let new nonlocal not null or pass private protected public raise return
+    static struct super switch this throw throws try var void while with yield True False None
+    true false int float double char long short bool boolean string String print printf
+'''.split())
+_CODE_TOKEN = re.compile(r'''
+    (?P<comment>\#[^\n]*|//[^\n]*|/\*.*?\*/)
+  | (?P<string>"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')
+  | (?P<number>\b\d+(?:\.\d+)?\b)
+  | (?P<word>[A-Za-z_]\w*)
+  | (?P<symbol>[^\s\w])
+''', re.VERBOSE | re.DOTALL)
+_WORD = re.compile(r'\w+')
+
+
+def code_tokens(text):
+    """Tokens of a code answer with comments dropped and names/literals abstracted."""
+    tokens = []
+    for match in _CODE_TOKEN.finditer(text):
+        kind = match.lastgroup
+        if kind == 'comment':
+            continue
+        if kind == 'string':
+            tokens.append('STR')
+        elif kind == 'number':
+            tokens.append('NUM')
+        elif kind == 'word':
+            tokens.append(match.group() if match.group() in CODE_KEYWORDS else 'ID')
+        else:
+            tokens.append(match.group())
+    return tokens
+
+
+def shingles(text, kind):
+    """Set of 64-bit hashes of the answer's k-token shingles."""
+    if kind == 'code':
+        tokens, size = code_tokens(text), CODE_SHINGLE
+    else:
+        tokens, size = _WORD.findall(text.lower()), WORD_SHINGLE
+    if not tokens:
+        return set()
+    size = min(size, len(tokens))
+    return {
+        int.from_bytes(hashlib.blake2b(' '.join(tokens[i:i + size]).encode(), digest_size=8).digest(), 'big')
+        for i in range(len(tokens) - size + 1)
+    }
+
+
+def minhash(hashes):
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in PERMUTATIONS]
+
+
+def band_buckets(signature):
+    """One signed 64-bit bucket key per band, ready for a BigIntegerField."""
+    return [
+        int.from_bytes(hashlib.blake2b(struct.pack(f'<{ROWS}Q', *signature[band * ROWS:(band + 1) * ROWS]),
+                                       digest_size=8).digest(), 'big', signed=True)
+        for band in range(BANDS)
+    ]
+
+
+def signature_bands(signatures):
+    """The SignatureBand rows of stored AnswerSignatures, without re-signing their answers."""
+    return [
+        SignatureBand(answer_id=signature.answer_id, question_id=signature.question_id, kind=signature.kind,
+                      band=band, bucket=bucket)
+        for signature in signatures
+        for band, bucket in enumerate(band_buckets(struct.unpack(f'<{NUM_PERM}Q', bytes(signature.signature))))
+    ]
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def source_hash(text):
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def index_question(question_id, threshold=None):
+    """
+    Sign new or changed answers to one question, look up LSH candidates among
+    every signed answer to it and record verified matches. Returns the number
+    of new matches.
+    """
+    threshold = settings.PLAGIARISM_SIMILARITY_THRESHOLD if threshold is None else threshold
+    answers = {
+        answer.id: answer
+        for answer in Answer.objects.filter(question_id=question_id).only('id', *ANSWER_FIELDS.values())
+    }
+    known = {
+        (answer_id, kind): digest
+        for answer_id, kind, digest in AnswerSignature.objects.filter(question_id=question_id)
+        .values_list('answer_id', 'kind', 'source_hash')
+    }
+    changed = []
+    for answer in answers.values():
+        for kind, field in ANSWER_FIELDS.items():
+            text = getattr(answer, field)
+            if text.strip() and known.get((answer.id, kind)) != source_hash(text):
+                changed.append((answer.id, kind, text))
+    if not changed:
+        return 0
+
+    with transaction.atomic():
+        for kind in ANSWER_FIELDS:
+            stale = [answer_id for answer_id, changed_kind, _ in changed if changed_kind == kind]
+            AnswerSignature.objects.filter(kind=kind, answer_id__in=stale).delete()
+            SignatureBand.objects.filter(kind=kind, answer_id__in=stale).delete()
+            SimilarityMatch.objects.filter(Q(answer_a_id__in=stale) | Q(answer_b_id__in=stale), kind=kind).delete()
+
+        buckets = defaultdict(set)
+        for answer_id, kind, band, bucket in SignatureBand.objects.filter(question_id=question_id) \
+                .values_list('answer_id', 'kind', 'band', 'bucket'):
+            buckets[(kind, band, bucket)].add(answer_id)
+
+        shingle_cache = {}
+
+        def answer_shingles(answer_id, kind):
+            if (answer_id, kind) not in shingle_cache:
+                text = getattr(answers[answer_id], ANSWER_FIELDS[kind])
+                shingle_cache[(answer_id, kind)] = shingles(text, kind)
+            return shingle_cache[(answer_id, kind)]
+
+        signatures, bands, candidates = [], [], set()
+        for answer_id, kind, text in changed:
+            hashes = answer_shingles(answer_id, kind)
+            if not hashes:
+                continue
+            signature = minhash(hashes)
+            signatures.append(AnswerSignature(
+                answer_id=answer_id, question_id=question_id, kind=kind, source_hash=source_hash(text),
+                signature=struct.pack(f'<{NUM_PERM}Q', *signature),
+            ))
+            for band, bucket in enumerate(band_buckets(signature)):
+                key = (kind, band, bucket)
+                candidates.update((min(answer_id, other), max(answer_id, other), kind) for other in buckets[key])
+                buckets[key].add(answer_id)
+                bands.append(SignatureBand(answer_id=answer_id, question_id=question_id, kind=kind,
+                                           band=band, bucket=bucket))
+
+        # Verify candidates exactly; only these pairs are ever compared
+        matches = []
+        for first, second, kind in candidates:
+            similarity = jaccard(answer_shingles(first, kind), answer_shingles(second, kind))
+            if similarity >= threshold:
+                matches.append(SimilarityMatch(question_id=question_id, kind=kind, answer_a_id=first,
+                                               answer_b_id=second, similarity=round(similarity, 4)))
+
+        AnswerSignature.objects.bulk_create(signatures, batch_size=1000)
+        SignatureBand.objects.bulk_create(bands, batch_size=5000)
+        SimilarityMatch.objects.bulk_create(matches, batch_size=1000)
+    return len(matches)
+
+
+def index_exam(exam, threshold=None):
+    """Index every question of `exam` that takes text or code answers. Returns new matches."""
+    question_ids = exam.questions.filter(question_type__in=['descriptive', 'coding']).values_list('id', flat=True)
+    return sum(index_question(question_id, threshold) for question_id in question_ids)
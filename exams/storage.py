@@ -0,0 +1,176 @@
+import hashlib
+import os
+import re
+import tempfile
+import uuid
+from collections import OrderedDict
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ChunkedUpload
+
+READ_BLOCK_SIZE = 1024 * 1024
+MAX_CACHED_HASHERS = 256
+
+# Running SHA-256 state per upload, so each chunk is hashed once as it
+# arrives. Hash state can't be stored in the database; if another worker
+# handled the previous chunk, `_hasher_at` rebuilds it from the temp file.
+_hashers = OrderedDict()
+
+
+def temp_dir():
+    directory = Path(settings.CHUNKED_UPLOAD_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def temp_path(upload):
+    """Where the chunks of `upload` are appended until it is finalized."""
+    return temp_dir() / f'{upload.pk}.part'
+
+
+def _hasher_at(upload, offset):
+    cached = _hashers.pop(upload.pk, None)
+    if cached is not None and cached[0] == offset:
+        return cached[1]
+    hasher = hashlib.sha256()
+    path = temp_path(upload)
+    if path.exists():
+        with open(path, 'rb') as fh:
+            remaining = offset
+            while remaining > 0:
+                block = fh.read(min(READ_BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                hasher.update(block)
+                remaining -= len(block)
+    return hasher
+
+
+def _remember(upload, offset, hasher):
+    _hashers[upload.pk] = (offset, hasher)
+    while len(_hashers) > MAX_CACHED_HASHERS:
+        _hashers.popitem(last=False)
+
+
+def spool_chunk(stream, length):
+    """
+    Read up to `length` bytes of a request body into a temporary file (in
+    memory while small) and return it rewound, with the number of bytes
+    read. Lets the caller take its locks only once the client has sent
+    everything, however slow the client is.
+    """
+    spooled = tempfile.SpooledTemporaryFile(max_size=READ_BLOCK_SIZE, dir=temp_dir())
+    received = 0
+    while received < length:
+        block = stream.read(min(READ_BLOCK_SIZE, length - received))
+        if not block:
+            break
+        spooled.write(block)
+        received += len(block)
+    spooled.seek(0)
+    return spooled, received
+
+
+def append_chunk(upload, stream, length):
+    """
+    Append `length` bytes read from `stream` to the upload's temp file,
+    hashing them on the way. Never holds more than one block in memory.
+    Returns the number of bytes written.
+    """
+    hasher = _hasher_at(upload, upload.received_bytes)
+    written = 0
+    with open(temp_path(upload), 'r+b' if temp_path(upload).exists() else 'wb') as fh:
+        # Drop anything past the acknowledged offset left by an interrupted request
+        fh.truncate(upload.received_bytes)
+        fh.seek(upload.received_bytes)
+        while written < length:
+            block = stream.read(min(READ_BLOCK_SIZE, length - written))
+            if not block:
+                break
+            fh.write(block)
+            hasher.update(block)
+            written += len(block)
+    _remember(upload, upload.received_bytes + written, hasher)
+    return written
+
+
+def content_address(digest, filename):
+    """Storage name for a file with this SHA-256, keeping the original extension."""
+    extension = re.sub(r'[^a-z0-9.]', '', os.path.splitext(filename)[1].lower())[:10]
+    return f'exam_answers/sha256/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+
+class ChecksumMismatch(Exception):
+    pass
+
+
+def finalize(upload, expected_digest=None):
+    """
+    Move the finished temp file into content-addressed storage and return
+    `(digest, name)`. A file whose hash is already stored is not written twice.
+    Raises ChecksumMismatch (and throws the data away) if the client's
+    `expected_digest` doesn't match what was received.
+    """
+    digest = _hasher_at(upload, upload.received_bytes).hexdigest()
+    if expected_digest and expected_digest.lower() != digest:
+        discard(upload)
+        raise ChecksumMismatch(digest)
+    name = content_address(digest, upload.filename)
+    path = temp_path(upload)
+    if not default_storage.exists(name):
+        with open(path, 'rb') as fh:
+            saved = default_storage.save(name, File(fh))
+        # Two identical uploads finishing at once: keep the first copy only
+        if saved != name:
+            default_storage.delete(saved)
+    discard(upload)
+    return digest, name
+
+
+def discard(upload):
+    _hashers.pop(upload.pk, None)
+    try:
+        os.remove(temp_path(upload))
+    except FileNotFoundError:
+        pass
+
+
+def purge_stale_uploads(max_age_hours=None):
+    """
+    Delete unfinished uploads nobody has sent a chunk to for `max_age_hours`
+    (default CHUNKED_UPLOAD_EXPIRY_HOURS), with their temp files, and temp
+    files that old whose upload no longer exists (e.g. its attempt was
+    deleted). Returns `(uploads, files)` deleted.
+    """
+    hours = settings.CHUNKED_UPLOAD_EXPIRY_HOURS if max_age_hours is None else max_age_hours
+    cutoff = timezone.now() - timedelta(hours=hours)
+    with transaction.atomic():
+        # Uploads receiving a chunk right now are locked, and skipped
+        stale = list(ChunkedUpload.objects.select_for_update(skip_locked=True).filter(
+            status='uploading', updated_at__lt=cutoff,
+        ))
+        ChunkedUpload.objects.filter(pk__in=[upload.pk for upload in stale]).delete()
+        for upload in stale:
+            discard(upload)
+
+    files = 0
+    old = {}
+    for path in temp_dir().glob('*.part'):
+        try:
+            if path.stat().st_mtime < cutoff.timestamp():
+                old[uuid.UUID(path.stem)] = path
+        except ValueError:  # Not one of ours
+            continue
+    known = set(ChunkedUpload.objects.filter(pk__in=old).values_list('pk', flat=True))
+    for pk, path in old.items():
+        if pk not in known:
+            path.unlink(missing_ok=True)
+            files += 1
+    return len(stale), files
@@ -1,3 +1,1577 @@
-from django.test import TestCase
+import asyncio
+import hashlib
+import json
+import os
+import statistics
+import time
+import unittest
+import unittest.mock
+import uuid
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
 
-# Create your tests here.
+from django.contrib.admin.sites import site
+from django.contrib.auth.hashers import make_password
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db.models import Sum
+from django.core.files.storage import default_storage
+from django.db import NotSupportedError, connection, transaction
+from django.test import LiveServerTestCase, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core import renderers, throttling
+from core.models import User, StudentGroup, StudentProfile, HODProfile
+from core.fieldsets import project_queryset
+from . import audit, notifications, storage, views
+from .loadtest.scenarios import run as replay
+from .archive import ArchiveError, archivable_exams, archive_exam, restore_exam, write_archive
+from .grading import Grade, KeywordScorer, ScorerError, answer_hash, apply_grades, grade_pending, pending_answers
+from .grading_queue import record_grades
+from .models import (
+    Exam, Question, Option, ExamAttempt, Answer, ChunkedUpload, AnswerSignature, SignatureBand, SimilarityMatch,
+    GradingResult, ExamArchive, GroupExamRollup, GroupTermRollup, StaleRollup, AuditEvent, Notification,
+    NotificationDispatch,
+)
+from .rollups import refresh_stale, term_for
+from .serializers import ExamSerializer
+from .similarity import index_question
+from .storage import purge_stale_uploads
+from .warmup import upcoming_exams, warm_exam
+
+# Scale of the seeded data. Run with BENCHMARK_STUDENTS=1000 or 10000 to check
+# that the query budgets below really don't depend on the number of rows.
+STUDENTS = int(os.environ.get('BENCHMARK_STUDENTS', 10))
+QUESTIONS = int(os.environ.get('BENCHMARK_QUESTIONS', 200))
+OPTIONS_PER_QUESTION = 4
+
+# Latency benchmarks are opt-in: RUN_BENCHMARKS=1 python manage.py test exams
+RUN_BENCHMARKS = os.environ.get('RUN_BENCHMARKS') == '1'
+BENCHMARK_ITERATIONS = int(os.environ.get('BENCHMARK_ITERATIONS', 30))
+BENCHMARK_TOLERANCE = float(os.environ.get('BENCHMARK_TOLERANCE', 1.5))  # Allowed p95 slowdown factor
+# Baselines are per machine, so they live outside the package and out of git
+BENCHMARK_BASELINE = Path(os.environ.get(
+    'BENCHMARK_BASELINE', Path(__file__).resolve().parent.parent / '.benchmarks' / 'baseline.json'))
+
+
+def seed_exam_day(students=STUDENTS, questions=QUESTIONS, exams=3):
+    """
+    Create one student group with `students` students, a faculty member and
+    `exams` active exams of `questions` mixed-type questions each. Uses
+    bulk_create and one precomputed password hash so large scales stay fast.
+    """
+    password = make_password('password')
+    now = timezone.now()
+    group = StudentGroup.objects.create(name='Benchmark Group')
+    faculty = User.objects.create(email='faculty@jainuniversity.ac.in', password=password,
+                                  user_type='faculty', first_name='Bench', last_name='Faculty')
+    users = User.objects.bulk_create([
+        User(email=f'student{i:05d}@jainuniversity.ac.in', password=password, user_type='student')
+        for i in range(students)
+    ], batch_size=1000)
+    StudentProfile.objects.bulk_create([
+        StudentProfile(user=user, student_id=f'BENCH{i:05d}', group=group)
+        for i, user in enumerate(users)
+    ], batch_size=1000)
+
+    question_types = ['mcq', 'mcq', 'descriptive', 'coding']
+    exam_objects = []
+    for e in range(exams):
+        exam = Exam.objects.create(
+            title=f'Benchmark Exam {e}', created_by=faculty, status='active',
+            start_time=now - timedelta(hours=1), end_time=now + timedelta(hours=2),
+            duration_minutes=60,
+        )
+        exam.allowed_groups.add(group)
+        exam_questions = Question.objects.bulk_create([
+            Question(exam=exam, question_text=f'Question {q}', order=q,
+                     question_type=question_types[q % len(question_types)])
+            for q in range(questions)
+        ])
+        Option.objects.bulk_create([
+            Option(question=question, option_text=f'Option {o}', order=o, is_correct=(o == 0))
+            for question in exam_questions if question.question_type == 'mcq'
+            for o in range(OPTIONS_PER_QUESTION)
+        ])
+        exam_objects.append(exam)
+    return group, faculty, users, exam_objects
+
+
+def answer_all(attempt):
+    """Fill in a descriptive answer for every question of the attempt's exam."""
+    Answer.objects.bulk_create([
+        Answer(attempt=attempt, question=question, descriptive_answer='Benchmark answer')
+        for question in attempt.exam.questions.all()
+    ])
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Every endpoint gets a fixed query budget. A serializer or view change that
+    introduces an N+1 pushes the count past it, whatever the data volume.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.group, cls.faculty, cls.students, cls.exams = seed_exam_day()
+        cls.exam = cls.exams[0]
+        cls.student = cls.students[0]
+        cls.attempt = ExamAttempt.objects.create(student=cls.students[1], exam=cls.exam)
+        answer_all(cls.attempt)
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+    def login(self, user):
+        self.client.force_login(user)
+
+    def test_exam_list_student(self):
+        self.login(self.student)
+        with self.assertNumQueries(8):
+            response = self.client.get(reverse('exam-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), len(self.exams))
+        self.assertEqual(len(response.data[0]['questions']), QUESTIONS)
+
+    def test_exam_list_faculty(self):
+        self.login(self.faculty)
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse('exam-list'))
+        self.assertEqual(len(response.data), len(self.exams))
+
+    def test_exam_list_sparse_fields(self):
+        self.login(self.faculty)
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('exam-list'), {'fields': 'id,title'})
+        self.assertEqual(set(response.data[0]), {'id', 'title'})
+
+    def test_exam_overview(self):
+        ExamAttempt.objects.create(student=self.students[2], exam=self.exam, status='submitted', score=4)
+        self.login(self.faculty)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('exam-overview'))
+        overview = {row['id']: row for row in response.data}[self.exam.id]
+        self.assertEqual(overview['question_count'], QUESTIONS)
+        self.assertEqual(overview['total_points'], QUESTIONS)
+        self.assertEqual(overview['attempt_counts'], {
+            'not_started': 0, 'in_progress': 1, 'submitted': 1, 'timed_out': 0, 'violation': 0})
+        self.assertEqual(overview['average_score'], 4)
+
+        # Still one query with many more exams
+        for exam in self.exams:
+            for i in range(5):
+                Exam.objects.create(title=f'{exam.title} copy {i}', created_by=self.faculty, start_time=exam.start_time,
+                                    end_time=exam.end_time, duration_minutes=60)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('exam-overview'))
+        self.assertEqual(len(response.data), len(self.exams) * 6)
+
+    def test_exam_detail(self):
+        self.login(self.student)
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse('exam-detail', args=[self.exam.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['questions']), QUESTIONS)
+
+    def test_exam_detail_cached_paper(self):
+        warm_exam(self.exam)
+        self.login(self.student)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('exam-detail', args=[self.exam.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['questions']), QUESTIONS)
+
+    def test_exam_detail_not_modified(self):
+        self.login(self.student)
+        url = reverse('exam-detail', args=[self.exam.id])
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(3):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_attempt_detail(self):
+        self.login(self.attempt.student)
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse('attempt-detail', args=[self.attempt.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['answers']), QUESTIONS)
+
+    def test_attempt_status_poll(self):
+        self.login(self.attempt.student)
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('attempt-detail', args=[self.attempt.id]),
+                                       {'fields': 'id,status'})
+        self.assertEqual(response.data, {'id': self.attempt.id, 'status': 'in_progress'})
+
+    def test_start_attempt(self):
+        self.login(self.student)
+        with self.assertNumQueries(10):
+            response = self.client.post(reverse('start-exam', args=[self.exam.id]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_start_warmed_up_attempt(self):
+        warm_exam(self.exam)
+        self.login(self.student)
+        # Session, user and the conditional UPDATE
+        with self.assertNumQueries(3):
+            response = self.client.post(reverse('start-exam', args=[self.exam.id]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_submit_answer(self):
+        self.login(self.attempt.student)
+        question = self.exam.questions.first()
+        with self.assertNumQueries(3):
+            response = self.client.post(reverse('submit-answer', args=[self.attempt.id]), {
+                'question_id': question.id,
+                'answer': 'Updated answer',
+                'answer_type': 'descriptive',
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_complete_attempt(self):
+        self.login(self.attempt.student)
+        with self.assertNumQueries(5):
+            response = self.client.post(reverse('complete-exam', args=[self.attempt.id]))
+        self.assertEqual(response.status_code, 200)
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.group, cls.faculty, (cls.student,), (cls.exam,) = seed_exam_day(students=1, questions=4, exams=1)
+        cls.attempt = ExamAttempt.objects.create(student=cls.student, exam=cls.exam)
+        answer_all(cls.attempt)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_login(self.student)
+
+    def assertRevalidates(self, url, change):
+        """The ETag of `url` holds until `change()` runs, and no date-based validation is offered."""
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Last-Modified', response.headers)
+        etag = response['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # A date can't tell whether a row was deleted, so it's never enough for a 304
+        future = http_date(time.time() + 3600)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=future).status_code, 200)
+
+        change()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_exam_list_sees_deleted_options(self):
+        self.assertRevalidates(reverse('exam-list'), Option.objects.filter(question__exam=self.exam).first().delete)
+
+    def test_exam_detail_sees_deleted_questions(self):
+        url = reverse('exam-detail', args=[self.exam.id])
+        self.assertRevalidates(url, self.exam.questions.filter(question_type='descriptive').delete)
+
+    def test_attempt_detail_sees_deleted_answers(self):
+        url = reverse('attempt-detail', args=[self.attempt.id])
+        self.assertRevalidates(url, Answer.objects.filter(attempt=self.attempt, question__order=0).delete)
+
+    def test_fields_are_part_of_the_etag(self):
+        url = reverse('attempt-detail', args=[self.attempt.id])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, {'fields': 'id,status'}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class ChunkedUploadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.group, cls.faculty, cls.students, (cls.exam,) = seed_exam_day(students=2, questions=1, exams=1)
+        cls.question = Question.objects.create(exam=cls.exam, question_text='Upload your scan',
+                                               question_type='file_upload', order=1)
+
+    def setUp(self):
+        media = TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media.name, CHUNKED_UPLOAD_DIR=f'{media.name}/chunks')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = APIClient()
+
+    def upload(self, student, content, chunk=4):
+        attempt = ExamAttempt.objects.create(student=student, exam=self.exam)
+        self.client.force_login(student)
+        response = self.client.post(reverse('start-upload', args=[attempt.id]), {
+            'question': self.question.id, 'filename': 'scan.PDF', 'size': len(content)
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        upload_url = reverse('upload-chunk', args=[response.data['id']])
+        for offset in range(0, len(content), chunk):
+            response = self.client.put(upload_url, content[offset:offset + chunk],
+                                       content_type='application/octet-stream', HTTP_UPLOAD_OFFSET=str(offset))
+            self.assertEqual(response.status_code, 200, response.data)
+        return attempt, upload_url
+
+    def complete(self, upload_url):
+        return self.client.post(upload_url + 'complete/', {
+            'sha256': hashlib.sha256(b'%PDF scanned answer').hexdigest()
+        }, format='json')
+
+    def test_upload_in_chunks(self):
+        attempt, upload_url = self.upload(self.students[0], b'%PDF scanned answer')
+        response = self.complete(upload_url)
+        self.assertEqual(response.status_code, 200, response.data)
+
+        digest = hashlib.sha256(b'%PDF scanned answer').hexdigest()
+        self.assertEqual(response.data['file_answer'], f'exam_answers/sha256/{digest[:2]}/{digest[2:4]}/{digest}.pdf')
+        answer = Answer.objects.get(attempt=attempt, question=self.question)
+        self.assertEqual(answer.file_answer.read(), b'%PDF scanned answer')
+
+    def test_resume_after_wrong_offset(self):
+        attempt, upload_url = self.upload(self.students[0], b'%PDF scanned')
+        response = self.client.put(upload_url, b'answer', content_type='application/octet-stream',
+                                   HTTP_UPLOAD_OFFSET='0')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['offset'], len(b'%PDF scanned'))
+        self.assertEqual(self.client.get(upload_url).data['offset'], len(b'%PDF scanned'))
+
+    def test_identical_uploads_stored_once(self):
+        first = self.complete(self.upload(self.students[0], b'%PDF scanned answer')[1]).data['file_answer']
+        second = self.complete(self.upload(self.students[1], b'%PDF scanned answer', chunk=7)[1]).data['file_answer']
+        self.assertEqual(first, second)
+        self.assertEqual(len(default_storage.listdir(os.path.dirname(first))[1]), 1)
+
+    def test_checksum_mismatch_restarts(self):
+        _, upload_url = self.upload(self.students[0], b'%PDF corrupted answer')
+        response = self.complete(upload_url)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(ChunkedUpload.objects.get().received_bytes, 0)
+
+
+    def test_chunks_are_read_before_the_upload_is_locked(self):
+        calls = []
+        spool, lock = storage.spool_chunk, views.locked_upload
+        with unittest.mock.patch.object(storage, 'spool_chunk', lambda *args: calls.append('read') or spool(*args)), \
+                unittest.mock.patch.object(views, 'locked_upload', lambda *args: calls.append('lock') or lock(*args)):
+            self.upload(self.students[0], b'%PDF scanned answer', chunk=10)
+        self.assertEqual(calls, ['read', 'lock'] * 2)
+
+    def test_stale_uploads_are_cleaned(self):
+        attempt, upload_url = self.upload(self.students[0], b'%PDF scan')
+        stale = ChunkedUpload.objects.get()
+        fresh = ChunkedUpload.objects.create(attempt=attempt, question=self.question, filename='b.pdf', size=9)
+        orphan = storage.temp_path(ChunkedUpload(pk=uuid.uuid4()))
+        orphan.write_bytes(b'%PDF')
+        an_hour_ago = time.time() - 3600
+        os.utime(orphan, (an_hour_ago, an_hour_ago))
+        ChunkedUpload.objects.filter(pk=stale.pk).update(updated_at=timezone.now() - timedelta(hours=25))
+
+        out = StringIO()
+        call_command('clean_uploads', stdout=out)
+        self.assertIn('Deleted 1 stale upload(s) and 0 orphaned temp file(s)', out.getvalue())
+        self.assertEqual(list(ChunkedUpload.objects.all()), [fresh])
+        self.assertFalse(storage.temp_path(stale).exists())
+        self.assertTrue(orphan.exists())
+        self.assertEqual(purge_stale_uploads(max_age_hours=0), (1, 1))
+        self.assertFalse(orphan.exists())
+
+
+class PlagiarismDetectionTests(TestCase):
+    ESSAY = (
+        'Normalization removes redundancy from a relational schema by splitting tables so that every '
+        'non key attribute depends on the key, the whole key and nothing but the key, which avoids '
+        'update anomalies and keeps the stored data consistent across related tables'
+    )
+    CODE = (
+        'def total(values):\n'
+        '    result = 0\n'
+        '    for value in values:\n'
+        '        if value > 0:\n'
+        '            result += value * 2\n'
+        '    return result\n'
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.group, cls.faculty, cls.students, (cls.exam,) = seed_exam_day(students=4, questions=4, exams=1)
+        cls.descriptive = cls.exam.questions.get(question_type='descriptive')
+        cls.coding = cls.exam.questions.get(question_type='coding')
+        cls.attempts = [ExamAttempt.objects.create(student=student, exam=cls.exam) for student in cls.students]
+
+    def answer(self, attempt, question, **fields):
+        return Answer.objects.create(attempt=attempt, question=question, **fields)
+
+    def test_flags_near_duplicates_only(self):
+        original = self.answer(self.attempts[0], self.descriptive, descriptive_answer=self.ESSAY)
+        copy = self.answer(self.attempts[1], self.descriptive,
+                           descriptive_answer=self.ESSAY.replace('keeps', 'also keeps') + '.')
+        self.answer(self.attempts[2], self.descriptive,
+                    descriptive_answer='Indexes speed up lookups at the cost of slower writes and extra storage')
+
+        self.assertEqual(index_question(self.descriptive.id), 1)
+        match = SimilarityMatch.objects.get()
+        self.assertEqual((match.answer_a_id, match.answer_b_id), (original.id, copy.id))
+        self.assertGreaterEqual(match.similarity, 0.8)
+
+    def test_rerun_is_incremental(self):
+        self.answer(self.attempts[0], self.descriptive, descriptive_answer=self.ESSAY)
+        self.answer(self.attempts[1], self.descriptive, descriptive_answer=self.ESSAY)
+        self.assertEqual(index_question(self.descriptive.id), 1)
+        self.assertEqual(index_question(self.descriptive.id), 0)
+
+        late = self.answer(self.attempts[2], self.descriptive, descriptive_answer=self.ESSAY)
+        self.assertEqual(index_question(self.descriptive.id), 2)
+        self.assertEqual(SimilarityMatch.objects.filter(answer_b=late).count(), 2)
+        self.assertEqual(SimilarityMatch.objects.count(), 3)
+
+    def test_renamed_code_is_detected(self):
+        self.answer(self.attempts[0], self.coding, code_answer=self.CODE)
+        renamed = self.CODE.replace('total', 'sum_up').replace('values', 'nums').replace('value', 'n') \
+            .replace('result', 'acc')
+        self.answer(self.attempts[1], self.coding, code_answer='# my own work\n' + renamed)
+        self.assertEqual(index_question(self.coding.id), 1)
+        self.assertEqual(SimilarityMatch.objects.get().kind, 'code')
+
+    def test_similarity_endpoint(self):
+        self.answer(self.attempts[0], self.descriptive, descriptive_answer=self.ESSAY)
+        self.answer(self.attempts[1], self.descriptive, descriptive_answer=self.ESSAY)
+        client = APIClient()
+        url = reverse('exam-similarity', args=[self.exam.id])
+
+        client.force_login(self.students[0])
+        self.assertEqual(client.post(url).status_code, 403)
+
+        client.force_login(self.faculty)
+        response = client.post(url)
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['new_matches'], 1)
+        self.assertEqual(response.data['matches'][0]['student_a'], self.students[0].email)
+        self.assertEqual(len(client.get(url, {'question': self.coding.id}).data['matches']), 0)
+
+
+class CountingScorer(KeywordScorer):
+    """Keyword scorer that records every batch it is asked to score."""
+    def __init__(self, failures=0):
+        self.batches = []
+        self.failures = failures
+
+    def score(self, question, answers):
+        self.batches.append(list(answers))
+        if self.failures:
+            self.failures -= 1
+            raise ScorerError('Model timed out')
+        return super().score(question, answers)
+
+
+class GradingPipelineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.group, cls.faculty, cls.students, (cls.exam,) = seed_exam_day(students=6, questions=3, exams=1)
+        cls.question = cls.exam.questions.get(question_type='descriptive')
+        cls.question.points = 4
+        cls.question.rubric = 'Normalization removes redundancy and prevents update anomalies'
+        cls.question.save()
+        cls.attempts = [ExamAttempt.objects.create(student=student, exam=cls.exam, status='submitted')
+                        for student in cls.students]
+
+    def answer(self, attempt, text):
+        return Answer.objects.create(attempt=attempt, question=self.question, descriptive_answer=text)
+
+    def test_keyword_scorer(self):
+        full, half = KeywordScorer().score(self.question, [
+            'It removes redundancy, which prevents update anomalies. That is normalization.',
+            'Normalization removes redundancy.',
+        ])
+        self.assertEqual(full, Grade(4.0, 'Covers 6 of 6 key points.'))
+        self.assertEqual(half.points, 2.0)
+        self.assertIn('Missing: anomalies, prevents, update.', half.feedback)
+
+    def test_grades_in_batches_and_caches_identical_answers(self):
+        for attempt in self.attempts[:5]:
+            self.answer(attempt, f'Normalization removes redundancy, variant {attempt.id % 3}')
+        ExamAttempt.objects.filter(id=self.attempts[4].id).update(status='in_progress')
+        scorer = CountingScorer()
+
+        report = grade_pending(scorer=scorer, batch_size=2, concurrency=2)
+        self.assertEqual(report, {'scored': 4, 'cached': 0, 'failed': 0})
+        self.assertEqual(sorted(len(batch) for batch in scorer.batches), [1, 2])
+        self.assertFalse(Answer.objects.filter(attempt__in=self.attempts[:4], points_awarded__isnull=True).exists())
+        self.assertIsNone(Answer.objects.get(attempt=self.attempts[4]).points_awarded)
+
+        # A late answer with a text already graded is taken from the cache
+        self.answer(self.attempts[5], 'Normalization removes redundancy, variant %d' % (self.attempts[0].id % 3))
+        self.assertEqual(grade_pending(scorer=scorer), {'scored': 0, 'cached': 1, 'failed': 0})
+        self.assertEqual(len(scorer.batches), 2)
+
+    def test_rubric_change_invalidates_cache(self):
+        answer = self.answer(self.attempts[0], 'Normalization removes redundancy')
+        grade_pending(scorer=CountingScorer())
+        self.question.rubric = 'Redundancy'
+        self.question.save()
+        Answer.objects.filter(id=answer.id).update(points_awarded=None)
+
+        self.assertEqual(grade_pending(scorer=CountingScorer()), {'scored': 1, 'cached': 0, 'failed': 0})
+        self.assertEqual(Answer.objects.get(id=answer.id).points_awarded, 4.0)
+        self.assertEqual(GradingResult.objects.count(), 2)
+
+    def test_grading_changes_the_attempt_etag(self):
+        self.answer(self.attempts[0], 'Normalization removes redundancy')
+        client = APIClient()
+        client.force_login(self.students[0])
+        url = reverse('attempt-detail', args=[self.attempts[0].id])
+        etag = client.get(url)['ETag']
+        grade_pending(scorer=CountingScorer())
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['score'], 2.0)
+
+    def test_retries_then_gives_up(self):
+        self.answer(self.attempts[0], 'Normalization removes redundancy')
+        self.assertEqual(grade_pending(scorer=CountingScorer(failures=1), retries=1, backoff=0), {'scored': 1, 'cached': 0, 'failed': 0})
+
+        Answer.objects.update(points_awarded=None)
+        GradingResult.objects.all().delete()
+        with self.assertLogs('exams.grading', 'ERROR'):
+            report = grade_pending(scorer=CountingScorer(failures=3), retries=1, backoff=0)
+        self.assertEqual(report, {'scored': 0, 'cached': 0, 'failed': 1})
+        self.assertIsNone(Answer.objects.get().points_awarded)
+
+    def test_scorer_bugs_are_not_retried(self):
+        self.answer(self.attempts[0], 'Normalization removes redundancy')
+        scorer = CountingScorer()
+        with unittest.mock.patch.object(KeywordScorer, 'score', side_effect=KeyError('rubric')):
+            with self.assertRaises(KeyError):
+                grade_pending(scorer=scorer, retries=3, backoff=0)
+        self.assertEqual(len(scorer.batches), 1)
+
+    def test_never_overwrites_grades_or_claims_made_while_scoring(self):
+        held = self.answer(self.attempts[0], 'Normalization removes redundancy')
+        Answer.objects.filter(id=held.id).update(claimed_by=self.faculty, claimed_until=timezone.now())
+        self.assertEqual(grade_pending(scorer=CountingScorer()), {'scored': 0, 'cached': 0, 'failed': 0})
+
+        graded, claimed, free = (self.answer(attempt, 'Normalization removes redundancy')
+                                 for attempt in self.attempts[1:4])
+        answers = list(pending_answers())
+        self.assertEqual({answer.id for answer in answers}, {graded.id, claimed.id, free.id})
+        # A grader and the scorer get to the same answers at the same time
+        record_grades(self.exam, self.faculty, {held.id: (3.0, 'Fine')})
+        Answer.objects.filter(id=graded.id).update(points_awarded=1.0)
+        Answer.objects.filter(id=claimed.id).update(claimed_by=self.faculty, claimed_until=timezone.now())
+
+        grades = {answer_hash(free.descriptive_answer): Grade(2.0, 'Partly')}
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(apply_grades(answers, grades), 1)
+        points = dict(Answer.objects.values_list('id', 'points_awarded'))
+        self.assertEqual(points, {held.id: 3.0, graded.id: 1.0, claimed.id: None, free.id: 2.0})
+        audit.flush()
+        self.assertEqual(list(AuditEvent.objects.values_list('event', 'detail__answer')), [('graded', free.id)])
+
+    def test_command(self):
+        self.answer(self.attempts[0], 'Normalization removes redundancy')
+        out = StringIO()
+        call_command('grade_answers', str(self.exam.id), stdout=out)
+        self.assertIn('Scored 1', out.getvalue())
+        self.assertEqual(Answer.objects.get().points_awarded, 2.0)
+
+
+class GradingQueueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.group, cls.faculty, cls.students, (cls.exam,) = seed_exam_day(students=6, questions=4, exams=1)
+        cls.hod = User.objects.create(email='hod@jainuniversity.ac.in', user_type='hod')
+        cls.question = cls.exam.questions.get(question_type='descriptive')
+        cls.attempts = [ExamAttempt.objects.create(student=student, exam=cls.exam, status='submitted')
+                        for student in cls.students]
+        cls.answers = [Answer.objects.create(attempt=attempt, question=cls.question, descriptive_answer='An answer')
+                       for attempt in cls.attempts]
+
+    def setUp(self):
+        self.faculty_client = APIClient()
+        self.faculty_client.force_login(self.faculty)
+        self.hod_client = APIClient()
+        self.hod_client.force_login(self.hod)
+
+    def claim(self, client, batch_size):
+        response = client.post(reverse('grading-claim', args=[self.exam.id]), {'batch_size': batch_size}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        return [answer['id'] for answer in response.data['answers']]
+
+    def submit(self, client, grades):
+        return client.post(reverse('grading-submit', args=[self.exam.id]), {'grades': [
+            {'answer': answer_id, 'points_awarded': points, 'feedback': 'Reviewed'} for answer_id, points in grades
+        ]}, format='json')
+
+    def test_graders_claim_disjoint_batches(self):
+        first = self.claim(self.faculty_client, 4)
+        second = self.claim(self.hod_client, 4)
+        self.assertEqual(len(first), 4)
+        self.assertEqual(len(second), 2)
+        self.assertFalse(set(first) & set(second))
+        self.assertEqual(self.claim(self.faculty_client, 4), first)  # Renewing keeps the same batch
+
+    def test_expired_lease_can_be_reclaimed(self):
+        first = self.claim(self.faculty_client, 6)
+        Answer.objects.update(claimed_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.claim(self.hod_client, 6), first)
+
+        response = self.submit(self.faculty_client, [(first[0], 1)])
+        self.assertEqual(response.data, {'graded': [], 'rejected': [first[0]]})
+
+    def test_submit_updates_attempt_scores(self):
+        self.question.points = 5
+        self.question.save()
+        claimed = self.claim(self.faculty_client, 2)
+        with self.assertNumQueries(16):  # Including the savepoint pairs, the attempt row locks (taken first) and the rollup mark
+            response = self.submit(self.faculty_client, [(claimed[0], 4), (claimed[1], 2.5)])
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(sorted(response.data['graded']), sorted(claimed))
+
+        attempt = ExamAttempt.objects.get(answers__id=claimed[0])
+        self.assertEqual(attempt.score, 4)
+        self.assertEqual(attempt.reviewed_by, self.faculty)
+        self.assertIsNotNone(attempt.reviewed_at)
+        self.assertIsNone(Answer.objects.get(id=claimed[0]).claimed_by)
+        status = self.faculty_client.get(reverse('grading-queue', args=[self.exam.id])).data
+        self.assertEqual((status['pending'], status['claimed']), (4, 0))
+
+        self.assertEqual(self.submit(self.faculty_client, [(claimed[0], 6)]).status_code, 400)
+
+    def test_claim_cost_does_not_grow_with_batch_size(self):
+        with self.assertNumQueries(8):
+            self.claim(self.faculty_client, 1)
+        with self.assertNumQueries(8):
+            self.claim(self.hod_client, 5)
+
+    def test_students_cannot_grade(self):
+        client = APIClient()
+        client.force_login(self.students[0])
+        self.assertEqual(client.post(reverse('grading-claim', args=[self.exam.id])).status_code, 403)
+
+    def test_release(self):
+        self.claim(self.faculty_client, 3)
+        response = self.faculty_client.post(reverse('grading-release', args=[self.exam.id]))
+        self.assertEqual(response.data, {'released': 3})
+        self.assertEqual(len(self.claim(self.hod_client, 6)), 6)
+
+
+class AttemptTotalsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.group, cls.faculty, cls.students, (cls.exam,) = seed_exam_day(students=2, questions=4, exams=1)
+        cls.questions = list(cls.exam.questions.all())
+
+    def setUp(self):
+        self.attempt = ExamAttempt.objects.create(student=self.students[0], exam=self.exam)
+
+    def totals(self):
+        self.attempt.refresh_from_db()
+        return self.attempt.score, self.attempt.answered_count, self.attempt.graded_count
+
+    def test_answer_writes_keep_totals(self):
+        self.assertEqual(self.totals(), (None, 0, 0))
+        first = Answer.objects.create(attempt=self.attempt, question=self.questions[0], points_awarded=1)
+        Answer.objects.bulk_create([
+            Answer(attempt=self.attempt, question=question) for question in self.questions[1:]
+        ])
+        self.assertEqual(self.totals(), (1, 4, 1))
+
+        Answer.objects.filter(attempt=self.attempt, points_awarded__isnull=True).update(points_awarded=0.5)
+        self.assertEqual(self.totals(), (2.5, 4, 4))
+
+        first.points_awarded = 3
+        first.save()
+        self.assertEqual(self.totals(), (4.5, 4, 4))
+
+        first.delete()
+        Answer.objects.filter(question=self.questions[1]).delete()
+        self.assertEqual(self.totals(), (1, 2, 2))
+
+    def test_verifier_repairs_drift(self):
+        Answer.objects.create(attempt=self.attempt, question=self.questions[0], points_awarded=2)
+        ExamAttempt.objects.filter(id=self.attempt.id).update(score=7, graded_count=0)
+
+        out = StringIO()
+        call_command('verify_attempt_totals', stdout=out)
+        self.assertIn(f'Attempt {self.attempt.id}', out.getvalue())
+        self.assertEqual(self.totals(), (7, 1, 0))
+
+        call_command('verify_attempt_totals', repair=True, stdout=StringIO())
+        self.assertEqual(self.totals(), (2, 1, 1))
+        out = StringIO()
+        call_command('verify_attempt_totals', stdout=out)
+        self.assertIn('no drift', out.getvalue())
+
+
+class AdminChangelistTests(TestCase):
+    """Changelist query counts must not grow with the number of rows listed."""
+    @classmethod
+    def setUpTestData(cls):
+        cls.group, cls.faculty, cls.students, cls.exams = seed_exam_day(students=6, questions=4, exams=2)
+        for exam in cls.exams:
+            for student in cls.students:
+                answer_all(ExamAttempt.objects.create(student=student, exam=exam))
+        cls.admin = User.objects.create_superuser(email='admin@jainuniversity.ac.in', password='password')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def changelist_queries(self, model, params=None):
+        url = reverse(f'admin:exams_{model}_changelist')
+        self.client.get(url, params)  # Warm up session and content type caches
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_query_counts_do_not_depend_on_rows(self):
+        models = ['exam', 'question', 'option', 'examattempt', 'answer']
+        before = {model: self.changelist_queries(model)[0] for model in models}
+
+        exam = Exam.objects.create(title='Another Exam', created_by=self.faculty, start_time=timezone.now(),
+                                   end_time=timezone.now() + timedelta(hours=1), duration_minutes=60)
+        questions = Question.objects.bulk_create([
+            Question(exam=exam, question_text=f'Question {q}', question_type='mcq', order=q) for q in range(5)
+        ])
+        Option.objects.bulk_create([
+            Option(question=question, option_text=f'Option {o}', order=o) for question in questions for o in range(4)
+        ])
+        for i in range(5):
+            student = User.objects.create(email=f'another{i}@jainuniversity.ac.in', user_type='student')
+            answer_all(ExamAttempt.objects.create(student=student, exam=exam))
+
+        after = {model: self.changelist_queries(model)[0] for model in models}
+        self.assertEqual(before, after)
+
+    def test_autocomplete_filter(self):
+        exam = self.exams[1]
+        _, response = self.changelist_queries('examattempt', {'exam__id__exact': exam.id})
+        self.assertEqual(response.context['cl'].result_count, len(self.students))
+        self.assertContains(response, f'<option value="{exam.id}" selected>{exam}</option>', html=True)
+        # Other exams are not rendered; the widget searches for them
+        self.assertNotContains(response, str(self.exams[0]))
+
+    def test_annotated_counts(self):
+        _, response = self.changelist_queries('exam')
+        counts = {exam.id: exam.question_count for exam in response.context['cl'].result_list}
+        self.assertEqual(counts[self.exams[0].id], 4)
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.group, cls.faculty, cls.students, (cls.old, cls.recent) = seed_exam_day(students=3, questions=4, exams=2)
+        Exam.objects.filter(id__in=[cls.old.id, cls.recent.id]).update(status='completed')
+        Exam.objects.filter(id=cls.old.id).update(end_time=timezone.now() - timedelta(days=400))
+        for exam in (cls.old, cls.recent):
+            for student in cls.students:
+                attempt = ExamAttempt.objects.create(student=student, exam=exam, status='submitted')
+                answer_all(attempt)
+        Answer.objects.filter(attempt__exam=cls.old).update(points_awarded=1.5, feedback='Fine')
+        for question in cls.old.questions.all():
+            index_question(question.id)  # Everyone gave the same answer
+        ChunkedUpload.objects.create(attempt=cls.old.attempts.first(), question=cls.old.questions.first(),
+                                     filename='er.pdf', size=10)
+
+    def setUp(self):
+        media = TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def snapshot(self, exam):
+        return (
+            list(ExamAttempt.objects.filter(exam=exam).order_by('id').values()),
+            list(Answer.objects.filter(attempt__exam=exam).order_by('id').values()),
+            list(ChunkedUpload.objects.filter(attempt__exam=exam).order_by('id').values()),
+            list(AnswerSignature.objects.filter(question__exam=exam).order_by('id').values()),
+            list(SignatureBand.objects.filter(question__exam=exam).order_by('answer', 'kind', 'band')
+                 .values_list('answer', 'kind', 'band', 'bucket')),
+            list(SimilarityMatch.objects.filter(question__exam=exam).order_by('id').values()),
+        )
+
+    def test_archive_and_restore(self):
+        self.assertEqual(list(archivable_exams()), [self.old])
+        before = self.snapshot(self.old)
+        self.assertTrue(before[-1])  # Similarity matches
+
+        call_command('archive_exams', stdout=StringIO())
+        archive = ExamArchive.objects.get()
+        self.assertEqual((archive.exam, archive.attempt_count, archive.answer_count), (self.old, 3, 12))
+        self.assertFalse(ExamAttempt.objects.filter(exam=self.old).exists())
+        self.assertFalse(SimilarityMatch.objects.filter(question__exam=self.old).exists())
+        self.assertEqual(ExamAttempt.objects.filter(exam=self.recent).count(), 3)
+        self.assertEqual(list(archivable_exams()), [])
+        call_command('archive_exams', verify=True, stdout=StringIO())
+
+        call_command('restore_exam', self.old.id, stdout=StringIO())
+        self.assertEqual(self.snapshot(self.old), before)
+        self.assertIsNotNone(ExamArchive.objects.get().restored_at)
+
+    def test_only_archived_attempts_are_deleted(self):
+        late = []
+
+        def write_then_start(exam, fh):
+            written = write_archive(exam, fh)
+            late.append(ExamAttempt.objects.create(student=self.students[0], exam=exam, attempt_number=2,
+                                                   status='submitted'))
+            return written
+
+        with unittest.mock.patch('exams.archive.write_archive', write_then_start):
+            archive = archive_exam(self.old)
+        self.assertEqual(archive.attempt_count, 3)
+        self.assertEqual(list(ExamAttempt.objects.filter(exam=self.old)), late)
+
+    def test_tampered_archive_is_refused(self):
+        call_command('archive_exams', stdout=StringIO())
+        archive = ExamArchive.objects.get()
+        with default_storage.open(archive.file, 'wb') as fh:
+            fh.write(b'not an archive')
+
+        with self.assertRaises(CommandError):
+            call_command('archive_exams', verify=True, stdout=StringIO(), stderr=StringIO())
+        with self.assertRaises(ArchiveError):
+            restore_exam(archive)
+        self.assertFalse(ExamAttempt.objects.filter(exam=self.old).exists())
+
+    def test_dry_run_keeps_rows(self):
+        out = StringIO()
+        call_command('archive_exams', dry_run=True, stdout=out)
+        self.assertIn(f'Would archive {self.old.title}', out.getvalue())
+        self.assertEqual(ExamAttempt.objects.filter(exam=self.old).count(), 3)
+
+
+class ExamWarmupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.group, cls.faculty, cls.students, (cls.exam,) = seed_exam_day(students=3, questions=2, exams=1)
+        other_group = StudentGroup.objects.create(name='Other Group')
+        cls.outsider = User.objects.create(email='outsider@jainuniversity.ac.in', user_type='student')
+        StudentProfile.objects.create(user=cls.outsider, student_id='OUT001', group=other_group)
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+    def start(self, student):
+        self.client.force_login(student)
+        return self.client.post(reverse('start-exam', args=[self.exam.id]))
+
+    def test_provisions_attempts_for_eligible_students_once(self):
+        ExamAttempt.objects.create(student=self.students[0], exam=self.exam)
+        self.assertEqual(warm_exam(self.exam), {'provisioned': 2, 'tickets': 2})
+        self.assertEqual(warm_exam(self.exam), {'provisioned': 0, 'tickets': 2})
+        self.assertEqual(
+            sorted(self.exam.attempts.values_list('student_id', 'status')),
+            [(self.students[0].id, 'in_progress')] + [(student.id, 'not_started') for student in self.students[1:]],
+        )
+        self.assertFalse(self.exam.attempts.filter(student=self.outsider).exists())
+
+    def test_start_uses_the_provisioned_attempt(self):
+        warm_exam(self.exam)
+        attempt = self.exam.attempts.get(student=self.students[0])
+        response = self.start(self.students[0])
+        self.assertEqual(response.data['attempt_id'], attempt.id)
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.status, 'in_progress')
+
+        # Starting again resumes the same attempt through the full checks
+        response = self.start(self.students[0])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['attempt_id'], attempt.id)
+        self.assertEqual(self.exam.attempts.filter(student=self.students[0]).count(), 1)
+
+    def test_outsider_is_still_rejected(self):
+        warm_exam(self.exam)
+        self.assertEqual(self.start(self.outsider).status_code, 403)
+
+    def test_finished_attempt_cannot_restart(self):
+        ExamAttempt.objects.create(student=self.students[0], exam=self.exam, status='submitted')
+        self.assertEqual(self.start(self.students[0]).status_code, 400)
+
+    def test_rescheduling_drops_the_cached_window(self):
+        warm_exam(self.exam)
+        self.exam.start_time = timezone.now() + timedelta(hours=1)
+        self.exam.save()
+        self.assertEqual(self.start(self.students[0]).status_code, 400)
+        self.assertEqual(self.exam.attempts.get(student=self.students[0]).status, 'not_started')
+
+    def test_not_started_attempt_cannot_be_completed(self):
+        warm_exam(self.exam)
+        attempt = self.exam.attempts.get(student=self.students[0])
+        self.client.force_login(self.students[0])
+        response = self.client.post(reverse('complete-exam', args=[attempt.id]))
+        self.assertEqual(response.status_code, 400)
+
+    def test_command_warms_upcoming_exams(self):
+        later = Exam.objects.create(title='Tomorrow', created_by=self.faculty, status='scheduled',
+                                    start_time=timezone.now() + timedelta(days=1),
+                                    end_time=timezone.now() + timedelta(days=1, hours=2), duration_minutes=60)
+        self.assertEqual(list(upcoming_exams(within_minutes=15)), [self.exam])
+        out = StringIO()
+        call_command('warm_exams', stdout=out)
+        self.assertIn(f'Exam {self.exam.id}: provisioned 3 attempts', out.getvalue())
+        self.assertFalse(later.attempts.exists())
+
+
+class GroupRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.group_a, cls.faculty, cls.students, (cls.exam,) = seed_exam_day(students=3, questions=1, exams=1)
+        cls.group_b = StudentGroup.objects.create(name='Group B')
+        cls.other = User.objects.create(email='other@jainuniversity.ac.in', user_type='student')
+        StudentProfile.objects.create(user=cls.other, student_id='OTHER01', group=cls.group_b)
+        cls.exam.allowed_groups.add(cls.group_b)
+        cls.hod = User.objects.create(email='hod@jainuniversity.ac.in', user_type='hod')
+        HODProfile.objects.create(user=cls.hod, faculty_id='HOD01').responsible_for_groups.add(cls.group_a)
+
+    def finish(self, student, score, exam=None, status='submitted', violations=0):
+        return ExamAttempt.objects.create(student=student, exam=exam or self.exam, status=status, score=score,
+                                          violation_count=violations)
+
+    def test_terms(self):
+        with self.settings(ACADEMIC_TERM_START_MONTHS=(1, 7)):
+            self.assertEqual(term_for(timezone.make_aware(timezone.datetime(2025, 8, 10))), '2025-07')
+            self.assertEqual(term_for(timezone.make_aware(timezone.datetime(2025, 3, 1))), '2025-01')
+        with self.settings(ACADEMIC_TERM_START_MONTHS=(8,)):
+            self.assertEqual(term_for(timezone.make_aware(timezone.datetime(2025, 3, 1))), '2024-08')
+
+    def test_completing_an_attempt_refreshes_the_rollups(self):
+        self.finish(self.students[0], 6)
+        self.finish(self.students[1], 9, violations=2)
+        self.finish(self.other, None, status='violation')
+        attempt = ExamAttempt.objects.create(student=self.students[2], exam=self.exam, score=7.5)
+        self.client.force_login(self.students[2])
+        self.client.post(reverse('complete-exam', args=[attempt.id]))
+        self.assertTrue(StaleRollup.objects.filter(exam=self.exam).exists())
+
+        self.assertEqual(refresh_stale(), 1)
+        self.assertFalse(StaleRollup.objects.exists())
+        a = GroupExamRollup.objects.get(group=self.group_a, exam=self.exam)
+        self.assertEqual((a.eligible_count, a.attempt_count, a.median_score, a.mean_score), (3, 3, 7.5, 7.5))
+        self.assertAlmostEqual(a.violation_rate, 1 / 3)
+        b = GroupExamRollup.objects.get(group=self.group_b, exam=self.exam)
+        self.assertEqual((b.attempt_count, b.scored_count, b.mean_score, b.violation_rate), (1, 0, None, 1.0))
+
+    def test_admin_changes_mark_the_rollups_stale(self):
+        admin_user = User.objects.create(email='admin@jainuniversity.ac.in', user_type='admin', is_staff=True,
+                                         is_superuser=True)
+        attempt = self.finish(self.students[0], None, status='in_progress')
+        self.client.force_login(admin_user)
+        self.client.post(reverse('admin:exams_examattempt_changelist') + '?status__exact=in_progress',
+                         {'action': 'mark_as_reviewed', '_selected_action': [attempt.id]})
+        self.assertEqual(ExamAttempt.objects.get(id=attempt.id).status, 'submitted')
+        self.assertEqual(list(StaleRollup.objects.values_list('exam', flat=True)), [self.exam.id])
+
+        StaleRollup.objects.all().delete()
+        answer = Answer.objects.create(attempt=attempt, question=self.exam.questions.get(), points_awarded=None)
+        request = RequestFactory().post('/')
+        request.user = admin_user
+        answer.points_awarded = 1
+        form = unittest.mock.Mock(changed_data=['points_awarded'], initial={'points_awarded': None})
+        with self.captureOnCommitCallbacks():
+            site._registry[Answer].save_model(request, answer, form, change=True)
+        self.assertEqual(list(StaleRollup.objects.values_list('exam', flat=True)), [self.exam.id])
+
+    def test_term_rollup_spans_exams(self):
+        second = Exam.objects.create(title='Second', created_by=self.faculty, status='completed',
+                                     start_time=self.exam.start_time, end_time=self.exam.end_time,
+                                     duration_minutes=60)
+        second.allowed_groups.add(self.group_a)
+        self.finish(self.students[0], 2)
+        self.finish(self.students[1], 4)
+        self.finish(self.students[0], 9, exam=second)
+        call_command('refresh_rollups', all=True, stdout=StringIO())
+
+        term = GroupTermRollup.objects.get(group=self.group_a)
+        self.assertEqual(term.term, term_for(self.exam.start_time))
+        self.assertEqual((term.exam_count, term.eligible_count, term.attempt_count), (2, 6, 3))
+        self.assertEqual((term.mean_score, term.median_score), (5.0, 4))
+        self.assertEqual(term.participation, 0.5)
+
+    def test_hod_sees_their_groups_in_one_query(self):
+        self.finish(self.students[0], 6)
+        self.finish(self.other, 3)
+        call_command('refresh_rollups', exam=[self.exam.id], stdout=StringIO())
+        self.client.force_login(self.hod)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('group-exam-rollups'))
+        self.assertEqual([row['group_name'] for row in response.data], ['Benchmark Group'])
+        self.assertEqual(response.data[0]['participation'], 1 / 3)
+
+        response = self.client.get(reverse('group-term-rollups'), {'term': term_for(self.exam.start_time)})
+        self.assertEqual(len(response.data), 1)
+        self.client.force_login(self.students[0])
+        self.assertEqual(self.client.get(reverse('group-term-rollups')).status_code, 403)
+
+
+class AuditTrailTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.group, cls.faculty, cls.students, (cls.exam,) = seed_exam_day(students=2, questions=3, exams=1)
+        cls.student = cls.students[0]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_login(self.student)
+        audit.writer.discard()
+
+    def test_lifecycle_is_recorded_off_the_request_path(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            attempt_id = self.client.post(reverse('start-exam', args=[self.exam.id])).data['attempt_id']
+            question = self.exam.questions.get(question_type='descriptive')
+            self.client.post(reverse('submit-answer', args=[attempt_id]),
+                             {'question_id': question.id, 'answer': 'Draft', 'answer_type': 'descriptive'},
+                             format='json')
+            with self.assertNumQueries(3):
+                response = self.client.post(reverse('tab-switch', args=[attempt_id]))
+            self.assertEqual(response.status_code, 204)
+            self.client.post(reverse('complete-exam', args=[attempt_id]))
+        self.assertFalse(AuditEvent.objects.exists())
+
+        with self.assertNumQueries(1):
+            self.assertEqual(audit.flush(), 4)
+        events = AuditEvent.objects.filter(attempt_id=attempt_id)
+        self.assertEqual([event.event for event in events], ['started', 'answer_saved', 'tab_switch', 'completed'])
+        self.assertEqual({event.user_id for event in events}, {self.student.id})
+        self.assertEqual(ExamAttempt.objects.get(id=attempt_id).screen_switch_count, 1)
+        # Finished attempts take no more tab switches
+        self.assertEqual(self.client.post(reverse('tab-switch', args=[attempt_id])).status_code, 400)
+
+        self.assertEqual(self.client.get(reverse('attempt-audit', args=[attempt_id])).status_code, 403)
+        self.client.force_login(self.faculty)
+        trail = self.client.get(reverse('attempt-audit', args=[attempt_id])).data
+        self.assertEqual(trail[0]['user_email'], self.student.email)
+        self.assertEqual(trail[0]['detail'], {'resumed': False})
+        self.assertEqual(trail[1]['detail'], {'question': question.id})
+
+    def test_grades_are_recorded(self):
+        attempt = ExamAttempt.objects.create(student=self.student, exam=self.exam, status='submitted')
+        question = self.exam.questions.get(question_type='descriptive')
+        answer = Answer.objects.create(attempt=attempt, question=question, descriptive_answer='An answer')
+        Answer.objects.filter(id=answer.id).update(claimed_by=self.faculty,
+                                                   claimed_until=timezone.now() + timedelta(minutes=5))
+        with self.captureOnCommitCallbacks(execute=True):
+            record_grades(self.exam, self.faculty, {answer.id: (1, 'Fine')})
+        audit.flush()
+        event = attempt.audit_events.get()
+        self.assertEqual((event.event, event.user_id, event.detail), ('graded', self.faculty.id,
+                                                                      {'answer': answer.id, 'points': 1}))
+
+    def test_rolled_back_changes_leave_no_event(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(ZeroDivisionError), transaction.atomic():
+                audit.record('tab_switch', user_id=self.student.id)
+                1 / 0
+        self.assertEqual(callbacks, [])
+        self.assertEqual(audit.flush(), 0)
+
+    def test_events_are_append_only(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            audit.record('tab_switch', user_id=self.student.id)
+        audit.flush()
+        event = AuditEvent.objects.get()
+        with self.assertRaises(NotSupportedError):
+            AuditEvent.objects.update(event='completed')
+        with self.assertRaises(NotSupportedError):
+            event.delete()
+        with self.assertRaises(NotSupportedError):
+            event.save()
+
+
+class AuditBackpressureTests(TransactionTestCase):
+    def tab_switch(self):
+        return AuditEvent(event='tab_switch', occurred_at=timezone.now())
+
+    @override_settings(AUDIT_QUEUE_SIZE=2, AUDIT_BATCH_SIZE=2, AUDIT_ENQUEUE_TIMEOUT=0.01)
+    def test_full_queue_makes_the_caller_write(self):
+        writer = audit.AuditWriter()
+        for _ in range(3):
+            writer.put(self.tab_switch())
+        self.assertEqual(AuditEvent.objects.count(), 2)
+        self.assertEqual(writer.queue.qsize(), 1)
+        writer.stop()  # Flushes what is left, as on shutdown
+        self.assertEqual(AuditEvent.objects.count(), 3)
+
+    @override_settings(AUDIT_QUEUE_SIZE=2, AUDIT_BATCH_SIZE=2, AUDIT_ENQUEUE_TIMEOUT=0.01)
+    def test_full_queue_waits_for_the_callers_commit(self):
+        writer = audit.AuditWriter()
+        with self.assertRaises(ZeroDivisionError), transaction.atomic():
+            for _ in range(3):
+                writer.put(self.tab_switch())
+            self.assertFalse(AuditEvent.objects.exists())
+            1 / 0
+        # The queued batch survived the caller's rollback
+        self.assertEqual(writer.flush(), 2)
+        self.assertEqual(AuditEvent.objects.count(), 2)
+
+        with transaction.atomic():
+            for _ in range(3):
+                writer.put(self.tab_switch())
+        self.assertEqual(AuditEvent.objects.count(), 4)
+        self.assertEqual(writer.queue.qsize(), 1)
+
+
+class ThrottleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.group, cls.faculty, (cls.student,), (cls.exam,) = seed_exam_day(students=1, questions=1, exams=1)
+        cls.attempt = ExamAttempt.objects.create(student=cls.student, exam=cls.exam)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_login(self.student)
+        cache.clear()
+        audit.writer.discard()
+
+    def switch_tab(self):
+        return self.client.post(reverse('tab-switch', args=[self.attempt.id]))
+
+    def test_attempt_bucket_runs_out(self):
+        rejected = throttling.throttle_rejections.value(route='record_tab_switch', scope='attempt')
+        for _ in range(30):  # attempt='30/min' in exams/urls.py
+            self.assertEqual(self.switch_tab().status_code, 204)
+        with self.assertLogs('core.throttling', 'WARNING'):  # Names the client
+            response = self.switch_tab()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.data['scope'], 'attempt')
+        self.assertEqual(response.data['limit'], '30/min')
+        self.assertIn(response['Retry-After'], ['1', '2'])  # One token every 2 seconds
+        self.assertEqual(throttling.throttle_rejections.value(route='record_tab_switch', scope='attempt'),
+                         rejected + 1)
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.screen_switch_count, 30)
+
+    def test_others_cannot_drain_an_attempt_bucket(self):
+        intruder = User.objects.create(email='intruder@jainuniversity.ac.in', user_type='student')
+        self.client.force_login(intruder)
+        for _ in range(30):
+            self.assertEqual(self.switch_tab().status_code, 400)
+        with self.assertLogs('core.throttling', 'WARNING'):
+            self.assertEqual(self.switch_tab().status_code, 429)  # Only the intruder's own bucket is empty
+        self.client.force_login(self.student)
+        self.assertEqual(self.switch_tab().status_code, 204)
+
+    @override_settings(THROTTLE_ENABLED=False)
+    def test_can_be_turned_off(self):
+        for _ in range(31):
+            self.assertEqual(self.switch_tab().status_code, 204)
+
+
+class ExamCloneTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.group, cls.faculty, cls.students, cls.exams = seed_exam_day(students=1, questions=8, exams=2)
+        cls.new_group = StudentGroup.objects.create(name='Next Term')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_login(self.faculty)
+
+    def clone(self, **data):
+        return self.client.post(reverse('exam-clone'), data, format='json')
+
+    def test_clone_copies_questions_and_options(self):
+        # Session, user, permission check, groups, originals, then the exam/group/question/option
+        # copies inside a savepoint pair, however many exams and questions there are
+        with self.assertNumQueries(14):
+            response = self.clone(exams=[exam.id for exam in self.exams], shift_days=7, groups=[self.new_group.id])
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual([(row['source'], row['questions'], row['options']) for row in response.data['exams']],
+                         [(exam.id, 8, 16) for exam in self.exams])
+
+        source = self.exams[0]
+        copy = Exam.objects.get(id=response.data['exams'][0]['id'])
+        self.assertEqual((copy.title, copy.status, copy.created_by), (source.title, 'draft', self.faculty))
+        self.assertEqual(copy.start_time, source.start_time + timedelta(days=7))
+        self.assertEqual(list(copy.allowed_groups.all()), [self.new_group])
+        self.assertEqual(
+            [(q.question_text, q.question_type, [(o.option_text, o.is_correct) for o in q.options.all()])
+             for q in copy.questions.prefetch_related('options')],
+            [(q.question_text, q.question_type, [(o.option_text, o.is_correct) for o in q.options.all()])
+             for q in source.questions.prefetch_related('options')],
+        )
+        self.assertEqual(source.questions.count(), 8)
+
+    def test_permissions_and_validation(self):
+        self.assertEqual(self.clone(exams=[999999]).status_code, 404)
+        self.assertEqual(self.clone(exams=[self.exams[0].id], groups=[999999]).status_code, 400)
+        other = User.objects.create(email='other@jainuniversity.ac.in', user_type='faculty')
+        self.client.force_login(other)
+        self.assertEqual(self.clone(exams=[self.exams[0].id]).status_code, 403)
+        self.client.force_login(self.students[0])
+        self.assertEqual(self.clone(exams=[self.exams[0].id]).status_code, 403)
+
+    def test_command_keeps_groups_by_default(self):
+        out = StringIO()
+        call_command('clone_exams', str(self.exams[1].id), '--shift-days', '182', stdout=out)
+        self.assertIn('8 questions, 16 options', out.getvalue())
+        copy = Exam.objects.exclude(id__in=[exam.id for exam in self.exams]).get()
+        self.assertEqual(list(copy.allowed_groups.all()), [self.group])
+        with self.assertRaises(CommandError):
+            call_command('clone_exams', '999999', stdout=StringIO())
+
+
+class QuestionSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.group, cls.faculty, cls.students, (cls.exam,) = seed_exam_day(students=1, questions=0, exams=1)
+        cls.other = User.objects.create(email='other@jainuniversity.ac.in', user_type='faculty')
+        other_exam = Exam.objects.create(title='Algorithms', created_by=cls.other, start_time=timezone.now(),
+                                         end_time=timezone.now() + timedelta(hours=1), duration_minutes=60)
+        Question.objects.bulk_create([
+            Question(exam=cls.exam, question_type='descriptive', question_text='Explain binary search trees'),
+            Question(exam=cls.exam, question_type='mcq', question_text='Which sorting algorithm is stable?'),
+            Question(exam=other_exam, question_type='coding', question_text='Implement binary search'),
+            Question(exam=other_exam, question_type='descriptive', question_text='Define recursion',
+                     rubric='Mentions a binary tree traversal'),
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_login(self.faculty)
+
+    def search(self, **params):
+        response = self.client.get(reverse('question-search'), params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return sorted(row['question_text'] for row in response.data['results'])
+
+    def test_search_and_filters(self):
+        self.assertEqual(self.search(q='binary'), ['Define recursion', 'Explain binary search trees',
+                                                  'Implement binary search'])
+        self.assertEqual(self.search(q='binary', type='coding'), ['Implement binary search'])
+        self.assertEqual(self.search(q='binary', author=self.faculty.id), ['Explain binary search trees'])
+        self.assertEqual(self.search(q='bina', limit=1, offset=5), [])
+        self.assertEqual(len(self.search(q='binary', limit=-5)), 1)  # Clamped to 1..100
+
+    def test_rejects_bad_queries(self):
+        self.assertEqual(self.client.get(reverse('question-search'), {'q': 'bi'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('question-search'), {'q': 'binary', 'type': 'essay'}).status_code, 400)
+        self.client.force_login(self.students[0])
+        self.assertEqual(self.client.get(reverse('question-search'), {'q': 'binary'}).status_code, 403)
+
+    def test_admin_search(self):
+        admin_user = User.objects.create_superuser(email='root@jainuniversity.ac.in', password='x')
+        self.client.force_login(admin_user)
+        response = self.client.get(reverse('admin:exams_question_changelist'), {'q': 'binary'})
+        self.assertEqual(response.context['cl'].result_count, 3)
+        response = self.client.get(reverse('admin:exams_question_changelist'), {'q': 'Algorithms'})
+        self.assertEqual(response.context['cl'].result_count, 2)  # By exam title
+
+    @unittest.skipUnless(connection.vendor == 'postgresql', 'Full-text search needs PostgreSQL')
+    def test_full_text_ranking(self):
+        Question.objects.filter(question_text='Define recursion').update(rubric='Mentions sorted lists')
+        self.assertIsNotNone(Question.objects.get(question_text='Define recursion').search_vector)
+        response = self.client.get(reverse('question-search'), {'q': 'sorting'})
+        # Stemming matches the rubric too, but a title hit ranks first
+        self.assertEqual([row['question_text'] for row in response.data['results']],
+                         ['Which sorting algorithm is stable?', 'Define recursion'])
+
+
+class FlakyChannel(notifications.Channel):
+    """Fails its first `failures` deliveries."""
+    name = 'flaky'
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.delivered = []
+
+    def deliver(self, message, recipients):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError('channel unavailable')
+        self.delivered.extend(recipient.user_id for recipient in recipients)
+
+
+@override_settings(NOTIFICATION_BATCH_SIZE=3, NOTIFICATION_RETRY_BACKOFF=0)
+class NotificationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.group, cls.faculty, cls.students, (cls.exam,) = seed_exam_day(students=5, questions=1, exams=1)
+        other_group = StudentGroup.objects.create(name='Second Group')
+        others = User.objects.bulk_create([
+            User(email=f'other{i}@jainuniversity.ac.in', user_type='student') for i in range(3)
+        ])
+        StudentProfile.objects.bulk_create([
+            StudentProfile(user=user, student_id=f'OTHER{i}', group=other_group, is_active=i > 0)
+            for i, user in enumerate(others)
+        ])
+        cls.exam.allowed_groups.add(other_group)
+
+    def setUp(self):
+        notifications.deliveries.discard()
+        self.client = APIClient()
+        self.client.force_login(self.faculty)
+
+    def test_fan_out_to_every_group(self):
+        with unittest.mock.patch('exams.notifications.render_to_string',
+                                 wraps=notifications.render_to_string) as render:
+            # Session, user, exam, the groups, one query per group, then one insert for the dispatches
+            with self.assertNumQueries(7), self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(reverse('exam-notifications', args=[self.exam.id]),
+                                            {'kind': 'scheduled'}, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(render.call_count, 2)  # Subject and body, once for all 7 students
+        self.assertEqual([(row['channel'], row['recipients'], row['pending']) for row in response.data['dispatches']],
+                         [('email', 7, 7), ('in_app', 7, 7)])
+
+        self.assertEqual(notifications.flush(), 6)  # 3 chunks per channel
+        self.assertEqual(len(mail.outbox), 7)
+        self.assertEqual(mail.outbox[0].subject, f'Exam scheduled: {self.exam.title}')
+        self.assertNotIn('other0@jainuniversity.ac.in', [message.to[0] for message in mail.outbox])
+        self.assertEqual(Notification.objects.filter(exam=self.exam, kind='scheduled').count(), 7)
+
+        response = self.client.get(reverse('exam-notifications', args=[self.exam.id]))
+        self.assertEqual([(row['sent'], row['failed'], row['pending']) for row in response.data['dispatches']],
+                         [(7, 0, 0), (7, 0, 0)])
+        self.assertTrue(all(row['finished_at'] for row in response.data['dispatches']))
+
+    @override_settings(NOTIFICATION_MAX_RETRIES=1)
+    def test_failed_deliveries_are_retried_then_counted(self):
+        recovering, down = FlakyChannel(failures=1), FlakyChannel(failures=100)
+        down.name = 'down'
+        with self.captureOnCommitCallbacks(execute=True):
+            dispatches = notifications.notify(self.exam, 'scheduled', channels=[recovering, down])
+        with self.assertLogs('exams.notifications', 'ERROR'):
+            notifications.flush()
+        self.assertEqual(sorted(recovering.delivered), sorted(s.id for s in self.students) + sorted(
+            StudentProfile.objects.filter(user__email__startswith='other', is_active=True).values_list('user_id', flat=True)))
+        self.assertEqual(
+            [(d.channel, d.sent, d.failed) for d in NotificationDispatch.objects.filter(id__in=[d.id for d in dispatches])
+             .order_by('id')],
+            [('flaky', 7, 0), ('down', 0, 7)])
+
+    def test_results_need_publishing(self):
+        url = reverse('exam-notifications', args=[self.exam.id])
+        self.assertEqual(self.client.post(url, {'kind': 'results'}, format='json').status_code, 400)
+        self.assertEqual(self.client.post(url, {'kind': 'reminder'}, format='json').status_code, 400)
+        Exam.objects.filter(id=self.exam.id).update(show_results_after=True)
+        self.assertEqual(self.client.post(url, {'kind': 'results'}, format='json').status_code, 202)
+        self.client.force_login(self.students[0])
+        self.assertEqual(self.client.post(url, {'kind': 'results'}, format='json').status_code, 403)
+
+    def test_scheduling_in_the_admin_notifies(self):
+        request = RequestFactory().post('/')
+        request.session, request.user = {}, self.faculty
+        request._messages = FallbackStorage(request)
+        form = unittest.mock.Mock(instance=self.exam, changed_data=['status'])
+        self.exam.status = 'scheduled'
+        with self.captureOnCommitCallbacks() as callbacks:
+            site._registry[Exam].save_related(request, form, [], change=True)
+        self.assertEqual(list(NotificationDispatch.objects.values_list('kind', 'recipients')),
+                         [('scheduled', 7), ('scheduled', 7)])
+        # Nothing reaches the worker before the admin's transaction commits
+        self.assertEqual(notifications.deliveries.queue.qsize(), 0)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(notifications.deliveries.queue.qsize(), 6)
+
+    def test_rolled_back_notifications_are_not_sent(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            notifications.notify(self.exam, 'scheduled')
+            raise RuntimeError
+        self.assertEqual(notifications.flush(), 0)
+        self.assertFalse(NotificationDispatch.objects.exists())
+
+    def test_inbox(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            notifications.notify(self.exam, 'scheduled')
+        notifications.flush()
+        self.client.force_login(self.students[0])
+        inbox = self.client.get(reverse('my-notifications'), {'unread': 1}).data
+        self.assertEqual([row['subject'] for row in inbox], [f'Exam scheduled: {self.exam.title}'])
+        response = self.client.post(reverse('mark-notifications-read'), {}, format='json')
+        self.assertEqual(response.data, {'marked_read': 1})
+        self.assertEqual(self.client.get(reverse('my-notifications'), {'unread': 1}).data, [])
+
+
+class NotifyExamCommandTests(TransactionTestCase):
+    """Commits for real: deliveries are queued when notify()'s transaction commits."""
+    def test_command(self):
+        notifications.deliveries.discard()
+        _, _, _, (exam,) = seed_exam_day(students=4, questions=1, exams=1)
+        out = StringIO()
+        call_command('notify_exam', exam.id, stdout=out)
+        self.assertIn('email: 4 of 4 sent, 0 failed', out.getvalue())
+        self.assertEqual(len(mail.outbox), 4)
+
+
+class SeedScaleCommandTests(TestCase):
+    def seed(self, prefix, seed=7):
+        call_command('seed_scale', students=60, groups=3, faculty=2, hods=1, exams=2, questions=12,
+                     prefix=prefix, seed=seed, batch_size=50, stdout=StringIO())
+        return ExamAttempt.objects.filter(exam__title__startswith=prefix)
+
+    def test_generates_related_rows(self):
+        attempts = self.seed('alpha')
+        self.assertEqual(User.objects.filter(email__startswith='alpha.s').count(), 60)
+        self.assertEqual(StudentProfile.objects.filter(user__email__startswith='alpha.').count(), 60)
+        self.assertEqual(Question.objects.filter(exam__title__startswith='alpha').count(), 24)
+        self.assertTrue(attempts.exists())
+        for attempt in attempts.filter(status='submitted'):
+            self.assertEqual(attempt.answers.count(), 12)
+            points = attempt.answers.aggregate(total=Sum('points_awarded'))['total'] or 0
+            self.assertEqual(attempt.score, points)
+
+    def test_same_seed_same_data(self):
+        first = list(self.seed('alpha').order_by('id').values_list('status', 'score'))
+        second = list(self.seed('beta').order_by('id').values_list('status', 'score'))
+        self.assertEqual(first, second)
+
+    def test_refuses_existing_prefix(self):
+        self.seed('alpha')
+        with self.assertRaises(CommandError):
+            self.seed('alpha')
+
+
+class ExamDayReplayTests(LiveServerTestCase):
+    """Runs the load generator for a few seconds against a live test server."""
+    def test_exam_day_scenario(self):
+        seed_exam_day(students=3, questions=5, exams=1)
+        options = {
+            'base_url': f'{self.live_server_url}/api/', 'scenario': 'exam_day', 'students': 3,
+            'first_student': 0, 'email_format': 'student{:05d}@jainuniversity.ac.in',
+            'password': 'password', 'exam': None, 'duration': 1.0, 'autosave_interval': 0.2,
+            'poll_interval': 0.3, 'ramp_up': 0.1, 'timeout': 10, 'seed': 1,
+        }
+        stats = asyncio.run(replay(options))
+
+        summary = stats.summary()
+        self.assertEqual(summary['errors'], [])
+        for endpoint in ('login', 'exam-list', 'exam-detail', 'start', 'submit', 'proctor-poll', 'complete'):
+            self.assertIn(endpoint, summary['endpoints'])
+        self.assertEqual(summary['endpoints']['complete']['requests'], 3)
+        self.assertEqual(ExamAttempt.objects.filter(status='submitted').count(), 3)
+
+
+def percentile(samples, percent):
+    return statistics.quantiles(samples, n=100, method='inclusive')[percent - 1]
+
+
+@unittest.skipUnless(RUN_BENCHMARKS, 'Set RUN_BENCHMARKS=1 to run the latency benchmarks')
+class ExamDayLatencyBenchmark(TestCase):
+    """
+    Measures p50/p95 latency of the exam-day flows and fails when p95 regresses
+    by more than BENCHMARK_TOLERANCE against the BENCHMARK_BASELINE file
+    (.benchmarks/baseline.json by default).
+
+    Baselines are per machine and scale; record them with
+    BENCHMARK_UPDATE_BASELINE=1 before comparing a change.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        students = max(STUDENTS, BENCHMARK_ITERATIONS)
+        cls.group, cls.faculty, cls.students, cls.exams = seed_exam_day(students=students)
+        cls.exam = cls.exams[0]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.results = {}
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.compare_with_baseline()
+        super().tearDownClass()
+
+    def measure(self, flow, request, prepare=None):
+        samples = []
+        for i in range(BENCHMARK_ITERATIONS):
+            args = prepare(i) if prepare else ()
+            start = time.perf_counter()
+            response = request(*args)
+            samples.append(time.perf_counter() - start)
+            self.assertLess(response.status_code, 400, response.content)
+        self.results[flow] = {
+            'p50': percentile(samples, 50),
+            'p95': percentile(samples, 95),
+        }
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_login(user)
+        return client
+
+    def test_list(self):
+        client = self.client_for(self.students[0])
+        self.measure('list', lambda: client.get(reverse('exam-list')))
+
+    def test_detail(self):
+        client = self.client_for(self.students[0])
+        url = reverse('exam-detail', args=[self.exam.id])
+        self.measure('detail', lambda: client.get(url))
+
+    def test_start(self):
+        url = reverse('start-exam', args=[self.exam.id])
+        # Every iteration is a different student starting for the first time
+        self.measure('start', lambda client: client.post(url),
+                     prepare=lambda i: (self.client_for(self.students[i]),))
+
+    def test_submit(self):
+        attempt = ExamAttempt.objects.create(student=self.students[0], exam=self.exam)
+        client = self.client_for(attempt.student)
+        url = reverse('submit-answer', args=[attempt.id])
+        payload = {'question_id': self.exam.questions.first().id,
+                   'answer': 'Benchmark answer', 'answer_type': 'descriptive'}
+        self.measure('submit', lambda: client.post(url, payload, format='json'))
+
+    def test_complete(self):
+        def prepare(i):
+            attempt = ExamAttempt.objects.create(student=self.students[i], exam=self.exam)
+            answer_all(attempt)
+            return self.client_for(attempt.student), reverse('complete-exam', args=[attempt.id])
+        self.measure('complete', lambda client, url: client.post(url), prepare=prepare)
+
+    @classmethod
+    def compare_with_baseline(cls):
+        scale = f'{max(STUDENTS, BENCHMARK_ITERATIONS)}x{QUESTIONS}'
+        baseline = json.loads(BENCHMARK_BASELINE.read_text()) if BENCHMARK_BASELINE.exists() else {}
+        for flow, result in sorted(cls.results.items()):
+            print(f"{flow:>10}: p50={result['p50'] * 1000:.1f}ms p95={result['p95'] * 1000:.1f}ms")
+
+        if os.environ.get('BENCHMARK_UPDATE_BASELINE') == '1':
+            baseline.setdefault(scale, {}).update(cls.results)
+            BENCHMARK_BASELINE.parent.mkdir(parents=True, exist_ok=True)
+            BENCHMARK_BASELINE.write_text(json.dumps(baseline, indent=2, sort_keys=True) + '\n')
+            return
+
+        regressions = [
+            f"{flow}: p95 {result['p95'] * 1000:.1f}ms vs baseline {expected['p95'] * 1000:.1f}ms"
+            for flow, result in cls.results.items()
+            if (expected := baseline.get(scale, {}).get(flow))
+            and result['p95'] > expected['p95'] * BENCHMARK_TOLERANCE
+        ]
+        if regressions:
+            raise AssertionError('Latency regressed:\n' + '\n'.join(regressions))
+
+
+@unittest.skipUnless(RUN_BENCHMARKS, 'Set RUN_BENCHMARKS=1 to run the latency benchmarks')
+@unittest.skipIf(renderers.orjson is None, 'orjson is not installed')
+class JSONRendererBenchmark(TestCase):
+    """Encoding time of full exam papers with DRF's stdlib renderer and the orjson one."""
+    @classmethod
+    def setUpTestData(cls):
+        cls.group, cls.faculty, cls.students, cls.exams = seed_exam_day(students=1)
+
+    def test_exam_papers(self):
+        exams = project_queryset(Exam.objects.order_by('id'), ExamSerializer)
+        payload = ExamSerializer(exams, many=True).data
+        results = {}
+        for renderer in (JSONRenderer(), renderers.FastJSONRenderer()):
+            samples = []
+            for _ in range(BENCHMARK_ITERATIONS):
+                start = time.perf_counter()
+                body = renderer.render(payload)
+                samples.append(time.perf_counter() - start)
+            results[type(renderer).__name__] = (percentile(samples, 50), json.loads(body))
+            print(f'{type(renderer).__name__:>16}: p50={percentile(samples, 50) * 1000:.2f}ms '
+                  f'for {len(body)} bytes')
+
+        (stdlib, stdlib_data), (fast, fast_data) = results.values()
+        self.assertEqual(fast_data, stdlib_data)
+        self.assertLess(fast, stdlib)
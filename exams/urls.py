@@ -1,13 +1,50 @@
 from django.urls import path
+from core.throttling import throttled
 from . import views
 
 urlpatterns = [
     path('exams/', views.ExamListView.as_view(), name='exam-list'),
+    path('exams/overview/', views.exam_overview, name='exam-overview'),
+    path('exams/clone/', views.clone_exams, name='exam-clone'),
+    path('questions/search/', views.search_question_bank, name='question-search'),
     path('exams/<int:pk>/', views.ExamDetailView.as_view(), name='exam-detail'),  # Added ExamDetailView
-    path('exams/<int:exam_id>/start/', views.start_exam_attempt, name='start-exam'),
+    path('exams/<int:exam_id>/start/', throttled(views.start_exam_attempt, user='10/min'), name='start-exam'),
     
     # CORRECTED: Use only one pattern for each endpoint (removed duplicates)
     path('attempts/<int:attempt_id>/', views.ExamAttemptDetailView.as_view(), name='attempt-detail'),
-    path('attempts/<int:attempt_id>/complete/', views.complete_exam_attempt, name='complete-exam'),
-    path('attempts/<int:attempt_id>/submit/', views.submit_answer, name='submit-answer'),
+    path('attempts/<int:attempt_id>/complete/', throttled(views.complete_exam_attempt, attempt='10/min'),
+         name='complete-exam'),
+
+    # Hot paths during an exam: autosave and proctoring. Token buckets per user and per
+    # attempt stop a looping client; the endpoint bucket caps the load on the database
+    path('attempts/<int:attempt_id>/submit/',
+         throttled(views.submit_answer, user='120/min', attempt='60/min', endpoint='2000/s'),
+         name='submit-answer'),
+    path('attempts/<int:attempt_id>/tab-switch/',
+         throttled(views.record_tab_switch, user='60/min', attempt='30/min', endpoint='1000/s'),
+         name='tab-switch'),
+    path('attempts/<int:attempt_id>/audit/', views.attempt_audit_trail, name='attempt-audit'),
+
+    # Chunked, resumable file-answer uploads
+    path('attempts/<int:attempt_id>/uploads/', views.start_file_upload, name='start-upload'),
+    path('uploads/<uuid:upload_id>/', throttled(views.file_upload_chunk, user='600/min'), name='upload-chunk'),
+    path('uploads/<uuid:upload_id>/complete/', views.complete_file_upload, name='complete-upload'),
+
+    # Plagiarism detection
+    path('exams/<int:exam_id>/similarity/', views.exam_similarity, name='exam-similarity'),
+
+    # Notifications
+    path('exams/<int:exam_id>/notifications/', views.exam_notifications, name='exam-notifications'),
+    path('notifications/', views.my_notifications, name='my-notifications'),
+    path('notifications/read/', views.mark_notifications_read, name='mark-notifications-read'),
+
+    # Manual grading queue
+    path('exams/<int:exam_id>/grading/', views.grading_queue_status, name='grading-queue'),
+    path('exams/<int:exam_id>/grading/claim/', views.claim_grading_batch, name='grading-claim'),
+    path('exams/<int:exam_id>/grading/submit/', views.submit_grades, name='grading-submit'),
+    path('exams/<int:exam_id>/grading/release/', views.release_grading_batch, name='grading-release'),
+
+    # HOD reports
+    path('reports/groups/', views.group_term_rollups, name='group-term-rollups'),
+    path('reports/groups/exams/', views.group_exam_rollups, name='group-exam-rollups'),
 ]
\ No newline at end of file
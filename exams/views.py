@@ -1,14 +1,32 @@
-from rest_framework import generics, permissions
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
+from django.db.models import Count, F, Max, Q
+from django.http import Http404
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
 from django.views.decorators.csrf import ensure_csrf_cookie
-from .models import Exam, ExamAttempt
-from core.models import StudentProfile 
-from .serializers import ExamSerializer, ExamAttemptSerializer
+from . import audit, cloning, grading_queue, notifications, rollups, search, similarity, storage, warmup
+from .models import (
+    Exam, Question, ExamAttempt, Answer, ChunkedUpload, SimilarityMatch, GroupExamRollup, GroupTermRollup,
+    NOTIFICATION_KINDS, Notification,
+)
+from .papers import exam_content_versions, exam_paper
+from core.conditional import ConditionalGetMixin
+from core.fieldsets import SparseFieldsViewMixin
+from core.models import StudentGroup, StudentProfile
+from .serializers import (
+    ExamSerializer, ExamAttemptSerializer, ChunkedUploadSerializer, SimilarityMatchSerializer,
+    GradingAnswerSerializer, GradeSerializer, GroupExamRollupSerializer, GroupTermRollupSerializer,
+    ExamOverviewSerializer, AuditEventSerializer, ExamCloneSerializer, QuestionSearchResultSerializer,
+    NotificationDispatchSerializer, NotificationSerializer,
+)
 
-class ExamListView(generics.ListAPIView):
+class ExamListView(ConditionalGetMixin, SparseFieldsViewMixin, generics.ListAPIView):
     serializer_class = ExamSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -36,12 +54,99 @@ class ExamListView(generics.ListAPIView):
             
         return Exam.objects.none()
 
-class ExamDetailView(generics.RetrieveAPIView):
+    def get_etag_parts(self):
+        # The visible exam ids are part of the ETag, so exams entering or
+        # leaving the student's window also change it
+        return exam_content_versions(self.get_queryset())
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def exam_overview(request):
+    """The user's exams with question, point and attempt figures, in a single query."""
+    user = request.user
+    if user.user_type in ['faculty', 'hod']:
+        exams = Exam.objects.filter(created_by=user)
+    elif user.user_type == 'admin':
+        exams = Exam.objects.all()
+    else:
+        return Response({'error': 'Only faculty can view the exam overview'}, status=403)
+    return Response(ExamOverviewSerializer(exams.with_overview(), many=True).data)
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def search_question_bank(request):
+    """Ranked full-text search over every exam's questions, for reusing them."""
+    if request.user.user_type not in ['faculty', 'hod', 'admin']:
+        return Response({'error': 'Only faculty can search the question bank'}, status=403)
+    text = request.query_params.get('q', '').strip()
+    if len(text) < search.MIN_QUERY_LENGTH:
+        return Response({'error': f'Search for at least {search.MIN_QUERY_LENGTH} characters'}, status=400)
+    question_type = request.query_params.get('type')
+    if question_type and question_type not in dict(Question.QUESTION_TYPES):
+        return Response({'error': f'Unknown question type: {question_type}'}, status=400)
+    try:
+        author = int(request.query_params['author']) if 'author' in request.query_params else None
+        limit = max(1, min(int(request.query_params.get('limit', 20)), 100))
+        offset = max(int(request.query_params.get('offset', 0)), 0)
+    except ValueError:
+        return Response({'error': 'author, limit and offset must be integers'}, status=400)
+
+    questions = search.search_questions(text, question_type, author)[offset:offset + limit]
+    return Response({'results': QuestionSearchResultSerializer(questions, many=True).data})
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def clone_exams(request):
+    """Copy exams with their questions and options, e.g. to re-run last term's exams."""
+    if request.user.user_type not in ['faculty', 'hod', 'admin']:
+        return Response({'error': 'Only faculty can clone exams'}, status=403)
+    serializer = ExamCloneSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=400)
+    data = serializer.validated_data
+
+    exams = list(Exam.objects.filter(id__in=data['exams']).only('id', 'created_by_id'))
+    missing = sorted(set(data['exams']) - {exam.id for exam in exams})
+    if missing:
+        return Response({'error': 'Exams not found', 'exams': missing}, status=404)
+    forbidden = sorted(exam.id for exam in exams if not can_review_exam(request.user, exam))
+    if forbidden:
+        return Response({'error': 'Not allowed to clone these exams', 'exams': forbidden}, status=403)
+    groups = None
+    if 'groups' in data:
+        groups = list(StudentGroup.objects.filter(id__in=data['groups']))
+        unknown = sorted(set(data['groups']) - {group.id for group in groups})
+        if unknown:
+            return Response({'error': 'Student groups not found', 'groups': unknown}, status=400)
+
+    cloned = cloning.clone_exams(exams, created_by=request.user, shift=timedelta(days=data['shift_days']),
+                                 groups=groups)
+    return Response({'exams': [
+        {'source': source_id, 'id': copy.id, 'title': copy.title, 'status': copy.status,
+         'start_time': copy.start_time, 'end_time': copy.end_time,
+         'questions': copy.question_count, 'options': copy.option_count}
+        for source_id, copy in cloned.items()
+    ]}, status=201)
+
+class ExamDetailView(ConditionalGetMixin, SparseFieldsViewMixin, generics.RetrieveAPIView):
     serializer_class = ExamSerializer
     permission_classes = [permissions.IsAuthenticated]
     queryset = Exam.objects.all()
 
-class ExamAttemptDetailView(generics.RetrieveAPIView):
+    def get_etag_parts(self):
+        rows = exam_content_versions(self.get_queryset().filter(pk=self.kwargs['pk']))
+        if not rows:
+            raise Http404
+        self.version = rows[0]
+        return rows
+
+    def retrieve(self, request, *args, **kwargs):
+        # The full paper is the same for everyone, so it comes from the cache the warmup fills
+        if self.get_fieldset() is None:
+            return Response(exam_paper(self.version))
+        return super().retrieve(request, *args, **kwargs)
+
+class ExamAttemptDetailView(ConditionalGetMixin, SparseFieldsViewMixin, generics.RetrieveAPIView):
     serializer_class = ExamAttemptSerializer
     permission_classes = [permissions.IsAuthenticated]
     queryset = ExamAttempt.objects.all()
@@ -53,6 +158,15 @@ class ExamAttemptDetailView(generics.RetrieveAPIView):
             return ExamAttempt.objects.filter(student=self.request.user)
         return ExamAttempt.objects.all()
 
+    def get_etag_parts(self):
+        rows = list(self.get_queryset().filter(id=self.kwargs['attempt_id']).annotate(
+            answer_count=Count('answers'),
+            answers_updated=Max('answers__updated_at'),
+        ).values_list('updated_at', 'answer_count', 'answers_updated'))
+        if not rows:
+            raise Http404
+        return rows
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 @ensure_csrf_cookie
@@ -60,6 +174,23 @@ def start_exam_attempt(request, exam_id):
     if request.user.user_type != 'student':
         return Response({'error': 'Only students can attempt exams'}, status=403)
     
+    now = timezone.now()
+
+    # Warmed-up exam: the attempt exists and the ticket proves the student may start it
+    ticket = warmup.start_ticket(exam_id, request.user.id)
+    if ticket is not None:
+        attempt_id, (start_time, end_time, duration_minutes) = ticket
+        if now < start_time or now > end_time:
+            return Response({'error': 'Exam is not available at this time'}, status=400)
+        if ExamAttempt.objects.filter(id=attempt_id, status='not_started').update(
+                status='in_progress', start_time=now, updated_at=now):
+            audit.record('started', attempt_id, request.user.id)
+            return Response({
+                'attempt_id': attempt_id,
+                'message': 'Exam started successfully',
+                'duration_minutes': duration_minutes
+            })
+
     exam = get_object_or_404(Exam, id=exam_id)
     
     try:
@@ -69,15 +200,21 @@ def start_exam_attempt(request, exam_id):
     except StudentProfile.DoesNotExist:
         return Response({'error': 'Student profile not found'}, status=404)
     
-    now = timezone.now()
     if now < exam.start_time or now > exam.end_time:
         return Response({'error': 'Exam is not available at this time'}, status=400)
     
-    attempt = ExamAttempt.objects.create(
+    attempt, created = ExamAttempt.objects.get_or_create(
         student=request.user,
         exam=exam,
         attempt_number=1
     )
+    if not created:
+        if attempt.status == 'not_started':
+            ExamAttempt.objects.filter(id=attempt.id, status='not_started').update(
+                status='in_progress', start_time=now, updated_at=now)
+        elif attempt.status != 'in_progress':
+            return Response({'error': 'You have already completed this exam'}, status=400)
+    audit.record('started', attempt.id, request.user.id, resumed=not created and attempt.status == 'in_progress')
     
     return Response({
         'attempt_id': attempt.id,
@@ -91,11 +228,13 @@ def start_exam_attempt(request, exam_id):
 def submit_answer(request, attempt_id):
     attempt = get_object_or_404(ExamAttempt, id=attempt_id)
     
-    if request.user.user_type == 'student' and attempt.student != request.user:
+    if request.user.user_type == 'student' and attempt.student_id != request.user.id:
         return Response({'error': 'Not allowed to submit to this attempt'}, status=403)
     
     if attempt.status != 'in_progress':
         return Response({'error': 'Cannot submit answers to a completed attempt'}, status=400)
+
+    audit.record('answer_saved', attempt.id, request.user.id, question=request.data.get('question_id'))
     
     return Response({
         'message': 'Answer submission received',
@@ -109,16 +248,356 @@ def submit_answer(request, attempt_id):
 def complete_exam_attempt(request, attempt_id):
     attempt = get_object_or_404(ExamAttempt, id=attempt_id)
     
-    if request.user.user_type == 'student' and attempt.student != request.user:
+    if request.user.user_type == 'student' and attempt.student_id != request.user.id:
         return Response({'error': 'Not allowed'}, status=403)
     
+    if attempt.status == 'not_started':
+        return Response({'error': 'Exam has not been started'}, status=400)
+    
     attempt.status = 'submitted'
     attempt.end_time = timezone.now()
     attempt.actual_duration = (attempt.end_time - attempt.start_time).seconds // 60
-    attempt.save()
-    
+    # Not a full save: that would write back totals an answer written meanwhile has recounted
+    attempt.save(update_fields=['status', 'end_time', 'actual_duration', 'updated_at'])
+    rollups.mark_stale([attempt.exam_id])
+    audit.record('completed', attempt.id, request.user.id)
+
     return Response({
         'message': 'Exam completed successfully',
         'score': attempt.score,
         'duration_minutes': attempt.actual_duration
-    })
\ No newline at end of file
+    })
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def record_tab_switch(request, attempt_id):
+    # One conditional UPDATE; the event itself goes to the audit trail
+    switched = ExamAttempt.objects.filter(id=attempt_id, student=request.user, status='in_progress').update(
+        screen_switch_count=F('screen_switch_count') + 1, updated_at=timezone.now())
+    if not switched:
+        return Response({'error': 'No exam in progress for this attempt'}, status=400)
+    audit.record('tab_switch', attempt_id, request.user.id)
+    return Response(status=204)
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def attempt_audit_trail(request, attempt_id):
+    attempt = get_object_or_404(ExamAttempt.objects.select_related('exam'), id=attempt_id)
+    if not can_review_exam(request.user, attempt.exam):
+        return Response({'error': 'Not allowed to view this audit trail'}, status=403)
+    # Events still waiting in the queue are not shown yet
+    return Response(AuditEventSerializer(attempt.audit_events.select_related('user'), many=True).data)
+
+
+# ===== CHUNKED FILE UPLOADS =====
+# Start with POST attempts/<id>/uploads/, send chunks with PUT uploads/<id>/ and an
+# Upload-Offset header, resume from GET uploads/<id>/, finish with POST uploads/<id>/complete/.
+
+def upload_status(upload):
+    data = ChunkedUploadSerializer(upload).data
+    data['offset'] = upload.received_bytes
+    data['chunk_size'] = settings.CHUNKED_UPLOAD_CHUNK_SIZE
+    if upload.status == 'complete':
+        data['file_answer'] = storage.content_address(upload.sha256, upload.filename)
+    return data
+
+
+def locked_upload(request, upload_id):
+    """Fetch and row-lock the caller's upload so chunks are appended one at a time."""
+    uploads = ChunkedUpload.objects.select_for_update(of=('self',)).select_related('attempt')
+    return get_object_or_404(uploads, id=upload_id, attempt__student=request.user)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def start_file_upload(request, attempt_id):
+    attempt = get_object_or_404(ExamAttempt, id=attempt_id)
+    if attempt.student_id != request.user.id:
+        return Response({'error': 'Not allowed to upload to this attempt'}, status=403)
+    if attempt.status != 'in_progress':
+        return Response({'error': 'Cannot upload to a completed attempt'}, status=400)
+
+    serializer = ChunkedUploadSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=400)
+    question = serializer.validated_data['question']
+    if question.exam_id != attempt.exam_id or question.question_type != 'file_upload':
+        return Response({'error': 'Question does not accept file uploads for this exam'}, status=400)
+    if serializer.validated_data['size'] > settings.CHUNKED_UPLOAD_MAX_SIZE:
+        return Response({'error': f'File is larger than {settings.CHUNKED_UPLOAD_MAX_SIZE} bytes'},
+                        status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    # Starting the same file again resumes the unfinished upload
+    upload = ChunkedUpload.objects.filter(attempt=attempt, status='uploading', **serializer.validated_data).first()
+    created = upload is None
+    if created:
+        upload = serializer.save(attempt=attempt)
+    return Response(upload_status(upload), status=201 if created else 200)
+
+
+@api_view(['GET', 'PUT'])
+@permission_classes([permissions.IsAuthenticated])
+def file_upload_chunk(request, upload_id):
+    if request.method == 'GET':
+        upload = get_object_or_404(ChunkedUpload, id=upload_id, attempt__student=request.user)
+        return Response(upload_status(upload))
+
+    try:
+        offset = int(request.headers['Upload-Offset'])
+        length = int(request.headers['Content-Length'])
+    except (KeyError, ValueError):
+        return Response({'error': 'Upload-Offset and Content-Length headers are required'}, status=400)
+    if length > settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE:
+        return Response({'error': f'Chunks may not exceed {settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE} bytes'},
+                        status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    def rejection(upload):
+        if upload.status != 'uploading' or upload.attempt.status != 'in_progress':
+            return Response({'error': 'Upload is no longer accepting data'}, status=400)
+        if offset != upload.received_bytes:
+            # The client lost track (e.g. a dropped response): tell it where to resume
+            return Response({'error': 'Offset does not match', 'offset': upload.received_bytes},
+                            status=status.HTTP_409_CONFLICT)
+        if offset + length > upload.size:
+            return Response({'error': 'Chunk goes past the announced file size'}, status=400)
+
+    # Turn away chunks that can't fit before reading them, and read them
+    # before taking the lock, so a slow client never holds the row
+    upload = get_object_or_404(ChunkedUpload.objects.select_related('attempt'), id=upload_id,
+                               attempt__student=request.user)
+    if (response := rejection(upload)) is not None:
+        return response
+    spooled, received = storage.spool_chunk(request.stream, length)
+    with spooled, transaction.atomic():
+        # Checked again: another request may have appended this chunk meanwhile
+        upload = locked_upload(request, upload_id)
+        if (response := rejection(upload)) is not None:
+            return response
+        upload.received_bytes += storage.append_chunk(upload, spooled, received) if received else 0
+        upload.save(update_fields=['received_bytes', 'updated_at'])
+    return Response(upload_status(upload))
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def complete_file_upload(request, upload_id):
+    with transaction.atomic():
+        upload = locked_upload(request, upload_id)
+        if upload.status == 'complete':
+            return Response(upload_status(upload))
+        if upload.received_bytes != upload.size:
+            return Response({'error': 'Upload is incomplete', 'offset': upload.received_bytes}, status=400)
+
+        try:
+            digest, name = storage.finalize(upload, expected_digest=request.data.get('sha256'))
+        except storage.ChecksumMismatch:
+            upload.received_bytes = 0
+            upload.save(update_fields=['received_bytes', 'updated_at'])
+            return Response({'error': 'Checksum mismatch, upload the file again', 'offset': 0}, status=400)
+
+        upload.sha256 = digest
+        upload.status = 'complete'
+        upload.save(update_fields=['sha256', 'status', 'updated_at'])
+        Answer.objects.update_or_create(attempt=upload.attempt, question=upload.question,
+                                        defaults={'file_answer': name})
+    return Response(upload_status(upload))
+
+
+# ===== PLAGIARISM DETECTION =====
+
+def can_review_exam(user, exam):
+    """The exam's creator, HODs and admins may see and grade everyone's answers."""
+    return user.user_type in ['hod', 'admin'] or exam.created_by_id == user.id
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([permissions.IsAuthenticated])
+def exam_similarity(request, exam_id):
+    """
+    GET lists flagged answer pairs for the exam, most similar first, optionally
+    narrowed with ?question= and ?min_similarity=. POST checks answers submitted
+    since the last run first.
+    """
+    exam = get_object_or_404(Exam, id=exam_id)
+    if not can_review_exam(request.user, exam):
+        return Response({'error': 'Not allowed to view similarity reports for this exam'}, status=403)
+
+    new_matches = similarity.index_exam(exam) if request.method == 'POST' else None
+
+    matches = SimilarityMatch.objects.filter(question__exam=exam).select_related(
+        'answer_a__attempt__student', 'answer_b__attempt__student')
+    try:
+        if request.query_params.get('question'):
+            matches = matches.filter(question_id=int(request.query_params['question']))
+        if request.query_params.get('min_similarity'):
+            matches = matches.filter(similarity__gte=float(request.query_params['min_similarity']))
+    except ValueError:
+        return Response({'error': 'question must be an id and min_similarity a number'}, status=400)
+
+    data = {'exam_id': exam.id, 'matches': SimilarityMatchSerializer(matches, many=True).data}
+    if new_matches is not None:
+        data['new_matches'] = new_matches
+    return Response(data)
+
+
+# ===== NOTIFICATIONS =====
+
+@api_view(['GET', 'POST'])
+@permission_classes([permissions.IsAuthenticated])
+def exam_notifications(request, exam_id):
+    """
+    GET reports delivery progress of every notification sent about the exam.
+    POST {"kind": "scheduled" | "results"} notifies all students of the
+    exam's groups; delivery happens in the background.
+    """
+    exam = get_object_or_404(Exam, id=exam_id)
+    if not can_review_exam(request.user, exam):
+        return Response({'error': 'Not allowed to notify students of this exam'}, status=403)
+    if request.method == 'GET':
+        return Response({'exam_id': exam.id, 'dispatches': NotificationDispatchSerializer(
+            exam.notification_dispatches.all(), many=True).data})
+
+    kind = request.data.get('kind')
+    if kind not in dict(NOTIFICATION_KINDS):
+        return Response({'error': f'kind must be one of {", ".join(dict(NOTIFICATION_KINDS))}'}, status=400)
+    if kind == 'results' and not exam.show_results_after:
+        return Response({'error': 'Results of this exam are not published'}, status=400)
+    dispatches = notifications.notify(exam, kind)
+    return Response({'exam_id': exam.id, 'dispatches': NotificationDispatchSerializer(dispatches, many=True).data},
+                    status=202)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def my_notifications(request):
+    """The user's latest in-app notifications; ?unread=1 for unread ones only."""
+    inbox = Notification.objects.filter(user=request.user)
+    if request.query_params.get('unread') in ['1', 'true']:
+        inbox = inbox.filter(read_at__isnull=True)
+    return Response(NotificationSerializer(inbox[:50], many=True).data)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def mark_notifications_read(request):
+    """Mark the given notification ids, or all of the user's notifications, as read."""
+    inbox = Notification.objects.filter(user=request.user, read_at__isnull=True)
+    ids = request.data.get('ids')
+    if ids is not None:
+        if not isinstance(ids, list) or not all(isinstance(id_, int) for id_ in ids):
+            return Response({'error': 'ids must be a list of notification ids'}, status=400)
+        inbox = inbox.filter(id__in=ids)
+    return Response({'marked_read': inbox.update(read_at=timezone.now())})
+
+
+# ===== MANUAL GRADING QUEUE =====
+# Graders claim batches with POST exams/<id>/grading/claim/, submit them with
+# POST exams/<id>/grading/submit/ and hand back what they won't grade with
+# POST exams/<id>/grading/release/.
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def grading_queue_status(request, exam_id):
+    exam = get_object_or_404(Exam, id=exam_id)
+    if not can_review_exam(request.user, exam):
+        return Response({'error': 'Not allowed to grade this exam'}, status=403)
+    counts = grading_queue.gradable_answers(exam).aggregate(
+        pending=Count('id'),
+        claimed=Count('id', filter=Q(claimed_until__gte=timezone.now())),
+    )
+    return Response({'exam_id': exam.id, **counts})
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def claim_grading_batch(request, exam_id):
+    exam = get_object_or_404(Exam, id=exam_id)
+    if not can_review_exam(request.user, exam):
+        return Response({'error': 'Not allowed to grade this exam'}, status=403)
+    try:
+        limit = int(request.data.get('batch_size', settings.GRADING_CLAIM_BATCH_SIZE))
+        question_id = request.data.get('question')
+        question_id = int(question_id) if question_id is not None else None
+    except (TypeError, ValueError):
+        return Response({'error': 'batch_size and question must be integers'}, status=400)
+    limit = max(1, min(limit, settings.GRADING_CLAIM_MAX_BATCH_SIZE))
+
+    answers = grading_queue.claim_answers(exam, request.user, limit, question_id)
+    return Response({'answers': GradingAnswerSerializer(answers, many=True).data})
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def submit_grades(request, exam_id):
+    exam = get_object_or_404(Exam, id=exam_id)
+    if not can_review_exam(request.user, exam):
+        return Response({'error': 'Not allowed to grade this exam'}, status=403)
+    serializer = GradeSerializer(data=request.data.get('grades'), many=True)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=400)
+    grades = {grade['answer']: (grade['points_awarded'], grade['feedback']) for grade in serializer.validated_data}
+
+    max_points = dict(Question.objects.filter(exam=exam, answer__id__in=grades).order_by()
+                      .values_list('answer__id', 'points'))
+    too_high = [answer_id for answer_id, (points, _) in grades.items()
+                if answer_id in max_points and points > max_points[answer_id]]
+    if too_high:
+        return Response({'error': 'Points exceed the question maximum', 'answers': too_high}, status=400)
+
+    graded = grading_queue.record_grades(exam, request.user, grades)
+    return Response({
+        'graded': graded,
+        # Lease lost to another grader, or not part of this exam
+        'rejected': sorted(set(grades) - set(graded)),
+    })
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def release_grading_batch(request, exam_id):
+    exam = get_object_or_404(Exam, id=exam_id)
+    if not can_review_exam(request.user, exam):
+        return Response({'error': 'Not allowed to grade this exam'}, status=403)
+    return Response({'released': grading_queue.release_answers(exam, request.user)})
+
+
+# ===== HOD REPORTS =====
+# Served from the rollups that refresh_rollups keeps up to date, one query each.
+# HODs see the groups they are responsible for, admins every group.
+
+def visible_rollups(request, queryset):
+    """`queryset` narrowed to what the user may see and to ?group= / ?term=; None if not allowed."""
+    user = request.user
+    if user.user_type == 'hod':
+        queryset = queryset.filter(group__hods__user=user)
+    elif user.user_type != 'admin':
+        return None
+    if request.query_params.get('group'):
+        queryset = queryset.filter(group_id=int(request.query_params['group']))
+    if request.query_params.get('term'):
+        queryset = queryset.filter(term=request.query_params['term'])
+    return queryset
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def group_term_rollups(request):
+    try:
+        rollups = visible_rollups(request, GroupTermRollup.objects.select_related('group'))
+    except ValueError:
+        return Response({'error': 'group must be an id'}, status=400)
+    if rollups is None:
+        return Response({'error': 'Only HODs and admins can view group reports'}, status=403)
+    return Response(GroupTermRollupSerializer(rollups, many=True).data)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def group_exam_rollups(request):
+    try:
+        rollups = visible_rollups(request, GroupExamRollup.objects.select_related('group', 'exam'))
+    except ValueError:
+        return Response({'error': 'group must be an id'}, status=400)
+    if rollups is None:
+        return Response({'error': 'Only HODs and admins can view group reports'}, status=403)
+    return Response(GroupExamRollupSerializer(rollups, many=True).data)
@@ -0,0 +1,96 @@
+"""
+Exam warmup, run shortly before an exam opens.
+
+At start time every eligible student starts at once. The warmup moves the
+expensive part of starting ahead of that spike: it creates a `not_started`
+attempt for every student in the exam's allowed groups, caches a start
+ticket per student (their attempt id, which doubles as proof they are
+allowed in) plus the exam's time window, and caches the paper. Starting a
+warmed-up exam is then one conditional UPDATE on the existing attempt.
+
+`warm_upcoming_exams` is the scheduler hook; the `warm_exams` command calls
+it from cron. The cache must be shared by every web worker and the job
+(see CACHES in settings). Saving an exam drops its cached window, so a
+rescheduled exam goes back to the full checks until it is warmed up again;
+group membership changes likewise apply from the next warmup.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from core.models import User
+
+from .models import Exam, ExamAttempt
+from .papers import exam_content_versions, exam_paper
+
+
+def ticket_cache_key(exam_id, student_id):
+    return f'exam-start:{exam_id}:{student_id}'
+
+
+def eligible_students(exam):
+    """Students whose group is allowed to take `exam`."""
+    return User.objects.filter(user_type='student', studentprofile__group__exams=exam)
+
+
+def provision_attempts(exam, batch_size=1000):
+    """Create a `not_started` attempt for every eligible student without one. Returns how many."""
+    existing = set(exam.attempts.values_list('student_id', flat=True))
+    missing = [student_id for student_id in eligible_students(exam).values_list('id', flat=True)
+               if student_id not in existing]
+    # Conflicts mean a student started (or another warmup ran) in the meantime
+    ExamAttempt.objects.bulk_create(
+        [ExamAttempt(student_id=student_id, exam=exam, status='not_started') for student_id in missing],
+        batch_size=batch_size, ignore_conflicts=True,
+    )
+    return len(missing)
+
+
+def warm_exam(exam, batch_size=1000):
+    """
+    Provision attempts and fill the start-ticket, window and paper caches
+    for `exam`. Safe to repeat. Returns what was done.
+    """
+    provisioned = provision_attempts(exam, batch_size)
+
+    # Entries outlive the exam by an hour so late starts still find them
+    timeout = max(int((exam.end_time - timezone.now()).total_seconds()) + 3600, 60)
+    tickets = {
+        ticket_cache_key(exam.id, student_id): attempt_id
+        for student_id, attempt_id in exam.attempts.filter(status='not_started').values_list('student_id', 'id')
+    }
+    keys = list(tickets)
+    for start in range(0, len(keys), batch_size):
+        cache.set_many({key: tickets[key] for key in keys[start:start + batch_size]}, timeout)
+    cache.set(Exam.window_cache_key(exam.id), (exam.start_time, exam.end_time, exam.duration_minutes), timeout)
+
+    version, = exam_content_versions(Exam.objects.filter(pk=exam.pk))
+    exam_paper(version)
+    return {'provisioned': provisioned, 'tickets': len(tickets)}
+
+
+def start_ticket(exam_id, student_id):
+    """
+    The warmed-up `(attempt_id, (start, end, duration_minutes))` for this
+    student, or None if the exam wasn't warmed up for them. One cache round trip.
+    """
+    window_key, ticket_key = Exam.window_cache_key(exam_id), ticket_cache_key(exam_id, student_id)
+    entries = cache.get_many([window_key, ticket_key])
+    if len(entries) < 2:
+        return None
+    return entries[ticket_key], entries[window_key]
+
+
+def upcoming_exams(within_minutes=None, now=None):
+    """Scheduled or active exams that open within `within_minutes` or are running now."""
+    now = now or timezone.now()
+    within = settings.EXAM_WARMUP_MINUTES if within_minutes is None else within_minutes
+    return Exam.objects.filter(status__in=['scheduled', 'active'], start_time__lte=now + timedelta(minutes=within),
+                               end_time__gte=now)
+
+
+def warm_upcoming_exams(within_minutes=None, now=None):
+    """Scheduler hook: warm every upcoming exam. Returns {exam id: warm_exam() result}."""
+    return {exam.id: warm_exam(exam) for exam in upcoming_exams(within_minutes, now).order_by('start_time')}